@@ -0,0 +1,108 @@
+"""
+Benchmark: pairwise vs grouped same-department/semester rule.
+
+Builds the weekly model (timetable_csp.build_model) on a synthetic department
+of N modules and reports build time, model size and solve time for the old
+pairwise ordering constraints and the grouped "department timeline"
+no-overlap.
+
+The department is split into as many semesters as needed so that every
+(department, semester) group fills about 70% of the week, which keeps every
+instance feasible.
+
+Usage:
+    python bench_department_rule.py [--sizes 10 50 150] [--time-limit 60]
+"""
+
+import argparse
+import json
+import math
+import random
+import time
+
+from ortools.sat.python import cp_model
+
+from data_loader import Instance
+from timetable_csp import build_eligibility, build_model
+
+
+def make_department(n_modules, days, slots_per_day, seed=0):
+    rng = random.Random(seed)
+    durations = [rng.choice([1, 1, 2, 2, 3]) for _ in range(n_modules)]
+    week = len(days) * slots_per_day
+    n_semesters = max(1, math.ceil(sum(durations) / (0.7 * week)))
+
+    modules = []
+    for i, dur in enumerate(durations):
+        modules.append({
+            "code": f"BM{i:04d}",
+            "semester": 1 + i % n_semesters,
+            "duration": dur,
+            "iscommon": False,
+            "department": "BM",
+            "students": rng.randint(30, 120),
+        })
+
+    # Enough common halls that hall occupancy stays around 50%
+    n_halls = max(2, math.ceil(sum(durations) / (0.5 * week)))
+    halls = [{"hall": f"H{h}", "capacity": 150, "department": "common"} for h in range(n_halls)]
+    return Instance.from_records(modules, halls)
+
+
+def run(inst, days, slots_per_day, dept_rule, time_limit, workers):
+    build_eligibility(inst)
+
+    t0 = time.perf_counter()
+    model, *_ = build_model(inst, days, slots_per_day, dept_rule=dept_rule)
+    build_s = time.perf_counter() - t0
+    proto = model.Proto()
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = time_limit
+    solver.parameters.num_search_workers = workers
+    t0 = time.perf_counter()
+    status = solver.Solve(model)
+    solve_s = time.perf_counter() - t0
+
+    return {
+        "dept_rule": dept_rule,
+        "build_s": round(build_s, 3),
+        "solve_s": round(solve_s, 3),
+        "status": solver.StatusName(status),
+        "variables": len(proto.variables),
+        "constraints": len(proto.constraints),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 150])
+    parser.add_argument("--time-limit", type=float, default=60)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--json", action="store_true", help="print one JSON object instead of a table")
+    args = parser.parse_args()
+
+    days = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+    slots_per_day = 8
+
+    rows = []
+    for n in args.sizes:
+        inst = make_department(n, days, slots_per_day)
+        for dept_rule in ("pairwise", "grouped"):
+            row = run(inst, days, slots_per_day, dept_rule, args.time_limit, args.workers)
+            row["modules"] = n
+            row["halls"] = inst.num_halls
+            rows.append(row)
+
+    if args.json:
+        print(json.dumps(rows))
+        return
+
+    print(f"{'modules':>8} {'rule':>9} {'build_s':>8} {'solve_s':>8} {'vars':>8} {'cons':>8}  status")
+    for r in rows:
+        print(f"{r['modules']:>8} {r['dept_rule']:>9} {r['build_s']:>8} {r['solve_s']:>8} "
+              f"{r['variables']:>8} {r['constraints']:>8}  {r['status']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+Benchmark: how the solver variants scale with the size of the faculty.
+
+Sweeps synthetic instances (synthetic_instance.make_instance) over module
+count, hall count, days and slots per day. For every solver variant it
+records:
+  build_s            - eligibility + model build time
+  variables/constraints - size of the CP-SAT model
+  rss_before_mb / peak_rss_mb - resident memory before the build and at the end
+  first_feasible_s   - wall time of the first solution (CP-SAT's clock)
+  solve_s, solutions, status, objective, bound
+
+Variants:
+  timetable_daily  timetable_csp.build_model         (weekly, 7 days x 8 slots)
+  timetable_flat   timetable_csp.build_flat_model
+  timetable_csp2   timetable_csp2.build_model
+  exam_pairwise    exam_timetable_csp2.build_exam_model, pairwise objective (14 days x 2 slots)
+  exam_count       same with the count objective
+  exam_two_stage   exam_two_stage.solve_two_stage (no single model: size and first
+                   solution are left empty)
+
+--symmetry builds the models with symmetry breaking (see symmetry.py);
+cases are matched without it, so --compare between a run with and one
+without gives the before/after ratios.
+
+--days / --slots override the family defaults above. Every case runs in a
+fresh process, so peak_rss_mb belongs to that case alone (use --in-process to
+skip that). --report writes the rows and the run settings as JSON;
+--compare prints the ratios against an earlier report and exits with 1 when
+build time, model size, peak memory or time to first solution grew by more
+than --tolerance (timings under 0.1 s are not flagged).
+
+Usage:
+    python bench_scaling.py [--modules 50 100 200] [--halls ...] [--days ...] [--slots ...]
+                            [--variants ...] [--time-limit 30] [--workers 8] [--seed 0] [--symmetry]
+                            [--report report.json] [--compare baseline.json] [--json]
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import time
+
+import ortools
+from ortools.sat.python import cp_model
+
+WEEKLY_DEFAULTS = (7, 8)
+EXAM_DEFAULTS = (14, 2)
+
+VARIANTS = ["timetable_daily", "timetable_flat", "timetable_csp2", "exam_pairwise", "exam_count", "exam_two_stage"]
+
+# Larger is worse for all of these
+COMPARED = ["build_s", "variables", "constraints", "peak_rss_mb", "first_feasible_s"]
+# Timings below this are too noisy to flag
+MIN_SECONDS = 0.1
+
+
+def rss_mb():
+    # ru_maxrss is in KiB on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+class FirstSolution(cp_model.CpSolverSolutionCallback):
+    def __init__(self):
+        super().__init__()
+        self.first = None
+        self.solutions = 0
+
+    def on_solution_callback(self):
+        if self.first is None:
+            self.first = self.WallTime()
+        self.solutions += 1
+
+
+def build(variant, inst, days, slots_per_day, symmetry=False):
+    if variant == "timetable_daily":
+        import timetable_csp
+        timetable_csp.build_eligibility(inst)
+        return timetable_csp.build_model(inst, days, slots_per_day, symmetry=symmetry)[0]
+    if variant == "timetable_flat":
+        import timetable_csp
+        timetable_csp.build_eligibility(inst)
+        return timetable_csp.build_flat_model(inst, days, slots_per_day, symmetry=symmetry)[0]
+    if variant == "timetable_csp2":
+        import timetable_csp2
+        timetable_csp2.build_eligibility(inst)
+        return timetable_csp2.build_model(inst, days, slots_per_day, symmetry=symmetry)[0]
+    import exam_timetable_csp2
+    objective = variant[len("exam_"):]
+    return exam_timetable_csp2.build_exam_model(
+        inst, days, slots_per_day, objective=objective, symmetry=symmetry
+    )[0]
+
+
+def run_case(case):
+    """One (variant, size) case -> report row."""
+    from synthetic_instance import make_instance
+
+    inst = make_instance(case["modules"], case["halls"], case["seed"])
+    days = [f"day{d}" for d in range(case["days"])]
+    slots_per_day = case["slots"]
+    row = dict(case, halls=inst.num_halls, rss_before_mb=rss_mb())
+
+    if case["variant"] == "exam_two_stage":
+        from exam_timetable_csp2 import semester_slot_map
+        from exam_two_stage import solve_two_stage
+
+        t0 = time.perf_counter()
+        ok, _, stats = solve_two_stage(
+            inst, days, slots_per_day, semester_slot_map(inst, slots_per_day),
+            time_limit_seconds=case["time_limit"], workers=case["workers"]
+        )
+        row.update({
+            "build_s": None, "variables": None, "constraints": None,
+            "solve_s": round(time.perf_counter() - t0, 3), "first_feasible_s": None, "solutions": int(ok),
+            "status": "FEASIBLE" if ok else stats.get("stage1_status", "UNKNOWN"),
+            "objective": None, "bound": None, "rounds": stats.get("rounds"),
+        })
+        row["peak_rss_mb"] = rss_mb()
+        return row
+
+    t0 = time.perf_counter()
+    model = build(case["variant"], inst, days, slots_per_day, case["symmetry"])
+    build_s = time.perf_counter() - t0
+    proto = model.Proto()
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = case["time_limit"]
+    solver.parameters.num_search_workers = case["workers"]
+    callback = FirstSolution()
+    t0 = time.perf_counter()
+    status = solver.Solve(model, callback)
+    scored = status in (cp_model.OPTIMAL, cp_model.FEASIBLE) and model.HasObjective()
+
+    row.update({
+        "build_s": round(build_s, 3),
+        "variables": len(proto.variables),
+        "constraints": len(proto.constraints),
+        "solve_s": round(time.perf_counter() - t0, 3),
+        "first_feasible_s": round(callback.first, 3) if callback.first is not None else None,
+        "solutions": callback.solutions,
+        "status": solver.StatusName(status),
+        "objective": solver.ObjectiveValue() if scored else None,
+        "bound": solver.BestObjectiveBound() if scored else None,
+        "peak_rss_mb": rss_mb(),
+    })
+    return row
+
+
+def make_cases(args):
+    cases = []
+    for variant, modules, halls, days, slots in itertools.product(
+        args.variants, args.modules, args.halls or [None], args.days or [None], args.slots or [None]
+    ):
+        default_days, default_slots = EXAM_DEFAULTS if variant.startswith("exam") else WEEKLY_DEFAULTS
+        cases.append({
+            "variant": variant, "modules": modules, "halls": halls,
+            "days": days or default_days, "slots": slots or default_slots,
+            "seed": args.seed, "time_limit": args.time_limit, "workers": args.workers,
+            "symmetry": args.symmetry,
+        })
+    return cases
+
+
+def case_key(row):
+    return (row["variant"], row["modules"], row["halls"], row["days"], row["slots"], row["seed"])
+
+
+def compare(rows, baseline_path, tolerance):
+    """Print ratios against a baseline report; returns the number of regressions."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {case_key(r): r for r in json.load(f)["rows"]}
+
+    regressions = 0
+    print(f"\n{'variant':<16} {'modules':>7} {'halls':>5} " + " ".join(f"{m:>17}" for m in COMPARED))
+    for row in rows:
+        base = baseline.get(case_key(row))
+        if base is None:
+            continue
+        cells = []
+        for metric in COMPARED:
+            new, old = row.get(metric), base.get(metric)
+            if not new or not old:
+                cells.append(f"{'-':>17}")
+                continue
+            ratio = new / old
+            noise = metric.endswith("_s") and max(new, old) < MIN_SECONDS
+            flag = "!" if ratio > tolerance and not noise else " "
+            regressions += flag == "!"
+            cells.append(f"{ratio:>16.2f}{flag}")
+        print(f"{row['variant']:<16} {row['modules']:>7} {row['halls']:>5} " + " ".join(cells))
+    print(f"\n{regressions} metric(s) above x{tolerance}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", type=int, nargs="+", default=[50, 100, 200])
+    parser.add_argument("--halls", type=int, nargs="+", help="default: 23 per 100 modules, like the workbook")
+    parser.add_argument("--days", type=int, nargs="+", help="default: 7 weekly, 14 for exams")
+    parser.add_argument("--slots", type=int, nargs="+", help="default: 8 weekly, 2 for exams")
+    parser.add_argument("--variants", nargs="+", choices=VARIANTS, default=VARIANTS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--time-limit", type=float, default=30)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--symmetry", action="store_true", help="build the models with symmetry breaking")
+    parser.add_argument("--in-process", action="store_true", help="run every case in this process (peak RSS accumulates)")
+    parser.add_argument("--report", metavar="FILE", help="write the rows and run settings as JSON")
+    parser.add_argument("--compare", metavar="FILE", help="earlier --report to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.25, help="ratio above which --compare flags a regression")
+    parser.add_argument("--json", action="store_true", help="print one JSON object instead of a table")
+    args = parser.parse_args()
+
+    cases = make_cases(args)
+    if args.in_process:
+        rows = [run_case(case) for case in cases]
+    else:
+        # A fresh interpreter per case keeps peak RSS per case
+        with multiprocessing.get_context("spawn").Pool(1, maxtasksperchild=1) as pool:
+            rows = pool.map(run_case, cases, chunksize=1)
+
+    report = {
+        "benchmark": "scaling",
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "settings": {k: v for k, v in vars(args).items() if k not in ("report", "compare", "json")},
+        "environment": {
+            "python": platform.python_version(),
+            "ortools": ortools.__version__,
+            "machine": platform.machine(),
+            "cpus": multiprocessing.cpu_count(),
+        },
+        "rows": rows,
+    }
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.json:
+        print(json.dumps(report))
+    else:
+        print(f"{'variant':<16} {'modules':>7} {'halls':>5} {'days':>4} {'slots':>5} {'build_s':>8} {'vars':>8} "
+              f"{'cons':>8} {'rss_mb':>7} {'first_s':>8} {'solve_s':>8} {'objective':>9}  status")
+        for r in rows:
+            print(f"{r['variant']:<16} {r['modules']:>7} {r['halls']:>5} {r['days']:>4} {r['slots']:>5} "
+                  f"{str(r['build_s']):>8} {str(r['variables']):>8} {str(r['constraints']):>8} "
+                  f"{r['peak_rss_mb']:>7} {str(r['first_feasible_s']):>8} {r['solve_s']:>8} "
+                  f"{str(r['objective']):>9}  {r['status']}")
+
+    if args.compare and compare(rows, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Compact weekly timetable schema.
+
+The expanded output of timetable_csp has one row per occupied slot, so a
+3-slot module is three rows repeating students, department, semester and
+iscommon. The compact schema (timetable_csp.py --schema compact) has one
+row per module; "slot" is the start slot:
+
+    {"status": "OPTIMAL", "schema": "compact",
+     "timetable": [{"code": "EE3301", "day": "Thu", "hall": "LR1", "slot": 0,
+                    "duration": 3, "students": 120, "department": "EE",
+                    "semester": 3, "iscommon": false}, ...]}
+
+With --dictionary the rows carry "hall" and "department" as indexes into
+top-level "halls" and "departments" tables (department null stays null).
+
+decode_compact resolves the indexes and expand_compact produces the
+expanded rows, for consumers that still need one row per slot.
+warm_start.read_previous accepts either form.
+"""
+
+import math
+
+
+def department_table(departments):
+    """Distinct departments in first-seen order; None/NaN/"" are left out."""
+    table = {}
+    for dept in departments:
+        if dept is None or dept == "" or (isinstance(dept, float) and math.isnan(dept)):
+            continue
+        table.setdefault(dept, len(table))
+    return table
+
+
+def decode_compact(result):
+    """Rows of a compact result with hall / department names (a no-op without tables)."""
+    halls = result.get("halls")
+    departments = result.get("departments")
+    rows = result.get("timetable") or []
+    if halls is None and departments is None:
+        return rows
+
+    decoded = []
+    for row in rows:
+        row = dict(row)
+        if halls is not None and isinstance(row.get("hall"), int):
+            row["hall"] = halls[row["hall"]]
+        if departments is not None and isinstance(row.get("department"), int):
+            row["department"] = departments[row["department"]]
+        decoded.append(row)
+    return decoded
+
+
+def expand_compact(result):
+    """Expanded rows (one per occupied slot, same keys as --schema expanded)."""
+    for row in decode_compact(result):
+        for s in range(row["slot"], row["slot"] + row["duration"]):
+            yield {**row, "slot": s}
@@ -0,0 +1,285 @@
+"""
+Shared, column-wise workbook loader.
+
+Every solver script used to walk the sheets with DataFrame.iterrows() and
+repeated row.get() calls. read_tables does the type coercion, NaN handling
+and department normalisation once per column and returns struct-of-arrays
+tables in which a module or hall is addressed by its row index (its id).
+
+- ModuleTable: code, semester (-1 if missing), duration (0 if missing),
+  students, iscommon, department (as in the sheet), dept_key
+- HallTable:   name, capacity, department, dept_key
+
+dept_key is the department stripped and lower-cased ("" if missing), the
+form used for the hall/department eligibility rule. The raw department is
+kept for output.
+
+Instance pairs the two tables for the model builders, which key their
+variables by module/hall id; codes and hall names are only looked up when
+the JSON output is written.
+"""
+
+import numpy as np
+import pandas as pd
+
+from input_cache import cached_load
+
+MODULES_SHEET = "module codes"
+
+
+class ModuleTable:
+    __slots__ = ("code", "semester", "duration", "students", "iscommon", "department", "dept_key")
+
+    def __init__(self, code, semester, duration, students, iscommon, department, dept_key):
+        self.code = code
+        self.semester = semester
+        self.duration = duration
+        self.students = students
+        self.iscommon = iscommon
+        self.department = department
+        self.dept_key = dept_key
+
+    def __len__(self):
+        return len(self.code)
+
+    @classmethod
+    def from_records(cls, records):
+        """Build a table from module dicts (code, semester, duration, students, ...)."""
+        department = np.array([r.get("department") for r in records], dtype=object)
+        return cls(
+            code=np.array([r["code"] for r in records], dtype=object),
+            semester=np.array([-1 if r.get("semester") is None else r["semester"] for r in records], dtype=np.int64),
+            duration=np.array([r.get("duration", 0) for r in records], dtype=np.int64),
+            students=np.array([r["students"] for r in records], dtype=np.int64),
+            iscommon=np.array([bool(r.get("iscommon", False)) for r in records], dtype=bool),
+            department=department,
+            dept_key=normalise_departments(department),
+        )
+
+    def to_records(self):
+        """One dict per module, in id order, with plain Python values."""
+        semesters = [None if s < 0 else s for s in self.semester.tolist()]
+        return [
+            {
+                "id": i,
+                "code": code,
+                "semester": sem,
+                "duration": dur,
+                "iscommon": common,
+                "department": None if dept is None or pd.isna(dept) else dept,
+                "dept_key": key,
+                "students": students,
+            }
+            for i, (code, sem, dur, common, dept, key, students) in enumerate(zip(
+                self.code.tolist(), semesters, self.duration.tolist(), self.iscommon.tolist(),
+                self.department.tolist(), self.dept_key.tolist(), self.students.tolist()
+            ))
+        ]
+
+
+class HallTable:
+    __slots__ = ("name", "capacity", "department", "dept_key")
+
+    def __init__(self, name, capacity, department, dept_key):
+        self.name = name
+        self.capacity = capacity
+        self.department = department
+        self.dept_key = dept_key
+
+    def __len__(self):
+        return len(self.name)
+
+    @classmethod
+    def from_records(cls, records):
+        """Build a table from hall dicts (hall, capacity, department)."""
+        department = np.array([r.get("department") for r in records], dtype=object)
+        return cls(
+            name=np.array([r["hall"] for r in records], dtype=object),
+            capacity=np.array([r["capacity"] for r in records], dtype=np.int64),
+            department=department,
+            dept_key=normalise_departments(department),
+        )
+
+    def to_records(self):
+        return [
+            {
+                "id": i,
+                "hall": name,
+                "capacity": capacity,
+                "department": None if dept is None or pd.isna(dept) else dept,
+                "dept_key": key,
+            }
+            for i, (name, capacity, dept, key) in enumerate(zip(
+                self.name.tolist(), self.capacity.tolist(), self.department.tolist(), self.dept_key.tolist()
+            ))
+        ]
+
+
+# ----------------------------
+# Column helpers
+# ----------------------------
+def int_column(df, name, missing):
+    if name not in df:
+        return np.full(len(df), missing, dtype=np.int64)
+    return df[name].fillna(missing).to_numpy(dtype=np.int64)
+
+
+def object_column(df, name):
+    if name not in df:
+        return np.full(len(df), None, dtype=object)
+    return df[name].to_numpy(dtype=object)
+
+
+def normalise_departments(values):
+    return pd.Series(values, dtype=object).fillna("").astype(str).str.strip().str.lower().to_numpy(dtype=object)
+
+
+def dept_key_column(df, name="department"):
+    if name not in df:
+        return np.full(len(df), "", dtype=object)
+    return normalise_departments(df[name])
+
+
+# ----------------------------
+# Tables
+# ----------------------------
+def module_table(modules_df, required=()):
+    """Modules sheet -> ModuleTable, dropping rows missing any required column."""
+    df = modules_df.dropna(subset=["module_code", "no_of_students", *required])
+    iscommon = (
+        df["iscommon"].fillna(False).astype(bool).to_numpy()
+        if "iscommon" in df else np.zeros(len(df), dtype=bool)
+    )
+    return ModuleTable(
+        code=object_column(df, "module_code"),
+        semester=int_column(df, "semester", -1),
+        duration=int_column(df, "duration", 0),
+        students=int_column(df, "no_of_students", 0),
+        iscommon=iscommon,
+        department=object_column(df, "department"),
+        dept_key=dept_key_column(df),
+    )
+
+
+def hall_table(halls_df):
+    return HallTable(
+        name=object_column(halls_df, "room_name"),
+        capacity=int_column(halls_df, "capacity", 0),
+        department=object_column(halls_df, "department"),
+        dept_key=dept_key_column(halls_df),
+    )
+
+
+def read_tables(file_path, halls_sheet, required=()):
+    """Parse the workbook once and return (ModuleTable, HallTable)."""
+    with pd.ExcelFile(file_path) as xls:
+        modules_df = pd.read_excel(xls, sheet_name=MODULES_SHEET)
+        halls_df = pd.read_excel(xls, sheet_name=halls_sheet)
+    return module_table(modules_df, required), hall_table(halls_df)
+
+
+def eligibility_matrix(modules, halls, restrict_department=True):
+    """Bool array [module_id, hall_id]: the hall seats the class and, with
+    restrict_department, is "common" or belongs to the module's department."""
+    ok = halls.capacity[None, :] >= modules.students[:, None]
+    if restrict_department:
+        hall_key = halls.dept_key[None, :]
+        ok &= (hall_key == "common") | (hall_key == modules.dept_key[:, None])
+    return ok
+
+
+# ----------------------------
+# Instance
+# ----------------------------
+class Instance:
+    """Modules and halls addressed by dense integer ids.
+
+    Model builders work on ids only; codes and hall names are looked up when
+    the output is written. build_eligibility fills the hall eligibility
+    index used by the weekly timetable:
+      eligible[i, h]    - bool array, module i may use hall h
+      eligible_halls[i] - sorted hall ids of module i
+      hall_modules[h]   - sorted module ids allowed in hall h
+    """
+    __slots__ = ("modules", "halls", "eligible", "eligible_halls", "hall_modules")
+
+    def __init__(self, modules, halls):
+        self.modules = modules
+        self.halls = halls
+        self.eligible = None
+        self.eligible_halls = None
+        self.hall_modules = None
+
+    @classmethod
+    def from_records(cls, modules, halls):
+        """Build an instance from module and hall dicts (see the table from_records)."""
+        return cls(ModuleTable.from_records(modules), HallTable.from_records(halls))
+
+    @property
+    def num_modules(self):
+        return len(self.modules)
+
+    @property
+    def num_halls(self):
+        return len(self.halls)
+
+    def build_eligibility(self, restrict_department=True):
+        self.eligible = eligibility_matrix(self.modules, self.halls, restrict_department)
+        self.eligible_halls = [np.flatnonzero(row).tolist() for row in self.eligible]
+        self.hall_modules = [np.flatnonzero(col).tolist() for col in self.eligible.T]
+        return self
+
+    def department_groups(self, by_semester=False):
+        """{group key: [module ids]} over modules with a department, in id order.
+
+        The key is the department, or (department, semester) with by_semester.
+        """
+        groups = {}
+        semesters = self.modules.semester.tolist()
+        for i, dept in enumerate(self.modules.department.tolist()):
+            if dept is None or pd.isna(dept) or dept == "":
+                continue
+            key = (dept, semesters[i]) if by_semester else dept
+            groups.setdefault(key, []).append(i)
+        return groups
+
+    def interchangeable_modules(self):
+        """Classes (id lists, 2+ modules) of modules no model can tell apart:
+        same duration, students, semester, common flag and department."""
+        m = self.modules
+        departments = ["" if dept is None or pd.isna(dept) else str(dept) for dept in m.department.tolist()]
+        return equal_rows(zip(
+            m.duration.tolist(), m.students.tolist(), m.semester.tolist(), m.iscommon.tolist(),
+            departments, m.dept_key.tolist(),
+        ))
+
+    def interchangeable_halls(self):
+        """Classes (id lists, 2+ halls) of halls with the same capacity and department."""
+        return equal_rows(zip(self.halls.capacity.tolist(), self.halls.dept_key.tolist()))
+
+
+def equal_rows(rows):
+    """Ids grouped by equal row, in id order; singletons dropped."""
+    classes = {}
+    for i, row in enumerate(rows):
+        classes.setdefault(row, []).append(i)
+    return [ids for ids in classes.values() if len(ids) > 1]
+
+
+def load_instance(file_path, halls_sheet, required=(), diagnostics=None):
+    """load_tables wrapped in an Instance."""
+    return Instance(*load_tables(file_path, halls_sheet, required, diagnostics))
+
+
+def load_tables(file_path, halls_sheet, required=(), diagnostics=None):
+    """read_tables through the content-hashed input cache (see input_cache.py).
+
+    diagnostics, if given, records whether this load was a cache hit.
+    """
+    tag = "data_loader:" + ",".join(required)
+    (modules, halls), cache = cached_load(
+        file_path, [MODULES_SHEET, halls_sheet], lambda path: read_tables(path, halls_sheet, required), tag
+    )
+    if diagnostics is not None:
+        diagnostics["input_cache"] = cache
+    return modules, halls
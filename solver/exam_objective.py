@@ -0,0 +1,69 @@
+"""
+Same-department overlap terms of the exam models.
+
+Both builders take dept_map (department -> module ids) and dp, a dict of
+Bools keyed (module, day, slot) that are true iff the module sits in that
+cell, and return the list of terms whose sum is the objective. They are
+shared by the three exam scripts, exam_two_stage and repair.
+"""
+
+def pairwise_overlap_terms(model, dept_map, dp, num_days, num_slots):
+    """One Bool per same-department pair and (day, slot), true iff both sit there.
+
+    Sums to k*(k-1)/2 for a cell holding k exams of one department, but needs
+    O(n^2 * days * slots) variables per department.
+    """
+    overlap_vars = []
+    for dept, mod_list in dept_map.items():
+        n = len(mod_list)
+        for i in range(n):
+            for j in range(i + 1, n):
+                mi = mod_list[i]
+                mj = mod_list[j]
+                for d in range(num_days):
+                    for s in range(num_slots):
+                        ov = model.NewBoolVar(f"ov_{dept}_m{mi}_m{mj}_d{d}_s{s}")
+                        overlap_vars.append(ov)
+                        dpi = dp[(mi, d, s)]
+                        dpj = dp[(mj, d, s)]
+                        model.AddImplication(ov, dpi)
+                        model.AddImplication(ov, dpj)
+                        model.AddBoolOr([dpi.Not(), dpj.Not(), ov])
+    return overlap_vars
+
+
+def count_overlap_terms(model, dept_map, dp, num_days, num_slots, exact_pairs=False):
+    """One IntVar per (department, day, slot) instead of one Bool per pair.
+
+    By default excess >= sum(dp) - 1 with excess >= 0, so at the optimum each
+    term is max(0, k - 1) for k exams of the department in that cell. This is
+    a convex surrogate of the pairwise objective (k*(k-1)/2): both are zero
+    exactly when no department clashes and they agree while a cell holds at
+    most two of its exams, but a third clash is penalised linearly instead of
+    quadratically.
+
+    With exact_pairs the term is bounded below by every chord
+    j*k - j*(j+1)/2 (j = 1..n-1) of the convex k*(k-1)/2, which makes it equal
+    to the pairwise count at the optimum. The chords are written against one
+    count IntVar per cell (cnt == sum(dp)), so the model stays linear in the
+    number of modules rather than re-expanding the sum n - 1 times.
+    """
+    excess_vars = []
+    for dept, mod_list in dept_map.items():
+        n = len(mod_list)
+        if n < 2:
+            continue
+        upper = n * (n - 1) // 2 if exact_pairs else n - 1
+        for d in range(num_days):
+            for s in range(num_slots):
+                count = sum(dp[(i, d, s)] for i in mod_list)
+                if exact_pairs:
+                    cnt = model.NewIntVar(0, n, f"count_{dept}_d{d}_s{s}")
+                    model.Add(cnt == count)
+                    count = cnt
+                ex = model.NewIntVar(0, upper, f"excess_{dept}_d{d}_s{s}")
+                for j in range(1, n if exact_pairs else 2):
+                    model.Add(ex >= j * count - j * (j + 1) // 2)
+                excess_vars.append(ex)
+    return excess_vars
+
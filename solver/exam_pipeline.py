@@ -0,0 +1,523 @@
+"""
+Exam timetable pipeline shared by exam_timetable_csp, exam_timetable_csp2 and
+exam_timetable_csp3 (converted from academic timetable).
+
+The scripts differ only in how semesters are pinned to exam slots: each
+defines semester_slot_map(inst, slots_per_day) -> {semester: slot} and
+passes its result to build_exam_model and solve here.
+
+- Loads modules and halls from the same Excel file/sheets you were using.
+- Exams: 2 weeks (14 days), 2 slots per day (e.g., morning/afternoon).
+- Each exam occupies exactly 1 slot (no durations).
+- Each module scheduled exactly once (day, slot, hall).
+- Hall capacity enforced.
+- Modules of a pinned semester sit in its slot (semester_to_slot).
+- At most one exam per hall per (day, slot).
+- Soft objective: minimize same-department overlaps at the same day+slot.
+- Prints JSON output and human-readable grids.
+- `--warm-start FILE` hints the solver with a previous timetable (see warm_start.py).
+- `--repair FILE [--changes FILE]` repairs a previous timetable, moving as few
+  exams as possible (see repair.py).
+- Screens the instance before building a model and returns INFEASIBLE with
+  the reasons when a necessary condition fails (see screening.py).
+- `--profile-build` adds per-block build times and model sizes, plus the
+  solver's response stats, to diagnostics (see build_profile.py).
+- `--symmetry` orders interchangeable modules and halls to break symmetry
+  (see symmetry.py).
+- `--explain` guards the capacity and semester-slot rules with assumption literals
+  and, when the model is infeasible, reports a minimal conflicting set of
+  them (see infeasibility.py).
+- `--greedy fallback|hint|only` answers with a first-fit-decreasing
+  timetable when CP-SAT finds none, hints CP-SAT with it, or skips CP-SAT
+  (see greedy.py).
+- `--pipeline lns` improves a first timetable by re-solving one department,
+  day or hall tier at a time with the rest fixed (see lns.py).
+"""
+
+import argparse
+
+from ortools.sat.python import cp_model
+import json
+
+from build_profile import NO_PROFILE, BuildProfile, profile_diagnostics
+from data_loader import load_instance
+from exam_objective import count_overlap_terms, pairwise_overlap_terms
+from greedy import GreedyRun, greedy_exams
+from infeasibility import Explainer, explain_params
+from screening import screen_exams
+from solution_arrays import SolutionArrays, check_exams
+from solution_stream import exam_decoder, streamer, write_ndjson, write_result_ndjson
+from solver_control import new_solver
+from solver_params import SolverParams, params_spec, resolve_params
+from symmetry import add_symmetry_breaking, symmetry_diagnostics
+from warm_start import add_exam_hints, previous_assignment, read_previous, slot_hint
+
+# ----------------------------
+# 1. LOAD DATA
+# ----------------------------
+DATA_FILE = "../data/planner_agent_data_nushan.xlsx"
+# 2 weeks (14 days)
+DAYS = ["day1", "day2", "day3", "day4", "day5", "day6", "day7",
+        "day8", "day9", "day10", "day11", "day12", "day13", "day14"]
+SLOTS_PER_DAY = 2  # two exam slots per day (morning, afternoon)
+
+
+def load_data(file_path=DATA_FILE, diagnostics=None):
+    # Column-wise parsing + content-hashed cache live in data_loader.py;
+    # diagnostics, if given, records whether this load was a cache hit.
+    return load_instance(file_path, "halls-exam", diagnostics=diagnostics)
+
+
+# ----------------------------
+# 2. BUILD EXAM MODEL
+# ----------------------------
+def build_exam_model(inst, days, slots_per_day, objective="pairwise", profile=None, explain=None,
+                     symmetry=False, semester_to_slot=None):
+    """Monolithic exam model over module ids.
+
+    module_vars[i] holds the day/slot vars of module i, presence is keyed by
+    (i, day, slot, hall_idx) and dp by (i, day, slot). semester_to_slot pins
+    the modules of a semester to its slot (none if empty). profile, a
+    build_profile.BuildProfile, times each block (--profile-build); explain,
+    an infeasibility.Explainer, guards the capacity and semester-slot rules with
+    assumption literals (--explain); symmetry orders interchangeable modules
+    and halls (--symmetry, see symmetry.py).
+    """
+    model = cp_model.CpModel()
+    profile = profile or NO_PROFILE
+
+    num_modules = inst.num_modules
+    num_days = len(days)
+    num_slots = slots_per_day
+    num_halls = inst.num_halls
+
+    semester_to_slot = semester_to_slot or {}
+    semesters = inst.modules.semester.tolist()
+
+    # Int vars per module for day and slot only (no single hall var any more)
+    module_vars = []
+    with profile.block(model, "variables"):
+        for i in range(num_modules):
+            dvar = model.NewIntVar(0, num_days - 1, f"day_m{i}")
+            svar = model.NewIntVar(0, num_slots - 1, f"slot_m{i}")
+            module_vars.append({"day": dvar, "slot": svar})
+
+            sem = semesters[i]
+            if sem in semester_to_slot:
+                pin = model.Add(svar == semester_to_slot[sem])
+                if explain is not None:
+                    pin.OnlyEnforceIf(explain.literal(model, "semester_slot"))
+
+    # presence[(i,d,s,h)] == True iff module i uses hall h at day d, slot s
+    presence = {}
+    with profile.block(model, "presence"):
+        for i in range(num_modules):
+            for d in range(num_days):
+                for s in range(num_slots):
+                    for h in range(num_halls):
+                        p = model.NewBoolVar(f"pres_m{i}_d{d}_s{s}_h{h}")
+                        presence[(i, d, s, h)] = p
+                        # If p then day/slot equal (link to module_vars)
+                        model.Add(module_vars[i]["day"] == d).OnlyEnforceIf(p)
+                        model.Add(module_vars[i]["slot"] == s).OnlyEnforceIf(p)
+
+    # assign_ds[(i,d,s)] == True iff module i scheduled at day d & slot s (in >=1 hall)
+    assign_ds = {}
+    with profile.block(model, "day_presence"):
+        for i in range(num_modules):
+            for d in range(num_days):
+                for s in range(num_slots):
+                    a = model.NewBoolVar(f"assign_m{i}_d{d}_s{s}")
+                    assign_ds[(i, d, s)] = a
+                    # If any presence for that (d,s) then assign_ds must be true
+                    pres_over_halls = [presence[(i, d, s, h)] for h in range(num_halls)]
+                    # presence -> assign_ds
+                    for ph in pres_over_halls:
+                        model.AddImplication(ph, a)
+                    # assign_ds -> at least one presence (i.e. module uses >=1 hall at that slot)
+                    model.Add(sum(pres_over_halls) >= 1).OnlyEnforceIf(a)
+                    # if not assigned then no presences
+                    for ph in pres_over_halls:
+                        model.Add(ph == 0).OnlyEnforceIf(a.Not())
+
+    # Exactly one (day,slot) per module
+    with profile.block(model, "exactly_one"):
+        for i in range(num_modules):
+            a_list = [assign_ds[(i, d, s)] for d in range(num_days) for s in range(num_slots)]
+            model.AddExactlyOne(a_list)
+            # Link assign_ds -> module_vars day/slot (redundant with presence->day/slot)
+            # but ensures day/slot values correspond even if solver picks day/slot ints directly.
+            for d in range(num_days):
+                for s in range(num_slots):
+                    model.Add(module_vars[i]["day"] == d).OnlyEnforceIf(assign_ds[(i, d, s)])
+                    model.Add(module_vars[i]["slot"] == s).OnlyEnforceIf(assign_ds[(i, d, s)])
+
+    # Hall capacity coverage: when a module is assigned at (d,s),
+    # sum(capacity[h] * presence) >= students
+    with profile.block(model, "capacity"):
+        coeffs = inst.halls.capacity.tolist()
+        capacity_guard = [explain.literal(model, "capacity")] if explain is not None else []
+        for i, students in enumerate(inst.modules.students.tolist()):
+            for d in range(num_days):
+                for s in range(num_slots):
+                    pres_over_halls = [presence[(i, d, s, h)] for h in range(num_halls)]
+                    # Build linear expr sum(capacity * pres)
+                    # Add conditional capacity constraint only when assign_ds is true
+                    # sum(capacity[h] * pres_over_halls[h]) >= students  if assign_ds[(i,d,s)]
+                    # CP-SAT requires building a linear expression and using OnlyEnforceIf on the constraint.
+                    model.Add(
+                        sum(coeffs[h] * pres_over_halls[h] for h in range(num_halls)) >= students
+                    ).OnlyEnforceIf([assign_ds[(i, d, s)]] + capacity_guard)
+
+    # At most one exam per hall per (day, slot)
+    with profile.block(model, "hall_no_overlap"):
+        for d in range(num_days):
+            for s in range(num_slots):
+                for h_idx in range(num_halls):
+                    pres_list = [presence[(i, d, s, h_idx)] for i in range(num_modules)]
+                    model.Add(sum(pres_list) <= 1)
+
+    # For the soft objective we can reuse assign_ds as dp[(code,d,s)]
+    dp = assign_ds  # rename for clarity in rest of your code
+
+    # Soft objective: minimize same-department overlaps at same day+slot
+    # department -> module ids (skips modules without department)
+    with profile.block(model, "objective"):
+        dept_map = inst.department_groups()
+
+        if objective == "pairwise":
+            overlap_vars = pairwise_overlap_terms(model, dept_map, dp, num_days, num_slots)
+        elif objective == "count":
+            overlap_vars = count_overlap_terms(model, dept_map, dp, num_days, num_slots)
+        elif objective == "count_pairs":
+            overlap_vars = count_overlap_terms(model, dept_map, dp, num_days, num_slots, exact_pairs=True)
+        else:
+            raise ValueError(f"Unknown objective: {objective}")
+
+        # Objective: minimize overlaps if any
+        if overlap_vars:
+            model.Minimize(sum(overlap_vars))
+
+    if symmetry:
+        with profile.block(model, "symmetry"):
+            positions = [mv["day"] * num_slots + mv["slot"] for mv in module_vars]
+            add_symmetry_breaking(model, inst, positions, presence, [1] * num_modules)
+
+    return model, module_vars, presence, dp
+
+
+def split_students(hall_list, total_students):
+    """Distribute students among halls proportionally to capacity -> ["HALL-count", ...]."""
+    distributed_students = []
+    if hall_list:
+        total_capacity = sum(h["capacity"] for h in hall_list)
+        remaining_students = total_students
+        for i, h in enumerate(hall_list):
+            if i < len(hall_list) - 1:
+                # proportional allocation
+                allocated = min(remaining_students, int(total_students * h["capacity"] / total_capacity))
+                remaining_students -= allocated
+            else:
+                # last hall gets remaining students
+                allocated = remaining_students
+            distributed_students.append(f"{h['hall']}-{allocated}")
+    return distributed_students
+
+
+def generate_exam_json(status, sol, inst, days, lazy=False):
+    """{"status", "timetable"} from SolutionArrays sol (None unless solved);
+    with lazy, "timetable" is an iterator (--output ndjson)."""
+    result = {
+        "status": "INFEASIBLE" if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE) else "OPTIMAL",
+        "timetable": []
+    }
+
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return result
+
+    entries = iter_exam_entries(sol, inst, days)
+    result["timetable"] = entries if lazy else list(entries)
+    return result
+
+
+def iter_exam_entries(sol, inst, days):
+    # Codes and hall names are only looked up here, by id
+    halls = inst.halls.to_records()
+    for m, d, s, hall_idx in zip(inst.modules.to_records(), sol.day.tolist(), sol.slot.tolist(), sol.hall_lists()):
+        code = m["code"]
+
+        # all halls used for this module at (d,s)
+        hall_list = [halls[h_idx] for h_idx in hall_idx]
+
+        # distribute students among halls proportionally to capacity
+        total_students = m["students"]
+        distributed_students = split_students(hall_list, total_students)
+
+        entry = {
+            "code": code,
+            "day": days[d],
+            "slot": int(s),
+            "halls": [dstr for dstr in distributed_students],  # AUDI-200, AUDI2-27
+            "students": total_students,
+            "department": m.get("department"),
+            "semester": m.get("semester"),
+            "iscommon": m.get("iscommon", False)
+        }
+        yield entry
+
+
+
+# ----------------------------
+# Solve
+# ----------------------------
+def solve_model(model, params=None, callback=None):
+    params = params or SolverParams()
+    solver = new_solver(params.time_limit, params.workers, params)
+    status = solver.Solve(model, callback)
+    return status, solver
+
+
+def extract_solution(status, solver, module_vars, presence, inst):
+    """SolutionArrays of a solved model, else None."""
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return None
+    return SolutionArrays.from_exam(solver, module_vars, presence, inst.num_halls)
+
+# ----------------------------
+# Main
+# ----------------------------
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Exam timetable solver")
+    parser.add_argument(
+        "--objective", choices=["pairwise", "count", "count_pairs"], default="pairwise",
+        help="pairwise: one Bool per same-department pair and cell; "
+             "count: one excess IntVar per (department, day, slot); "
+             "count_pairs: same size as count but exactly the pairwise penalty"
+    )
+    parser.add_argument(
+        "--pipeline", choices=["monolithic", "two-stage", "cumulative", "lns"], default="monolithic",
+        help="two-stage: assign (day, slot) first, then pack halls per slot; "
+             "cumulative: seat-level capacity only, halls assigned afterwards (see exam_two_stage.py); "
+             "lns: large-neighbourhood search from a first timetable (see lns.py)"
+    )
+    parser.add_argument(
+        "--minimize-days", action="store_true",
+        help="with --pipeline cumulative: pack the exams into as few days as possible"
+    )
+    parser.add_argument(
+        "--warm-start", metavar="FILE",
+        help="previous solver JSON or ExamTableRecords rows to hint the solve with"
+    )
+    parser.add_argument(
+        "--repair", metavar="FILE",
+        help="previous solver JSON or ExamTableRecords rows to repair instead of solving from scratch"
+    )
+    parser.add_argument(
+        "--changes", metavar="FILE",
+        help='with --repair: {"modules": [codes], "unavailable_halls": [names]}'
+    )
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="print every improving solution as an NDJSON line while solving "
+             "(monolithic pipeline or --repair; see solution_stream.py)"
+    )
+    parser.add_argument(
+        "--output", choices=["json", "ndjson"], default="json",
+        help="ndjson: one compact line per exam, then an {\"event\": \"end\"} trailer "
+             "with status and diagnostics (see solution_stream.py)"
+    )
+    parser.add_argument(
+        "--params", type=params_spec, metavar="SPEC",
+        help="solver parameter profile: default, quick, thorough, auto, a JSON file or inline JSON "
+             "(default: $SOLVER_PARAMS, else default; see solver_params.py)"
+    )
+    parser.add_argument(
+        "--profile-build", action="store_true",
+        help="time every block of the model build and add it, with the solver's response stats, "
+             "to diagnostics (monolithic pipeline; see build_profile.py)"
+    )
+    parser.add_argument(
+        "--explain", action="store_true",
+        help="solve with the rules behind assumption literals and a short time limit; when infeasible, "
+             "report a minimal set of conflicting rules in diagnostics (monolithic pipeline; see infeasibility.py)"
+    )
+    parser.add_argument(
+        "--symmetry", action="store_true",
+        help="order interchangeable modules and halls to break symmetry (monolithic pipeline; see symmetry.py)"
+    )
+    parser.add_argument(
+        "--greedy", choices=["fallback", "hint", "only"],
+        help="first-fit-decreasing timetable: the answer when CP-SAT finds none (fallback), "
+             "also a hint for CP-SAT (hint), or instead of CP-SAT (only); monolithic pipeline, see greedy.py"
+    )
+    args = parser.parse_args(argv)
+    if args.stream and args.pipeline != "monolithic" and not args.repair:
+        parser.error("--stream needs --pipeline monolithic or --repair")
+    if args.profile_build and (args.pipeline != "monolithic" or args.repair):
+        parser.error("--profile-build needs --pipeline monolithic (not --repair)")
+    if args.explain and (args.pipeline != "monolithic" or args.repair):
+        parser.error("--explain needs --pipeline monolithic (not --repair)")
+    if args.symmetry and (args.pipeline != "monolithic" or args.repair):
+        parser.error("--symmetry needs --pipeline monolithic (not --repair)")
+    if args.symmetry and args.warm_start:
+        parser.error("--symmetry cannot be combined with --warm-start")
+    if args.greedy and (args.pipeline != "monolithic" or args.repair or args.explain):
+        parser.error("--greedy needs --pipeline monolithic (not --repair or --explain)")
+    if args.greedy == "hint" and (args.warm_start or args.symmetry):
+        parser.error("--greedy hint cannot be combined with --warm-start or --symmetry")
+    if args.greedy == "only" and args.profile_build:
+        parser.error("--profile-build needs a model (not --greedy only)")
+    return args
+
+
+def solve(args, inst, diagnostics, semester_to_slot, days=DAYS, slots_per_day=SLOTS_PER_DAY):
+    """One solve as selected by args (see parse_args) -> result JSON dict,
+    with the script's semester_slot_map; used through the scripts' solve."""
+    # print_diagnostics(inst, days, slots_per_day)
+    # --output ndjson writes the entries as they are built
+    lazy = args.output == "ndjson"
+    params = resolve_params(args.params, inst, len(days), slots_per_day)
+    diagnostics["solver_params"] = params.to_dict()
+    diagnostics["screening"] = screen_exams(inst, len(days), slots_per_day, semester_to_slot)
+    if diagnostics["screening"]["violations"]:
+        result_json = generate_exam_json(cp_model.INFEASIBLE, None, inst, days, lazy=lazy)
+        result_json["diagnostics"] = diagnostics
+        return result_json
+
+    previous = None
+    if args.warm_start:
+        previous = previous_assignment(read_previous(args.warm_start), inst, days)
+
+    if args.repair:
+        from repair import build_exam_repair_model, count_moved, read_changes
+
+        repaired = previous_assignment(read_previous(args.repair), inst, days)
+        changes = read_changes(args.changes) if args.changes else {}
+        model, module_vars, presence, moved_vars, repair_info = build_exam_repair_model(
+            inst, days, slots_per_day, repaired, changes, semester_to_slot
+        )
+        callback = streamer(args.stream, exam_decoder(module_vars, presence, inst, days))
+        status, solver = solve_model(model, params, callback=callback)
+        sol = extract_solution(status, solver, module_vars, presence, inst)
+        result_json = generate_exam_json(status, sol, inst, days, lazy=lazy)
+        result_json["diagnostics"] = {**diagnostics, "repair": repair_info}
+        if sol is not None:
+            repair_info["moved_modules"] = count_moved(solver, moved_vars, repair_info)
+            result_json["diagnostics"]["validation"] = check_exams(sol, inst, len(days), slots_per_day)
+        return result_json
+
+    if args.pipeline in ("two-stage", "cumulative"):
+        from exam_two_stage import assignment_to_exam_json, solve_seat_level, solve_two_stage
+
+        hint = None
+        if previous is not None:
+            hint, diagnostics["warm_start"] = slot_hint(previous, slots_per_day)
+
+        if args.pipeline == "two-stage":
+            ok, assignment, stats = solve_two_stage(
+                inst, days, slots_per_day, semester_to_slot, objective=args.objective,
+                time_limit_seconds=params.time_limit, workers=params.workers, hint=hint,
+                params=params
+            )
+        else:
+            ok, assignment, stats = solve_seat_level(
+                inst, days, slots_per_day, semester_to_slot, minimize_days=args.minimize_days,
+                time_limit_seconds=params.time_limit, workers=params.workers, hint=hint,
+                params=params
+            )
+        result_json = assignment_to_exam_json(ok, assignment, inst, days, lazy=lazy)
+        result_json["diagnostics"] = {**diagnostics, **stats}
+        if ok:
+            sol = SolutionArrays.from_assignment(assignment, inst.num_modules, inst.num_halls)
+            result_json["diagnostics"]["validation"] = check_exams(sol, inst, len(days), slots_per_day)
+        return result_json
+
+    if args.pipeline == "lns":
+        from lns import solve_lns
+
+        model, module_vars, presence, dp = build_exam_model(
+            inst, days, slots_per_day, objective=args.objective, semester_to_slot=semester_to_slot
+        )
+        status, sol, diagnostics["lns"] = solve_lns(
+            model, module_vars, presence, dp, inst, len(days), slots_per_day, params,
+            semester_to_slot, previous
+        )
+        result_json = generate_exam_json(status, sol, inst, days, lazy=lazy)
+        result_json["diagnostics"] = diagnostics
+        if sol is not None:
+            diagnostics["validation"] = check_exams(sol, inst, len(days), slots_per_day)
+        return result_json
+
+    greedy = None
+    if args.greedy in ("hint", "only"):
+        greedy = GreedyRun(greedy_exams, inst, args.greedy, len(days), slots_per_day, semester_to_slot)
+    if args.greedy == "only":
+        sol = greedy.solution(inst)
+        status = cp_model.FEASIBLE if sol is not None else cp_model.UNKNOWN
+        result_json = generate_exam_json(status, sol, inst, days, lazy=lazy)
+        result_json["diagnostics"] = diagnostics
+        if sol is not None:
+            diagnostics["validation"] = check_exams(sol, inst, len(days), slots_per_day)
+        diagnostics["greedy"] = greedy.info
+        return result_json
+
+    profile = BuildProfile() if args.profile_build else None
+    explainer = Explainer() if args.explain else None
+    diagnostics["symmetry"] = symmetry_diagnostics(inst, args.symmetry)
+    model, module_vars, presence, dp = build_exam_model(
+        inst, days, slots_per_day, objective=args.objective, profile=profile, explain=explainer,
+        symmetry=args.symmetry, semester_to_slot=semester_to_slot
+    )
+    if explainer is not None:
+        explainer.assume(model)
+        params = explain_params(params)
+        diagnostics["solver_params"] = params.to_dict()
+    if previous is not None:
+        diagnostics["warm_start"] = add_exam_hints(model, module_vars, presence, dp, previous, slots_per_day)
+    if args.greedy == "hint":
+        greedy.info["hints"] = add_exam_hints(model, module_vars, presence, dp, greedy.previous(), slots_per_day)
+
+    # Solve
+    callback = streamer(args.stream, exam_decoder(module_vars, presence, inst, days))
+    status, solver = solve_model(model, params, callback=callback)
+    sol = extract_solution(status, solver, module_vars, presence, inst)
+    if args.greedy and sol is None and status != cp_model.INFEASIBLE:
+        greedy = greedy or GreedyRun(greedy_exams, inst, args.greedy, len(days), slots_per_day, semester_to_slot)
+        sol = greedy.solution(inst)
+        if sol is not None:
+            status = cp_model.FEASIBLE
+
+    # Produce JSON and prints
+    result_json = generate_exam_json(status, sol, inst, days, lazy=lazy)
+    result_json["diagnostics"] = diagnostics
+    if sol is not None:
+        diagnostics["validation"] = check_exams(sol, inst, len(days), slots_per_day)
+    diagnostics.update(profile_diagnostics(profile, solver))
+    if explainer is not None:
+        diagnostics["explain"] = explainer.explain(model, solver, status, params)
+    if greedy is not None:
+        diagnostics["greedy"] = greedy.info
+    return result_json
+
+
+def main(solve, argv=None):
+    """Command line of a script whose solve(args, inst, diagnostics) is given."""
+    args = parse_args(argv)
+
+    diagnostics = {}
+    inst = load_data(diagnostics=diagnostics)
+    result_json = solve(args, inst, diagnostics)
+
+    if args.output == "ndjson":
+        write_result_ndjson(result_json, "timetable")
+        return
+    if args.stream:
+        write_ndjson({"event": "result", **result_json})
+        return
+    print(json.dumps(result_json))
+
+    # if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+    #     # print_slot_expanded(solver, module_vars, inst, days)
+    #     # print_timetable_grid(solver, module_vars, inst, days, slots_per_day)
+    # else:
+    #     print("No feasible solution found (INFEASIBLE or TIMEOUT).")
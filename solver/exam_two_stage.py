@@ -0,0 +1,348 @@
+"""
+Two-stage exam solver: slot assignment first, hall packing second.
+
+The monolithic exam model carries a presence Bool for every
+module x day x slot x hall. This pipeline splits it in two:
+
+- Stage 1 assigns each module a (day, slot). Halls only appear in aggregate:
+  per (day, slot) the students must fit in the total seat capacity and the
+  minimum number of halls each exam needs must fit in the number of halls.
+- Stage 2 packs halls independently for every (day, slot), in parallel.
+  Every hall holds at most one exam and the halls given to an exam must seat
+  all of its students.
+
+Every (day, slot) has the same halls, so a set of modules that cannot be
+packed in one cell cannot be packed in any. Such a failure adds a no-good
+cut to stage 1 and the pipeline goes round again.
+
+build_seat_model / solve_seat_level is a smaller, seat-level-only variant:
+one cumulative over the exam slots, halls assigned afterwards.
+
+Everything works on module and hall ids of a data_loader.Instance; codes
+and hall names are only looked up by assignment_to_exam_json, which emits
+the same JSON shape as generate_exam_json, including the "HALL-count" split
+strings.
+"""
+
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from ortools.sat.python import cp_model
+
+from exam_objective import count_overlap_terms
+from exam_pipeline import iter_exam_entries
+from solution_arrays import SolutionArrays, gather, solution_vector
+from solver_control import job_workers, new_solver
+
+
+# ----------------------------
+# Stage 1: (day, slot) assignment
+# ----------------------------
+def min_halls_needed(students, capacities_desc):
+    """Fewest halls that can seat `students`; len(halls) + 1 if none can."""
+    seats = 0
+    for k, cap in enumerate(capacities_desc, start=1):
+        seats += cap
+        if seats >= students:
+            return k
+    return len(capacities_desc) + 1
+
+
+def build_slot_model(inst, days, slots_per_day, semester_to_slot=None, nogoods=(), objective="count_pairs"):
+    model = cp_model.CpModel()
+
+    num_modules = inst.num_modules
+    num_days = len(days)
+    num_slots = slots_per_day
+    num_halls = inst.num_halls
+    semester_to_slot = semester_to_slot or {}
+
+    students = inst.modules.students.tolist()
+    total_capacity = int(inst.halls.capacity.sum())
+    capacities_desc = sorted(inst.halls.capacity.tolist(), reverse=True)
+
+    # assign_ds[(i,d,s)] == True iff module i scheduled at day d & slot s
+    assign_ds = {}
+    for i, sem in enumerate(inst.modules.semester.tolist()):
+        pinned = semester_to_slot.get(sem)
+        for d in range(num_days):
+            for s in range(num_slots):
+                a = model.NewBoolVar(f"assign_m{i}_d{d}_s{s}")
+                assign_ds[(i, d, s)] = a
+                if pinned is not None and s != pinned:
+                    model.Add(a == 0)
+        model.AddExactlyOne([assign_ds[(i, d, s)] for d in range(num_days) for s in range(num_slots)])
+
+    # Aggregate hall capacity per (day, slot)
+    need = [min_halls_needed(n, capacities_desc) for n in students]
+    for d in range(num_days):
+        for s in range(num_slots):
+            model.Add(sum(students[i] * assign_ds[(i, d, s)] for i in range(num_modules)) <= total_capacity)
+            model.Add(sum(need[i] * assign_ds[(i, d, s)] for i in range(num_modules)) <= num_halls)
+
+    # No-good cuts from stage 2: these module sets never fit together
+    for ids in nogoods:
+        for d in range(num_days):
+            for s in range(num_slots):
+                model.Add(sum(assign_ds[(i, d, s)] for i in ids) <= len(ids) - 1)
+
+    dept_map = inst.department_groups()
+
+    # "pairwise" has the same optimum as "count_pairs" at a fraction of the size
+    overlap_vars = count_overlap_terms(
+        model, dept_map, assign_ds, num_days, num_slots, exact_pairs=(objective != "count")
+    )
+    if overlap_vars:
+        model.Minimize(sum(overlap_vars))
+
+    return model, assign_ds
+
+
+# ----------------------------
+# Stage 2: hall packing per (day, slot)
+# ----------------------------
+def pack_cell(cell_modules, inst, time_limit_seconds=2):
+    """Give every module id in one (day, slot) its own halls.
+
+    Returns (ok, {module_id: [hall_idx, ...]}). Minimises the number of halls
+    used so exams are split as little as possible.
+    """
+    num_halls = inst.num_halls
+    capacities = inst.halls.capacity.tolist()
+    model = cp_model.CpModel()
+    use = {}
+    for i in cell_modules:
+        for h_idx in range(num_halls):
+            use[(i, h_idx)] = model.NewBoolVar(f"use_m{i}_h{h_idx}")
+
+    for h_idx in range(num_halls):
+        model.AddAtMostOne([use[(i, h_idx)] for i in cell_modules])
+    for i in cell_modules:
+        model.Add(
+            sum(capacities[h_idx] * use[(i, h_idx)] for h_idx in range(num_halls)) >= int(inst.modules.students[i])
+        )
+    model.Minimize(sum(use.values()))
+
+    solver = new_solver(time_limit_seconds, 1)
+    status = solver.Solve(model)
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return False, {}
+
+    used = gather(solution_vector(solver), list(use.values())).reshape(len(cell_modules), num_halls)
+    return True, {i: np.flatnonzero(row).tolist() for i, row in zip(cell_modules, used)}
+
+
+def pack_cells(cells, inst, workers=8, time_limit_seconds=2):
+    """pack_cell for every (day, slot) -> {cell: (ok, {module_id: [hall_idx, ...]})}."""
+    # CP-SAT releases the GIL while solving, so threads run cells in parallel.
+    # Each task runs in a copy of this context so a service job's core budget
+    # and cancellation reach the per-cell solvers.
+    context = contextvars.copy_context()
+    with ThreadPoolExecutor(max_workers=job_workers(workers)) as pool:
+        return dict(zip(cells, pool.map(
+            lambda cell_modules: context.copy().run(pack_cell, cell_modules, inst, time_limit_seconds),
+            cells.values(),
+        )))
+
+
+def packed_assignment(packed):
+    assignment = {}
+    for cell, (_, halls_of) in packed.items():
+        for i, hall_idx in halls_of.items():
+            assignment[i] = (cell[0], cell[1], hall_idx)
+    return assignment
+
+
+# ----------------------------
+# Seat-level (cumulative) formulation
+# ----------------------------
+def build_seat_model(inst, days, slots_per_day, semester_to_slot=None, minimize_days=False, fill=1.0):
+    """Seat-level feasibility only, with no per-hall or per-cell literals.
+
+    Every exam is a unit interval at t = day*slots_per_day + slot demanding
+    its number of students. One AddCumulative against the seat capacity is
+    the same as a knapsack per (day, slot); a second one keeps the minimum
+    number of halls per exam within the hall count. `fill` caps the share of
+    seats and of halls a cell may use, leaving slack for splitting exams over
+    whole halls: the minimum counts assume every exam gets the largest halls,
+    so a full hall budget lets cells through that cannot be packed.
+    Hall identities are assigned after the solve. With minimize_days the last
+    used slot is minimised, which answers "how many exam days do we need".
+    starts[i] is the start var of module i.
+    """
+    model = cp_model.CpModel()
+
+    num_days = len(days)
+    horizon = num_days * slots_per_day
+    semester_to_slot = semester_to_slot or {}
+
+    seat_capacity = int(fill * int(inst.halls.capacity.sum()))
+    capacities_desc = sorted(inst.halls.capacity.tolist(), reverse=True)
+    seats = inst.modules.students.tolist()
+    pins = [semester_to_slot.get(sem) for sem in inst.modules.semester.tolist()]
+
+    starts = []
+    intervals = []
+    hall_counts = []
+    for i, pinned in enumerate(pins):
+        if pinned is None:
+            domain = cp_model.Domain(0, horizon - 1)
+        else:
+            domain = cp_model.Domain.FromValues([d * slots_per_day + pinned for d in range(num_days)])
+        t = model.NewIntVarFromDomain(domain, f"t_m{i}")
+        starts.append(t)
+        intervals.append(model.NewFixedSizeIntervalVar(t, 1, f"seat_m{i}"))
+        hall_counts.append(min_halls_needed(seats[i], capacities_desc))
+
+    model.AddCumulative(intervals, seats, seat_capacity)
+    model.AddCumulative(intervals, hall_counts, max(1, int(fill * inst.num_halls)))
+
+    if minimize_days and starts:
+        last_slot = model.NewIntVar(0, horizon - 1, "last_slot")
+        model.AddMaxEquality(last_slot, starts)
+        # Redundant bound: exams pinned to one slot need at least
+        # ceil(students / seats) days of that slot.
+        pinned_load = {}
+        for pinned, students in zip(pins, seats):
+            if pinned is not None:
+                pinned_load[pinned] = pinned_load.get(pinned, 0) + students
+        for slot, load in pinned_load.items():
+            if seat_capacity > 0:
+                days_needed = -(-load // seat_capacity)
+                model.Add(last_slot >= (days_needed - 1) * slots_per_day + slot)
+        model.Minimize(last_slot)
+
+    return model, starts
+
+
+def solve_seat_level(inst, days, slots_per_day, semester_to_slot=None, minimize_days=False,
+                     time_limit_seconds=60, workers=8, pack_time_limit_seconds=2,
+                     fill=0.9, fill_step=0.1, max_rounds=5, hint=None, params=None):
+    """Solve build_seat_model, then assign halls per (day, slot) with pack_cell.
+
+    Seat-level feasibility does not guarantee a cell splits into whole halls.
+    When some cell does not pack, the seat fill cap is lowered by fill_step
+    and the seat model is solved again, up to max_rounds. Cells that still
+    do not pack are listed in stats["unpacked_cells"] and the run is
+    reported as not ok. hint ({(i, d, s): 1}, see warm_start.slot_hint)
+    seeds every seat model with a previous (day, slot) per module. params
+    (solver_params.SolverParams) applies to the seat model solves.
+    """
+    stats = {"formulation": "cumulative", "rounds": 0, "seat_seconds": 0.0, "packing_seconds": 0.0}
+    deadline = time.perf_counter() + time_limit_seconds
+    packed = {}
+
+    for _ in range(max_rounds):
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0 or fill <= 0:
+            break
+        stats["rounds"] += 1
+        stats["fill"] = round(fill, 3)
+
+        t0 = time.perf_counter()
+        model, starts = build_seat_model(inst, days, slots_per_day, semester_to_slot, minimize_days, fill)
+        for (i, d, s), value in (hint or {}).items():
+            if value:
+                model.AddHint(starts[i], d * slots_per_day + s)
+        # Keep half of what is left for packing and later rounds
+        solver = new_solver(remaining / 2, workers, params)
+        status = solver.Solve(model)
+        stats["seat_seconds"] += time.perf_counter() - t0
+        stats["seat_status"] = solver.StatusName(status)
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            break
+
+        cells = {}
+        for i, t in enumerate(gather(solution_vector(solver), starts).tolist()):
+            cells.setdefault(divmod(t, slots_per_day), []).append(i)
+        stats["exam_days_used"] = max(d for d, _ in cells) + 1 if cells else 0
+
+        t0 = time.perf_counter()
+        packed = pack_cells(cells, inst, workers, min(pack_time_limit_seconds, max(0.0, deadline - t0)))
+        stats["packing_seconds"] += time.perf_counter() - t0
+        stats["unpacked_cells"] = [list(cell) for cell, (ok, _) in packed.items() if not ok]
+        if not stats["unpacked_cells"]:
+            return True, packed_assignment(packed), stats
+
+        fill -= fill_step
+
+    return False, {}, stats
+
+
+# ----------------------------
+# Driver
+# ----------------------------
+def solve_two_stage(inst, days, slots_per_day, semester_to_slot=None, objective="count_pairs",
+                    time_limit_seconds=60, workers=8, pack_time_limit_seconds=2, max_rounds=5, hint=None,
+                    params=None):
+    """Run stage 1 / stage 2 until every cell packs or max_rounds is reached.
+
+    hint ({(i, d, s): 0/1}) seeds the first stage-1 solve; later rounds are
+    hinted with the previous round's answer. params
+    (solver_params.SolverParams) applies to the stage-1 solves.
+
+    Returns (ok, assignment, stats) where assignment maps
+    module_id -> (day_idx, slot_idx, [hall_idx, ...]).
+    """
+    nogoods = []
+    hint = dict(hint or {})
+    stats = {"rounds": 0, "nogoods": 0, "stage1_seconds": 0.0, "stage2_seconds": 0.0}
+    deadline = time.perf_counter() + time_limit_seconds
+
+    for _ in range(max_rounds):
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            break
+        stats["rounds"] += 1
+
+        t0 = time.perf_counter()
+        model, assign_ds = build_slot_model(inst, days, slots_per_day, semester_to_slot, nogoods, objective)
+        for key, value in hint.items():
+            model.AddHint(assign_ds[key], value)
+        # Keep half of what is left for packing and later rounds
+        solver = new_solver(remaining / 2, workers, params)
+        status = solver.Solve(model)
+        stats["stage1_seconds"] += time.perf_counter() - t0
+        stats["stage1_status"] = solver.StatusName(status)
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            return False, {}, stats
+
+        hint = dict(zip(assign_ds, gather(solution_vector(solver), list(assign_ds.values())).tolist()))
+        cells = {}
+        for (i, d, s), value in hint.items():
+            if value:
+                cells.setdefault((d, s), []).append(i)
+
+        t0 = time.perf_counter()
+        packed = pack_cells(cells, inst, workers, min(pack_time_limit_seconds, max(0.0, deadline - t0)))
+        stats["stage2_seconds"] += time.perf_counter() - t0
+
+        failed = [cell for cell, (ok, _) in packed.items() if not ok]
+        if not failed:
+            return True, packed_assignment(packed), stats
+
+        # A timed-out packing is treated like an infeasible one: the cut then
+        # only steers stage 1 away from a hard cell rather than proving it.
+        for cell in failed:
+            nogoods.append(cells[cell])
+        stats["nogoods"] = len(nogoods)
+
+    return False, {}, stats
+
+
+def assignment_to_exam_json(ok, assignment, inst, days, lazy=False):
+    """Same shape as generate_exam_json, built from a solve_two_stage / solve_seat_level assignment."""
+    result = {
+        "status": "OPTIMAL" if ok else "INFEASIBLE",
+        "timetable": []
+    }
+
+    if not ok:
+        return result
+
+    sol = SolutionArrays.from_assignment(assignment, inst.num_modules, inst.num_halls)
+    entries = iter_exam_entries(sol, inst, days)
+    result["timetable"] = entries if lazy else list(entries)
+    return result
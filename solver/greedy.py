@@ -0,0 +1,230 @@
+"""
+Greedy constructive timetables: a fallback answer and a CP-SAT seed.
+
+When CP-SAT runs out of time before its first solution there is no answer
+at all. The solver scripts take --greedy MODE:
+
+  fallback  solve as usual; if CP-SAT ends without a solution (not a proof
+            of infeasibility), answer with the greedy timetable
+  hint      also hint the CP-SAT model with the greedy timetable (through
+            warm_start.add_*_hints) before solving
+  only      skip CP-SAT and answer with the greedy timetable
+
+Both heuristics are first-fit decreasing: modules in order of students x
+duration (largest first), each put in the first place it fits, never moved
+again.
+
+greedy_timetable (weekly): halls best-fit, i.e. the smallest eligible hall
+(inst.eligible_halls: capacity and department rule) that has room, then the
+first day and start. Occupancy is one slot bitmap per (day, hall) and per
+(day, department group): the (department, semester) groups may not overlap
+(group_rule="no_overlap", timetable_csp) or a department's starts must
+differ (group_rule="distinct_starts", timetable_csp2).
+
+greedy_exams: the (day, slot) cell with the fewest exams of the same
+department (the models' soft objective), then the fewest halls, then the
+first. In that cell the exam gets the smallest free hall that seats it or,
+failing that, the largest free halls with the smallest one that covers the
+rest. Semesters stay in their pinned slot.
+
+Both return (assignment, unplaced): assignment is {module id: (day, slot,
+[hall ids])}, the form warm_start.previous_assignment produces; unplaced
+lists the modules that found no room. A timetable is only an answer when
+unplaced is empty; a partial one still makes a hint. Neither looks back,
+so they can fail on instances CP-SAT solves.
+
+diagnostics.greedy: {"mode", "seconds", "placed", "unplaced": [codes],
+"used": whether the greedy timetable is the answer, "hints": hint stats}.
+"""
+
+import time
+
+import numpy as np
+
+from solution_arrays import SolutionArrays
+
+
+def decreasing_order(weights):
+    """Module ids by weight, largest first; ties by id."""
+    return np.lexsort((np.arange(len(weights)), -weights))
+
+
+def group_index(groups, n):
+    """Group number of each module from department_groups(); -1 for none."""
+    index = np.full(n, -1, dtype=np.int64)
+    for g, ids in enumerate(groups.values()):
+        index[ids] = g
+    return index
+
+
+# ----------------------------
+# Weekly timetables
+# ----------------------------
+def greedy_timetable(inst, num_days, slots_per_day, group_rule="no_overlap"):
+    """First-fit decreasing weekly timetable; inst.eligible must be built."""
+    if slots_per_day > 62:
+        raise ValueError("greedy_timetable keeps a day in a 62-bit mask")
+    n = inst.num_modules
+    durations = inst.modules.duration.astype(np.int64)
+    capacity = inst.halls.capacity
+    if group_rule == "no_overlap":
+        groups = inst.department_groups(by_semester=True)
+    elif group_rule == "distinct_starts":
+        groups = inst.department_groups()
+    else:
+        raise ValueError(f"Unknown group_rule: {group_rule}")
+    group = group_index(groups, n)
+
+    # Bit s of a mask is slot s of that day
+    hall_busy = np.zeros((num_days, inst.num_halls), dtype=np.int64)
+    # The extra last row is for modules without a group and stays empty
+    group_busy = np.zeros((len(groups) + 1, num_days), dtype=np.int64)
+    by_capacity = np.argsort(capacity, kind="stable")
+
+    assignment, unplaced = {}, []
+    for i in decreasing_order(inst.modules.students * durations).tolist():
+        dur = int(durations[i])
+        halls = by_capacity[inst.eligible[i, by_capacity]]
+        if dur < 1 or dur > slots_per_day or not len(halls):
+            unplaced.append(i)
+            continue
+        taken = group_busy[group[i]][:, None]
+        busy = hall_busy[:, halls]
+        if group_rule == "no_overlap":
+            busy = busy | taken
+        # Bit s of starts[day, hall]: slots s .. s + dur - 1 are free
+        starts = ~busy & ((1 << (slots_per_day - dur + 1)) - 1)
+        for k in range(1, dur):
+            starts &= ~busy >> k
+        if group_rule == "distinct_starts":
+            starts &= ~taken
+
+        fits = (starts != 0).any(axis=0)
+        if not fits.any():
+            unplaced.append(i)
+            continue
+        k = int(np.argmax(fits))
+        d = int(np.argmax(starts[:, k] != 0))
+        bits = int(starts[d, k])
+        s = (bits & -bits).bit_length() - 1
+        h = int(halls[k])
+        mask = ((1 << dur) - 1) << s
+        hall_busy[d, h] |= mask
+        if group[i] >= 0:
+            group_busy[group[i], d] |= mask if group_rule == "no_overlap" else 1 << s
+        assignment[i] = (d, s, [h])
+    return assignment, unplaced
+
+
+def timetable_solution(assignment, inst):
+    """SolutionArrays of a complete greedy_timetable assignment."""
+    n = inst.num_modules
+    day, slot, hall = (np.empty(n, dtype=np.int64) for _ in range(3))
+    for i, (d, s, halls) in assignment.items():
+        day[i], slot[i], hall[i] = d, s, halls[0]
+    return SolutionArrays(day, slot, inst.modules.duration.astype(np.int64), hall=hall)
+
+
+# ----------------------------
+# Exams
+# ----------------------------
+def greedy_exams(inst, num_days, slots_per_day, semester_to_slot=None):
+    """First-fit decreasing exam timetable; semester_to_slot pins semesters to a slot."""
+    n, H = inst.num_modules, inst.num_halls
+    students = inst.modules.students.astype(np.int64)
+    capacity = inst.halls.capacity.astype(np.int64)
+    semester_to_slot = semester_to_slot or {}
+    groups = inst.department_groups()
+    group = group_index(groups, n)
+    if not H:
+        return {}, list(range(n))
+
+    # Cell c is (day, slot) = divmod(c, slots_per_day)
+    cells = np.arange(num_days * slots_per_day)
+    used = np.zeros((len(cells), H), dtype=bool)
+    # Largest free hall of each cell, kept up to date
+    largest_free = np.full(len(cells), capacity.max())
+    same_department = np.zeros((len(groups) + 1, len(cells)), dtype=np.int64)
+    largest_first = np.argsort(-capacity, kind="stable")
+    semesters = inst.modules.semester.tolist()
+
+    assignment, unplaced = {}, []
+    # Every exam is one slot long, so its weight is its size
+    for i in decreasing_order(students).tolist():
+        pinned = semester_to_slot.get(semesters[i])
+        options = cells if pinned is None else cells[cells % slots_per_day == pinned]
+        need = students[i]
+
+        # Halls it takes in each cell, largest free halls first
+        halls_needed = np.where(largest_free[options] >= need, 1, H + 1)
+        several = options[halls_needed > 1]
+        if len(several):
+            free = ~used[several][:, largest_first]
+            short = np.cumsum(np.where(free, capacity[largest_first], 0), axis=1) < need
+            halls_needed[halls_needed > 1] = np.where(short[:, -1], H + 1, (short & free).sum(axis=1) + 1)
+        room = halls_needed <= H
+        if not room.any():
+            unplaced.append(i)
+            continue
+        options, halls_needed = options[room], halls_needed[room]
+
+        # Fewest exams of the same department, then fewest halls, then first
+        c = int(options[np.lexsort((halls_needed, same_department[group[i], options]))[0]])
+        halls = pick_halls(used[c], capacity, need)
+        used[c, halls] = True
+        largest_free[c] = capacity[~used[c]].max() if not used[c].all() else 0
+        if group[i] >= 0:
+            same_department[group[i], c] += 1
+        assignment[i] = (*divmod(c, slots_per_day), halls)
+    return assignment, unplaced
+
+
+def pick_halls(taken, capacity, need):
+    """Free hall ids that seat need: the smallest single hall if one does,
+    else the largest halls and then the smallest hall that covers the rest."""
+    free = np.flatnonzero(~taken)
+    free = free[np.argsort(capacity[free], kind="stable")]
+    single = free[capacity[free] >= need]
+    if len(single):
+        return [int(single[0])]
+    chosen = []
+    for h in free[::-1].tolist():
+        rest = need - capacity[chosen].sum()
+        cover = [g for g in free.tolist() if g not in chosen and capacity[g] >= rest]
+        if cover:
+            return chosen + [cover[0]]
+        chosen.append(h)
+    return chosen
+
+
+# ----------------------------
+# Script helpers
+# ----------------------------
+class GreedyRun:
+    """One run of greedy_timetable or greedy_exams for a solver script."""
+
+    def __init__(self, heuristic, inst, mode, *args):
+        t0 = time.perf_counter()
+        self.heuristic = heuristic
+        self.assignment, self.unplaced = heuristic(inst, *args)
+        self.info = {
+            "mode": mode,
+            "seconds": round(time.perf_counter() - t0, 4),
+            "placed": len(self.assignment),
+            "unplaced": [inst.modules.code[i] for i in self.unplaced],
+            "used": False,
+        }
+
+    def previous(self):
+        """The assignment in the (assignment, stats) form warm_start's hint helpers take."""
+        n = len(self.assignment)
+        return self.assignment, {"previous_modules": n, "matched_modules": n}
+
+    def solution(self, inst):
+        """SolutionArrays of a complete run, which becomes the answer; None if modules are unplaced."""
+        if self.unplaced:
+            return None
+        self.info["used"] = True
+        if self.heuristic is greedy_exams:
+            return SolutionArrays.from_assignment(self.assignment, inst.num_modules, inst.num_halls)
+        return timetable_solution(self.assignment, inst)
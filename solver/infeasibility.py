@@ -0,0 +1,137 @@
+"""
+Explain mode: which constraint families make a model infeasible.
+
+With --explain the model builders put each guarded constraint family
+behind one assumption literal (Explainer.literal). The families are:
+
+  weekly (timetable_csp build_model / build_flat_model)
+    capacity            a lecture's hall seats the class
+    department_halls    a lecture's hall is "common" or its department's
+    department_overlap  lectures of one department and semester do not overlap
+  exams (build_exam_model)
+    capacity            an exam's halls seat all its students
+    semester_slot       exams sit in their semester's slot (exam_timetable_csp
+                        and exam_timetable_csp2; csp3 pins no slots)
+
+The weekly hall rules are normally enforced by leaving ineligible halls
+out of the model. In explain mode every module gets every hall
+(relaxed_instance), and guard_hall_rules forbids the ineligible ones only
+under the capacity / department_halls assumptions.
+
+The solve runs with at most EXPLAIN_TIME_LIMIT seconds. When CP-SAT proves
+the model infeasible, SufficientAssumptionsForInfeasibility gives a set of
+families that conflict. A deletion pass (the same time budget again) then
+drops each family in turn and re-solves with the rest, so only families
+that are needed remain:
+
+    "diagnostics": {"explain": {"status": "INFEASIBLE",
+        "families": ["capacity", "department_halls", "department_overlap"],
+        "core": ["capacity", "department_overlap"], "minimal": true, "seconds": 1.3}}
+
+An empty core means the conflict lies in constraints that are not
+guarded (e.g. hall no-overlap or exactly-one). "minimal" is false when a
+re-solve ran out of time, so a family could not be ruled out.
+"""
+
+import time
+
+import numpy as np
+from ortools.sat.python import cp_model
+
+from data_loader import Instance
+from screening import department_halls
+from solver_control import new_solver
+from solver_params import SolverParams
+
+EXPLAIN_TIME_LIMIT = 10
+
+
+def explain_params(params):
+    """params with the time limit capped at EXPLAIN_TIME_LIMIT."""
+    return SolverParams(**{**params.to_dict(), "time_limit": min(params.time_limit, EXPLAIN_TIME_LIMIT)})
+
+
+def relaxed_instance(inst):
+    """inst with every hall eligible for every module."""
+    n, H = inst.num_modules, inst.num_halls
+    relaxed = Instance(inst.modules, inst.halls)
+    relaxed.eligible = np.ones((n, H), dtype=bool)
+    relaxed.eligible_halls = [list(range(H)) for _ in range(n)]
+    relaxed.hall_modules = [list(range(n)) for _ in range(H)]
+    return relaxed
+
+
+def guard_hall_rules(model, inst, presence_vars, explain, restrict_department=True):
+    """Under the capacity / department_halls assumptions, presence literals
+    keyed (module, ..., hall) on a hall that breaks the rule are false."""
+    fits = inst.halls.capacity[None, :] >= inst.modules.students[:, None]
+    allowed = department_halls(inst, restrict_department)
+    capacity = explain.literal(model, "capacity")
+    department = explain.literal(model, "department_halls")
+    for key, pres in presence_vars.items():
+        i, h = key[0], key[-1]
+        if not fits[i, h]:
+            model.AddImplication(capacity, pres.Not())
+        if not allowed[i, h]:
+            model.AddImplication(department, pres.Not())
+
+
+class Explainer:
+    """One assumption literal per constraint family."""
+
+    def __init__(self):
+        self.literals = {}
+
+    def literal(self, model, family):
+        lit = self.literals.get(family)
+        if lit is None:
+            lit = self.literals[family] = model.NewBoolVar(f"assume_{family}")
+        return lit
+
+    def assume(self, model, families=None):
+        """Assume families (all of them by default) and nothing else."""
+        model.ClearAssumptions()
+        model.AddAssumptions([self.literals[f] for f in (self.literals if families is None else families)])
+
+    def core(self, solver):
+        by_index = {lit.Index(): family for family, lit in self.literals.items()}
+        return [by_index[i] for i in solver.SufficientAssumptionsForInfeasibility()]
+
+    def minimize(self, model, core, params):
+        """Deletion pass over core -> (families still needed, whether every check was decided).
+
+        All re-solves together get params.time_limit seconds.
+        """
+        deadline = time.perf_counter() + params.time_limit
+        needed, minimal = list(core), True
+        for family in core:
+            if family not in needed:
+                continue
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                minimal = False
+                break
+            trial = [f for f in needed if f != family]
+            self.assume(model, trial)
+            solver = new_solver(remaining, params.workers, params)
+            # Feasibility is all that matters here, not the objective
+            solver.parameters.stop_after_first_solution = True
+            status = solver.Solve(model)
+            if status == cp_model.INFEASIBLE:
+                # Often an even smaller core comes back
+                needed = [f for f in trial if f in self.core(solver)]
+            elif status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+                minimal = False
+        self.assume(model)
+        return needed, minimal
+
+    def explain(self, model, solver, status, params):
+        """diagnostics.explain for a finished solve of model under every assumption."""
+        t0 = time.perf_counter()
+        result = {"status": solver.StatusName(status), "families": list(self.literals)}
+        if status == cp_model.INFEASIBLE:
+            result["core"], result["minimal"] = self.minimize(model, self.core(solver), params)
+        elif status == cp_model.UNKNOWN:
+            result["message"] = f"no answer within {params.time_limit} s"
+        result["seconds"] = round(solver.WallTime() + time.perf_counter() - t0, 3)
+        return result
@@ -0,0 +1,98 @@
+"""
+Content-hashed cache for parsed Excel input.
+
+Parsing the workbook with pandas/openpyxl often takes longer than a small
+solve. cached_load keys the normalised result of a loader on the workbook's
+SHA-256, the sheet names and a loader tag, and stores it as a pickle under
+the cache dir. A repeated solve on the same upload then never opens the
+workbook.
+
+Environment:
+    PLANNER_CACHE_DIR        cache directory (default: solver/.cache/inputs)
+    PLANNER_CACHE_MAX_BYTES  size budget, oldest entries evicted first (default 64 MiB)
+    PLANNER_CACHE_DISABLE    set to 1 to always parse the workbook
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+
+# Bump when the normalised shape of cached data changes
+CACHE_VERSION = 1
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "inputs")
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def cache_dir():
+    return os.environ.get("PLANNER_CACHE_DIR", DEFAULT_CACHE_DIR)
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(file_path, sheets, tag):
+    parts = [file_sha256(file_path), *sheets, tag, str(CACHE_VERSION)]
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+def evict(directory, max_bytes):
+    """Delete the least recently used entries until the cache fits max_bytes."""
+    entries = []
+    for name in os.listdir(directory):
+        if not name.endswith(".pkl"):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def cached_load(file_path, sheets, loader, tag):
+    """Return (loader(file_path), "hit" | "miss" | "disabled").
+
+    loader must be deterministic for a given workbook content and tag must
+    change whenever the loader's output does.
+    """
+    if os.environ.get("PLANNER_CACHE_DISABLE") == "1":
+        return loader(file_path), "disabled"
+
+    directory = cache_dir()
+    path = os.path.join(directory, cache_key(file_path, sheets, tag) + ".pkl")
+
+    try:
+        with open(path, "rb") as f:
+            value = pickle.load(f)
+        os.utime(path)  # mark as recently used for eviction
+        return value, "hit"
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        pass
+
+    value = loader(file_path)
+
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+    evict(directory, int(os.environ.get("PLANNER_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)))
+    return value, "miss"
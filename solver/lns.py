@@ -0,0 +1,236 @@
+"""
+Large-neighbourhood search for the exam models (--pipeline lns).
+
+On a big faculty one monolithic run spends most of its time limit without
+improving the same-department overlap objective. solve_lns keeps an
+incumbent timetable and repeatedly frees one neighbourhood of it, fixing
+every other exam to its incumbent (day, slot) and halls, and re-solves the
+same model (build_exam_model) with only that part open:
+
+  department  the exams of one department
+  day         the exams the incumbent puts on one day
+  hall_tier   the exams sitting in one capacity tier of halls (the distinct
+              hall capacities split into TIERS bands)
+
+A neighbourhood of more than MAX_FREE exams is cut down to a random
+MAX_FREE of them. Every sub-solve runs the one model: the fixed exams are
+its assumptions (cleared and re-added per neighbourhood, no copy of the
+model), and its hint is the incumbent, rewritten only when the incumbent
+changes. A sub-solve thus never comes back worse; an equal answer is kept
+too, to move along plateaus. The model is left without assumptions or hint.
+
+The kind is drawn in proportion to its weight, and after each sub-solve
+weight = DECAY * weight + (1 - DECAY) * REWARDS[outcome], outcome being
+"improved", "equal" or "failed" (no answer in time). No weight drops below
+MIN_WEIGHT, so every kind keeps being tried.
+
+The first incumbent is the --warm-start timetable or else greedy_exams
+(greedy.py). A complete one is taken as it is: one solve with every exam
+fixed fills in the objective terms. Otherwise (or if that is infeasible) a
+full solve hinted with it stops at its first solution; a full hint does
+not help there, as it leaves the objective terms to search. All solves
+share params.time_limit; a sub-solve gets at most SUB_TIME_LIMIT seconds
+and a single presolve pass. The search stops early at objective 0.
+
+diagnostics.lns:
+
+    {"start": "greedy", "iterations": 41, "seconds": 60.0,
+     "progress": [{"seconds": 0.8, "objective": 37, "neighbourhood": "start"},
+                  {"seconds": 2.1, "objective": 31, "neighbourhood": "day"}, ...],
+     "neighbourhoods": {"department": {"tries": 14, "improved": 3, "weight": 0.41}, ...}}
+"""
+
+import random
+import time
+
+import numpy as np
+from ortools.sat.python import cp_model
+
+from greedy import GreedyRun, greedy_exams
+from solution_arrays import SolutionArrays, solution_vector
+from solver_control import cancelled, new_solver
+from warm_start import add_exam_hints
+
+KINDS = ("department", "day", "hall_tier")
+TIERS = 4
+MAX_FREE = 20
+SUB_TIME_LIMIT = 3
+DECAY = 0.8
+MIN_WEIGHT = 0.05
+REWARDS = {"improved": 1.0, "equal": 0.2, "failed": 0.0}
+
+
+def hall_tiers(capacity, tiers=TIERS):
+    """Tier of each hall, 0 the smallest: its distinct capacity's band."""
+    distinct, rank = np.unique(capacity, return_inverse=True)
+    return rank * min(tiers, len(distinct)) // max(len(distinct), 1)
+
+
+class ExamLNS:
+    """The incumbent of one build_exam_model and the sub-models around it."""
+
+    def __init__(self, model, module_vars, presence, dp, inst, num_days, slots_per_day):
+        n, H = inst.num_modules, inst.num_halls
+        self.model = model
+        self.day_index = np.array([mv["day"].Index() for mv in module_vars], dtype=np.int64)
+        self.slot_index = np.array([mv["slot"].Index() for mv in module_vars], dtype=np.int64)
+        self.dp_index = np.empty((n, num_days, slots_per_day), dtype=np.int64)
+        for (i, d, s), a in dp.items():
+            self.dp_index[i, d, s] = a.Index()
+        self.presence_index = np.empty((n, num_days, slots_per_day, H), dtype=np.int64)
+        for (i, d, s, h), p in presence.items():
+            self.presence_index[i, d, s, h] = p.Index()
+        self.groups = [np.array(ids) for ids in inst.department_groups().values()]
+        self.tier = hall_tiers(inst.halls.capacity)
+        # Incumbent: every variable's value, its objective, and per exam its cell and halls
+        self.values = self.objective = None
+        self.day = self.slot = self.halls = None
+
+    def load(self, assignment, slots_per_day):
+        """Make a previous assignment ({i: (day, slot, [halls])}) the incumbent
+        to fix; False if it does not place every exam in the model's range."""
+        n, num_days = self.dp_index.shape[:2]
+        H = self.presence_index.shape[-1]
+        if len(assignment) != n or not all(
+            0 <= d < num_days and 0 <= s < slots_per_day and halls and all(0 <= h < H for h in halls)
+            for d, s, halls in assignment.values()
+        ):
+            return False
+        self.day = np.array([assignment[i][0] for i in range(n)], dtype=np.int64)
+        self.slot = np.array([assignment[i][1] for i in range(n)], dtype=np.int64)
+        self.halls = np.zeros((n, H), dtype=bool)
+        for i, (_, _, halls) in assignment.items():
+            self.halls[i, halls] = True
+        return True
+
+    def accept(self, solver):
+        self.values = np.array(solution_vector(solver), dtype=np.int64)
+        self.objective = round(solver.ObjectiveValue())
+        ids = np.arange(len(self.day_index))
+        self.day = self.values[self.day_index]
+        self.slot = self.values[self.slot_index]
+        self.halls = self.values[self.presence_index[ids, self.day, self.slot]].astype(bool)
+
+    def neighbourhood(self, kind, rng):
+        """Sorted ids of the exams one neighbourhood of kind frees; empty if kind has none."""
+        if kind == "department":
+            options = self.groups
+        elif kind == "day":
+            options = [np.flatnonzero(self.day == d) for d in np.unique(self.day)]
+        elif kind == "hall_tier":
+            options = [np.flatnonzero(self.halls[:, self.tier == t].any(axis=1)) for t in np.unique(self.tier)]
+        else:
+            raise ValueError(f"Unknown neighbourhood: {kind}")
+        options = [ids for ids in options if len(ids)]
+        if not options:
+            return np.empty(0, dtype=np.int64)
+        free = rng.choice(options)
+        if len(free) > MAX_FREE:
+            free = np.array(sorted(rng.sample(free.tolist(), MAX_FREE)))
+        return free
+
+    def fix(self, free):
+        """Assume every exam but free at its incumbent cell and halls."""
+        fixed = np.ones(len(self.day), dtype=bool)
+        fixed[free] = False
+        ids = np.flatnonzero(fixed)
+        day, slot = self.day[ids], self.slot[ids]
+        cell = self.presence_index[ids, day, slot]
+        literals = np.concatenate([self.dp_index[ids, day, slot], np.where(self.halls[ids], cell, -cell - 1).ravel()])
+        self.model.ClearAssumptions()
+        self.model.Proto().assumptions.extend(literals.tolist())
+        return self.model
+
+    def hint(self):
+        """Hint every variable with its incumbent value."""
+        self.model.ClearHints()
+        hint = self.model.Proto().solution_hint
+        hint.vars.extend(range(len(self.values)))
+        hint.values.extend(self.values.tolist())
+
+    def release(self):
+        self.model.ClearAssumptions()
+        self.model.ClearHints()
+
+    def solution(self, num_halls):
+        assignment = {
+            i: (d, s, np.flatnonzero(halls).tolist())
+            for i, (d, s, halls) in enumerate(zip(self.day.tolist(), self.slot.tolist(), self.halls))
+        }
+        return SolutionArrays.from_assignment(assignment, len(assignment), num_halls)
+
+
+def solve_lns(model, module_vars, presence, dp, inst, num_days, slots_per_day, params,
+              semester_to_slot=None, previous=None):
+    """LNS over a built exam model -> (status, SolutionArrays or None, diagnostics.lns).
+
+    previous ((assignment, stats), see warm_start.previous_assignment) is the
+    start instead of greedy_exams; semester_to_slot is passed to greedy_exams.
+    """
+    t0 = time.perf_counter()
+    deadline = t0 + params.time_limit
+    rng = random.Random(params.random_seed)
+    info = {"start": "greedy" if previous is None else "warm_start", "iterations": 0, "progress": []}
+    stats = {kind: {"tries": 0, "improved": 0, "weight": 1.0} for kind in KINDS}
+    info["neighbourhoods"] = stats
+
+    if previous is None:
+        greedy = GreedyRun(greedy_exams, inst, "hint", num_days, slots_per_day, semester_to_slot)
+        previous = greedy.previous()
+        info["greedy"] = greedy.info
+
+    lns = ExamLNS(model, module_vars, presence, dp, inst, num_days, slots_per_day)
+    status, proven = None, False
+    if lns.load(previous[0], slots_per_day):
+        solver = new_solver(max(0, deadline - time.perf_counter()), params.workers, params)
+        solver.parameters.max_presolve_iterations = 1
+        status = solver.Solve(lns.fix([]))
+        lns.release()
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        start = model.Clone()
+        info["hints"] = add_exam_hints(start, module_vars, presence, dp, previous, slots_per_day)
+        solver = new_solver(max(0, deadline - time.perf_counter()), params.workers, params)
+        solver.parameters.stop_after_first_solution = True
+        status = solver.Solve(start)
+        proven = status == cp_model.OPTIMAL
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        info["seconds"] = round(time.perf_counter() - t0, 3)
+        return status, None, info
+
+    lns.accept(solver)
+    lns.hint()
+    info["progress"].append(
+        {"seconds": round(time.perf_counter() - t0, 3), "objective": lns.objective, "neighbourhood": "start"}
+    )
+
+    while not proven and lns.objective > 0 and not cancelled():
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            break
+        kind = rng.choices(KINDS, weights=[stats[k]["weight"] for k in KINDS])[0]
+        free = lns.neighbourhood(kind, rng)
+        outcome = "failed"
+        if len(free):
+            solver = new_solver(min(SUB_TIME_LIMIT, remaining), params.workers, params)
+            solver.parameters.max_presolve_iterations = 1
+            sub_status = solver.Solve(lns.fix(free))
+            info["iterations"] += 1
+            stats[kind]["tries"] += 1
+            if sub_status in (cp_model.OPTIMAL, cp_model.FEASIBLE) and solver.ObjectiveValue() <= lns.objective:
+                outcome = "improved" if solver.ObjectiveValue() < lns.objective else "equal"
+                lns.accept(solver)
+                lns.hint()
+        if outcome == "improved":
+            stats[kind]["improved"] += 1
+            info["progress"].append(
+                {"seconds": round(time.perf_counter() - t0, 3), "objective": lns.objective, "neighbourhood": kind}
+            )
+        weight = DECAY * stats[kind]["weight"] + (1 - DECAY) * REWARDS[outcome]
+        stats[kind]["weight"] = round(max(MIN_WEIGHT, weight), 3)
+
+    lns.release()
+    info["objective"] = lns.objective
+    info["seconds"] = round(time.perf_counter() - t0, 3)
+    # Every objective term is non-negative, so 0 is optimal
+    final = cp_model.OPTIMAL if proven or lns.objective == 0 else cp_model.FEASIBLE
+    return final, lns.solution(inst.num_halls), info
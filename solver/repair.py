@@ -0,0 +1,373 @@
+"""
+Minimal-perturbation repair of a previous timetable.
+
+A mid-semester edit (a hall closes, a few enrolments change) should move as
+little of the published timetable as possible. Given the previous solution
+(read with warm_start.read_previous / previous_assignment) and a change set,
+the repair models here:
+
+- mark modules as changed when the change set names them, when they are new,
+  or when their previous placement no longer holds (hall gone, closed or no
+  longer eligible, start no longer fits, clash with another kept placement),
+- free the changed modules and their department peers (for exams only the
+  peers that sat in a cell a changed exam left, as exam clashes are only
+  priced by the objective),
+- keep every other module as a constant: its placement only shows up as
+  fixed hall occupancy and fixed department intervals, with no variables,
+- minimise the number of free modules that leave their previous placement.
+
+Change set file (JSON, every key optional):
+    {"modules": ["CE1202", ...], "unavailable_halls": ["LT1", ...]}
+
+The returned module_vars / presence hold plain ints for the kept modules, so
+solution_arrays.SolutionArrays, and with it the usual JSON helpers, reads
+the repaired solution unchanged.
+"""
+
+import json
+
+import numpy as np
+from ortools.sat.python import cp_model
+
+from exam_objective import count_overlap_terms
+
+
+def read_changes(path):
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return {
+        "modules": list(data.get("modules", [])),
+        "unavailable_halls": list(data.get("unavailable_halls", [])),
+    }
+
+
+def available_halls(inst, changes):
+    closed = set(changes.get("unavailable_halls", ()))
+    return np.array([name not in closed for name in inst.halls.name.tolist()], dtype=bool)
+
+
+def named_modules(inst, changes):
+    wanted = set(changes.get("modules", ()))
+    return {i for i, code in enumerate(inst.modules.code.tolist()) if code in wanted}
+
+
+def with_department_peers(inst, changed, cell_of=None):
+    """changed plus every module sharing a department with one of them.
+
+    With cell_of (id -> previous (day, slot) cell), a peer is only freed if it
+    shares its cell with a changed module of its department.
+    """
+    free = set(changed)
+    for ids in inst.department_groups().values():
+        hit = changed.intersection(ids)
+        if not hit:
+            continue
+        if cell_of is None:
+            free.update(ids)
+            continue
+        cells = {cell_of[i] for i in hit if i in cell_of}
+        free.update(i for i in ids if cell_of.get(i) in cells)
+    return free
+
+
+def repair_stats(inst, changed, free, forced, model):
+    proto = model.Proto()
+    return {
+        "changed_modules": sorted(inst.modules.code[sorted(changed)].tolist()),
+        "free_modules": len(free),
+        "freed_peers": len(free - changed),
+        "fixed_modules": inst.num_modules - len(free),
+        "forced_moves": forced,
+        "model_variables": len(proto.variables),
+        "model_constraints": len(proto.constraints),
+    }
+
+
+def count_moved(solver, moved_vars, stats):
+    """Free modules that left their previous placement in the solution."""
+    return stats["forced_moves"] + sum(solver.Value(v) for v in moved_vars)
+
+
+# ----------------------------
+# Weekly timetable (timetable_csp.py rules, flat time axis)
+# ----------------------------
+def weekly_changed(inst, assignment, named, eligible, slots_per_day):
+    """Ids whose previous placement cannot be kept as it is."""
+    durations = inst.modules.duration.tolist()
+    changed = set(named)
+    for i in range(inst.num_modules):
+        placed = assignment.get(i)
+        if placed is None:
+            changed.add(i)
+            continue
+        d, s, halls = placed
+        if not halls or not eligible[i, halls[0]] or s + durations[i] > slots_per_day:
+            changed.add(i)
+
+    # Kept placements must not clash with each other (e.g. after a duration
+    # edit); both sides of a clash are freed.
+    group_of = {i: key for key, ids in inst.department_groups(by_semester=True).items() for i in ids}
+    taken = {}
+    for i, (d, s, halls) in assignment.items():
+        if i in changed:
+            continue
+        cells = [("hall", halls[0], d, t) for t in range(s, s + durations[i])]
+        if i in group_of:
+            cells += [("dept", group_of[i], d, t) for t in range(s, s + durations[i])]
+        for cell in cells:
+            other = taken.setdefault(cell, i)
+            if other != i:
+                changed.update((i, other))
+    return changed
+
+
+def build_timetable_repair_model(inst, days, slots_per_day, previous, changes):
+    """Repair model with the timetable_csp.py rules (hall no-overlap,
+    department + semester no-overlap, hall eligibility).
+
+    Returns (model, module_vars, moved_vars, stats). module_vars has the
+    build_flat_model layout; kept modules hold ints.
+    """
+    from timetable_csp import week_start_domain
+
+    if inst.eligible is None:
+        inst.build_eligibility()
+    eligible = inst.eligible & available_halls(inst, changes)[None, :]
+    assignment, _ = previous
+    num_days = len(days)
+    durations = inst.modules.duration.tolist()
+
+    changed = weekly_changed(inst, assignment, named_modules(inst, changes), eligible, slots_per_day)
+    free = with_department_peers(inst, changed)
+
+    model = cp_model.CpModel()
+    module_vars = [None] * inst.num_modules
+    hall_free = {}    # hall -> optional intervals of free modules
+    hall_fixed = {}   # hall -> (start, dur) of kept modules
+    moved_vars = []
+    forced = 0
+
+    for i, dur in enumerate(durations):
+        if i in free:
+            continue
+        d, s, halls = assignment[i]
+        start = d * slots_per_day + s
+        module_vars[i] = {
+            "start": start, "week_end": start + dur, "day": d, "hall": halls[0],
+            "slot": s, "end": s + dur, "dur": dur,
+        }
+        hall_fixed.setdefault(halls[0], []).append((start, dur))
+
+    for i in sorted(free):
+        dur = durations[i]
+        allowed = np.flatnonzero(eligible[i]).tolist()
+        hall_domain = cp_model.Domain.FromValues(allowed) if allowed else cp_model.Domain(0, inst.num_halls - 1)
+        start_var = model.NewIntVarFromDomain(week_start_domain(dur, num_days, slots_per_day), f"start_m{i}")
+        week_end_var = model.NewIntVar(0, num_days * slots_per_day, f"wend_m{i}")
+        day_var = model.NewIntVar(0, num_days - 1, f"day_m{i}")
+        hall_var = model.NewIntVarFromDomain(hall_domain, f"hall_m{i}")
+        slot_var = model.NewIntVar(0, slots_per_day - dur, f"slot_m{i}")
+        end_var = model.NewIntVar(0, slots_per_day, f"end_m{i}")
+        model.Add(week_end_var == start_var + dur)
+        model.AddDivisionEquality(day_var, start_var, slots_per_day)
+        model.Add(slot_var == start_var - day_var * slots_per_day)
+        model.Add(end_var == slot_var + dur)
+        mv = {
+            "start": start_var, "week_end": week_end_var, "day": day_var, "hall": hall_var,
+            "slot": slot_var, "end": end_var, "dur": dur,
+        }
+        module_vars[i] = mv
+
+        pres_of = {}
+        for h_idx in allowed:
+            pres = model.NewBoolVar(f"pres_m{i}_h{h_idx}")
+            pres_of[h_idx] = pres
+            model.Add(mv["hall"] == h_idx).OnlyEnforceIf(pres)
+            hall_free.setdefault(h_idx, []).append(model.NewOptionalIntervalVar(
+                mv["start"], dur, mv["week_end"], pres, f"int_m{i}_h{h_idx}"
+            ))
+        model.AddExactlyOne(pres_of.values())
+
+        # --- Staying put is what the objective rewards
+        placed = assignment.get(i)
+        if placed is None:
+            continue
+        d, s, halls = placed
+        if halls and halls[0] in pres_of and s + dur <= slots_per_day:
+            moved = model.NewBoolVar(f"moved_m{i}")
+            model.Add(mv["start"] == d * slots_per_day + s).OnlyEnforceIf(moved.Not())
+            model.Add(pres_of[halls[0]] == 1).OnlyEnforceIf(moved.Not())
+            moved_vars.append(moved)
+        else:
+            forced += 1
+
+    # --- No overlap per hall, kept lectures as fixed intervals
+    for h_idx, intervals in hall_free.items():
+        fixed = [model.NewFixedSizeIntervalVar(start, dur, f"kept_h{h_idx}_{start}")
+                 for start, dur in hall_fixed.get(h_idx, ())]
+        model.AddNoOverlap(intervals + fixed)
+
+    # --- SAME-DEPARTMENT + SAME-SEMESTER NO-TIME-OVERLAP, only groups with a free module
+    for key, ids in inst.department_groups(by_semester=True).items():
+        if len(ids) < 2 or not free.intersection(ids):
+            continue
+        intervals = []
+        for i in ids:
+            mv = module_vars[i]
+            if i in free:
+                intervals.append(model.NewIntervalVar(mv["start"], mv["dur"], mv["week_end"], f"dept_int_m{i}"))
+            else:
+                intervals.append(model.NewFixedSizeIntervalVar(mv["start"], mv["dur"], f"dept_kept_m{i}"))
+        model.AddNoOverlap(intervals)
+
+    if moved_vars:
+        model.Minimize(sum(moved_vars))
+
+    return model, module_vars, moved_vars, repair_stats(inst, changed, free, forced, model)
+
+
+# ----------------------------
+# Exams (monolithic exam model rules)
+# ----------------------------
+def exam_changed(inst, assignment, named, available, num_slots, semester_to_slot):
+    capacities = inst.halls.capacity.tolist()
+    students = inst.modules.students.tolist()
+    semesters = inst.modules.semester.tolist()
+    changed = set(named)
+    for i in range(inst.num_modules):
+        placed = assignment.get(i)
+        if placed is None:
+            changed.add(i)
+            continue
+        d, s, halls = placed
+        pinned = semester_to_slot.get(semesters[i])
+        if (not 0 <= s < num_slots or (pinned is not None and s != pinned)
+                or not all(available[h] for h in halls)
+                or sum(capacities[h] for h in halls) < students[i]):
+            changed.add(i)
+
+    taken = {}
+    for i, (d, s, halls) in assignment.items():
+        if i in changed:
+            continue
+        for h in halls:
+            other = taken.setdefault((d, s, h), i)
+            if other != i:
+                changed.update((i, other))
+    return changed
+
+
+def build_exam_repair_model(inst, days, slots_per_day, previous, changes, semester_to_slot=None):
+    """Repair model with the build_exam_model rules.
+
+    Returns (model, module_vars, presence, moved_vars, stats) with the
+    build_exam_model layout (presence keyed (i, day, slot, hall)); kept
+    modules hold ints. Moves are weighted above every possible department
+    clash, so the count_pairs overlap objective only breaks ties.
+    """
+    semester_to_slot = semester_to_slot or {}
+    assignment, _ = previous
+    num_days = len(days)
+    num_slots = slots_per_day
+    num_halls = inst.num_halls
+    capacities = inst.halls.capacity.tolist()
+    students = inst.modules.students.tolist()
+    semesters = inst.modules.semester.tolist()
+    available = available_halls(inst, changes)
+
+    changed = exam_changed(inst, assignment, named_modules(inst, changes), available, num_slots, semester_to_slot)
+    free = with_department_peers(inst, changed, {i: (d, s) for i, (d, s, _) in assignment.items()})
+
+    model = cp_model.CpModel()
+    module_vars = [None] * inst.num_modules
+    presence = {}
+    dp = {}
+    occupied = {}   # (d, s) -> halls held by kept exams
+
+    for i in range(inst.num_modules):
+        if i in free:
+            continue
+        d, s, halls = assignment[i]
+        module_vars[i] = {"day": d, "slot": s}
+        occupied.setdefault((d, s), set()).update(halls)
+        for h in range(num_halls):
+            presence[(i, d, s, h)] = int(h in halls)
+
+    moved_vars = []
+    forced = 0
+    for i in sorted(free):
+        dvar = model.NewIntVar(0, num_days - 1, f"day_m{i}")
+        svar = model.NewIntVar(0, num_slots - 1, f"slot_m{i}")
+        module_vars[i] = {"day": dvar, "slot": svar}
+        pinned = semester_to_slot.get(semesters[i])
+
+        a_list = []
+        for d in range(num_days):
+            for s in range(num_slots):
+                taken = occupied.get((d, s), ())
+                if pinned is not None and s != pinned:
+                    dp[(i, d, s)] = 0
+                    for h in range(num_halls):
+                        presence[(i, d, s, h)] = 0
+                    continue
+                a = model.NewBoolVar(f"assign_m{i}_d{d}_s{s}")
+                dp[(i, d, s)] = a
+                a_list.append(a)
+                model.Add(dvar == d).OnlyEnforceIf(a)
+                model.Add(svar == s).OnlyEnforceIf(a)
+                pres_list = []
+                for h in range(num_halls):
+                    if not available[h] or h in taken:
+                        presence[(i, d, s, h)] = 0
+                        continue
+                    p = model.NewBoolVar(f"pres_m{i}_d{d}_s{s}_h{h}")
+                    presence[(i, d, s, h)] = p
+                    model.AddImplication(p, a)
+                    pres_list.append((capacities[h], p))
+                if pres_list:
+                    model.Add(sum(cap * p for cap, p in pres_list) >= students[i]).OnlyEnforceIf(a)
+                else:
+                    model.Add(a == 0)
+        model.AddExactlyOne(a_list)
+
+        placed = assignment.get(i)
+        if placed is None:
+            continue
+        d, s, halls = placed
+        if (halls and not isinstance(dp.get((i, d, s), 0), int)
+                and not any(isinstance(presence[(i, d, s, h)], int) for h in halls)):
+            moved = model.NewBoolVar(f"moved_m{i}")
+            model.Add(dp[(i, d, s)] == 1).OnlyEnforceIf(moved.Not())
+            for h in range(num_halls):
+                model.Add(presence[(i, d, s, h)] == int(h in halls)).OnlyEnforceIf(moved.Not())
+            moved_vars.append(moved)
+        else:
+            forced += 1
+
+    # At most one exam per hall per (day, slot); kept exams already removed those halls
+    for d in range(num_days):
+        for s in range(num_slots):
+            for h in range(num_halls):
+                pres_list = [presence[(i, d, s, h)] for i in free]
+                pres_list = [p for p in pres_list if not isinstance(p, int)]
+                if len(pres_list) > 1:
+                    model.AddAtMostOne(pres_list)
+
+    # Same-department clashes, only for departments with a free exam;
+    # kept exams count as constants in their cell.
+    dept_map = {
+        dept: ids for dept, ids in inst.department_groups().items() if free.intersection(ids)
+    }
+    for ids in dept_map.values():
+        for i in ids:
+            if i not in free:
+                d0, s0 = module_vars[i]["day"], module_vars[i]["slot"]
+                for d in range(num_days):
+                    for s in range(num_slots):
+                        dp[(i, d, s)] = int((d, s) == (d0, s0))
+    overlap_vars = count_overlap_terms(model, dept_map, dp, num_days, num_slots, exact_pairs=True)
+
+    clash_bound = sum(len(ids) * (len(ids) - 1) // 2 for ids in dept_map.values())
+    model.Minimize((clash_bound + 1) * sum(moved_vars) + sum(overlap_vars))
+
+    return model, module_vars, presence, moved_vars, repair_stats(inst, changed, free, forced, model)
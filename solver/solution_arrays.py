@@ -0,0 +1,172 @@
+"""
+Columnar solution extraction.
+
+Every solver.Value call crosses into C++. print_timetable_grid made four
+of them per module for every (day, slot, hall) cell, and the JSON
+builders made one per variable. SolutionArrays takes the response's
+solution vector once, then gathers each module's day, slot and hall into
+NumPy arrays. The grid and slot printers, the JSON builders, the exam
+hall split, the solution_stream decoders and the check_* validators all
+read from those arrays. It works the same on a CpSolver and on a
+CpSolverSolutionCallback.
+
+occupancy() is the dense (day, slot, hall) tensor of module ids, with -1
+for free cells.
+"""
+
+import numpy as np
+
+
+def solution_vector(solver):
+    """Every variable's value, indexed by variable index.
+
+    This is the response's own repeated field. Copying all of it into NumPy
+    costs more than gathering the few thousand values the output needs.
+    """
+    return solver.response_proto.solution
+
+
+def gather(values, items):
+    """Values of variables, negated literals or plain ints (kept repair modules) as an int64 array."""
+    out = np.empty(len(items), dtype=np.int64)
+    for k, item in enumerate(items):
+        if isinstance(item, (int, np.integer)):
+            out[k] = item
+        else:
+            idx = item.Index()
+            out[k] = values[idx] if idx >= 0 else 1 - values[-idx - 1]
+    return out
+
+
+class SolutionArrays:
+    """day / slot / duration per module id, plus hall (weekly) or a
+    (modules x halls) bool matrix halls (exams)."""
+
+    __slots__ = ("day", "slot", "duration", "hall", "halls")
+
+    def __init__(self, day, slot, duration, hall=None, halls=None):
+        self.day = day
+        self.slot = slot
+        self.duration = duration
+        self.hall = hall
+        self.halls = halls
+
+    @classmethod
+    def from_timetable(cls, solver, module_vars):
+        """Weekly models: module_vars entries with "day", "slot", "hall", "dur"."""
+        values = solution_vector(solver)
+        return cls(
+            gather(values, [mv["day"] for mv in module_vars]),
+            gather(values, [mv["slot"] for mv in module_vars]),
+            np.array([mv["dur"] for mv in module_vars], dtype=np.int64),
+            hall=gather(values, [mv["hall"] for mv in module_vars]),
+        )
+
+    @classmethod
+    def from_exam(cls, solver, module_vars, presence, num_halls):
+        """Exam models: module_vars entries with "day", "slot"; presence keyed (i, d, s, h)."""
+        values = solution_vector(solver)
+        day = gather(values, [mv["day"] for mv in module_vars])
+        slot = gather(values, [mv["slot"] for mv in module_vars])
+        # Only the presence literals of each module's own (day, slot)
+        literals = [
+            presence.get((i, d, s, h), 0)
+            for i, (d, s) in enumerate(zip(day.tolist(), slot.tolist()))
+            for h in range(num_halls)
+        ]
+        halls = gather(values, literals).reshape(len(module_vars), num_halls).astype(bool)
+        return cls(day, slot, np.ones(len(module_vars), dtype=np.int64), halls=halls)
+
+    @classmethod
+    def from_assignment(cls, assignment, num_modules, num_halls):
+        """exam_two_stage assignments {module_id: (day, slot, [hall_idx, ...])}."""
+        day = np.empty(num_modules, dtype=np.int64)
+        slot = np.empty(num_modules, dtype=np.int64)
+        halls = np.zeros((num_modules, num_halls), dtype=bool)
+        for i, (d, s, hall_idx) in assignment.items():
+            day[i], slot[i] = d, s
+            halls[i, hall_idx] = True
+        return cls(day, slot, np.ones(num_modules, dtype=np.int64), halls=halls)
+
+    def hall_lists(self):
+        """[hall ids] per module."""
+        if self.halls is not None:
+            return [np.flatnonzero(row).tolist() for row in self.halls]
+        return [[h] for h in self.hall.tolist()]
+
+    def cells(self):
+        """(module, day, slot, hall) arrays, one entry per occupied cell."""
+        if self.halls is not None:
+            module, hall = np.nonzero(self.halls)
+            return module, self.day[module], self.slot[module], hall
+        module = np.repeat(np.arange(len(self.day)), self.duration)
+        # 0, 1, ..., dur-1 within each module
+        offset = np.arange(len(module)) - np.repeat(np.cumsum(self.duration) - self.duration, self.duration)
+        return module, self.day[module], self.slot[module] + offset, self.hall[module]
+
+    def occupancy(self, num_days, slots_per_day, num_halls):
+        """(day, slot, hall) -> module id, -1 when free (one of them on a clash)."""
+        grid = np.full((num_days, slots_per_day, num_halls), -1, dtype=np.int64)
+        module, d, s, h = self.cells()
+        grid[d, s, h] = module
+        return grid
+
+    def cell_counts(self, num_days, slots_per_day, num_halls):
+        """(day, slot, hall) -> number of modules placed there."""
+        counts = np.zeros((num_days, slots_per_day, num_halls), dtype=np.int64)
+        _, d, s, h = self.cells()
+        np.add.at(counts, (d, s, h), 1)
+        return counts
+
+
+# ----------------------------
+# Validators
+# ----------------------------
+def check_timetable(sol, inst, num_days, slots_per_day, group_rule="no_overlap"):
+    """Violation counts of a weekly solution; all zero for a valid one.
+
+    department_clashes counts the (group, day, slot) cells held by more than
+    one module: with group_rule="no_overlap" (timetable_csp) a (department,
+    semester) group's modules must not overlap, with "distinct_starts"
+    (timetable_csp2) a department's modules must not start together.
+    """
+    n = len(sol.day)
+    overflow = sol.slot + sol.duration > slots_per_day
+    fits = ~overflow
+    fitted = SolutionArrays(sol.day[fits], sol.slot[fits], sol.duration[fits], hall=sol.hall[fits])
+    counts = fitted.cell_counts(num_days, slots_per_day, inst.num_halls)
+
+    if group_rule == "no_overlap":
+        groups = inst.department_groups(by_semester=True)
+        module, d, s, _ = fitted.cells()
+    elif group_rule == "distinct_starts":
+        groups = inst.department_groups()
+        module, d, s = np.arange(len(fitted.day)), fitted.day, fitted.slot
+    else:
+        raise ValueError(f"Unknown group_rule: {group_rule}")
+    group = np.full(n, -1, dtype=np.int64)
+    for g, ids in enumerate(groups.values()):
+        group[ids] = g
+    # cells() numbers the fitted modules 0.. in order
+    group = group[fits][module]
+    grouped = group >= 0
+    group_counts = np.zeros((len(groups), num_days, slots_per_day), dtype=np.int64)
+    np.add.at(group_counts, (group[grouped], d[grouped], s[grouped]), 1)
+
+    return {
+        "hall_clashes": int((counts > 1).sum()),
+        "department_clashes": int((group_counts > 1).sum()),
+        "slot_overflow": int(overflow.sum()),
+        "ineligible_halls": int((~inst.eligible[np.arange(n), sol.hall]).sum()) if inst.eligible is not None else 0,
+    }
+
+
+def check_exams(sol, inst, num_days, slots_per_day):
+    """Violation counts of an exam solution; all zero for a valid one."""
+    counts = sol.cell_counts(num_days, slots_per_day, inst.num_halls)
+    seats = sol.halls.astype(np.int64) @ inst.halls.capacity.astype(np.int64)
+    return {
+        "hall_clashes": int((counts > 1).sum()),
+        "unseated_modules": int((~sol.halls.any(axis=1)).sum()),
+        "under_capacity": int((seats < inst.modules.students).sum()),
+    }
@@ -0,0 +1,124 @@
+"""
+Stream improving solutions while CP-SAT is still searching, and write
+results as NDJSON.
+
+With --stream a solver passes a SolutionStreamer to solver.Solve. Every
+solution CP-SAT finds becomes one NDJSON record:
+
+    {"event": "solution", "solution": 3, "objective": 12.0, "bound": 4.0,
+     "wall_time": 1.84, "modules": [{"code": "EE5201", "day": "Thu", ...}, ...]}
+
+"modules" has one compact entry per module (not per occupied slot). On the
+command line the records go to stdout as they are found and the script's
+final JSON follows as one {"event": "result", ...} line. Inside a
+solver_service job they update the job's "progress" instead, so a client
+polling GET /jobs/<id> can show the best timetable so far and DELETE the
+job once it is good enough.
+
+With --output ndjson the final result is written by write_result_ndjson
+instead of as one JSON document: one compact line per timetable entry
+(exactly the objects of the usual "timetable" / "modules" list, produced
+lazily from the solver) and then one trailer line
+
+    {"event": "end", "status": "OPTIMAL", "entries": 312, "diagnostics": {...}}
+
+Nothing else is printed, so a reader can handle each line as it arrives,
+and neither side holds the whole timetable in memory.
+"""
+
+import json
+import sys
+
+from ortools.sat.python import cp_model
+
+from solution_arrays import SolutionArrays
+from solver_control import current_control
+
+
+def write_ndjson(record, out=None):
+    out = out or sys.stdout
+    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    out.flush()
+
+
+def write_result_ndjson(result, entries_key, header=(), out=None):
+    """result[entries_key] line by line, then the rest of result as the trailer.
+
+    Keys named in header are written first, as an {"event": "start"} line.
+    """
+    out = out or sys.stdout
+    if header:
+        write_ndjson({"event": "start", **{key: result[key] for key in header}}, out)
+    count = 0
+    for entry in result[entries_key]:
+        out.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        count += 1
+    trailer = {k: v for k, v in result.items() if k != entries_key and k not in header}
+    write_ndjson({"event": "end", **trailer, "entries": count}, out)
+
+
+def solution_sink(stream):
+    """Where --stream records go: the current service job, else stdout (None without --stream)."""
+    if not stream:
+        return None
+    control = current_control.get()
+    return control.publish if control is not None else write_ndjson
+
+
+class SolutionStreamer(cp_model.CpSolverSolutionCallback):
+    """Calls sink(record) for every solution; decode(self) builds "modules"."""
+
+    def __init__(self, decode, sink):
+        super().__init__()
+        self.decode = decode
+        self.sink = sink
+        self.solutions = 0
+
+    def on_solution_callback(self):
+        self.solutions += 1
+        self.sink({
+            "event": "solution",
+            "solution": self.solutions,
+            "objective": self.ObjectiveValue(),
+            "bound": self.BestObjectiveBound(),
+            "wall_time": round(self.WallTime(), 3),
+            # The callback has a response like a solver, so the decoders read SolutionArrays
+            "modules": self.decode(self),
+        })
+
+
+def timetable_decoder(module_vars, inst, days):
+    """Weekly models: one {code, day, hall, slot, duration} per module."""
+    codes = inst.modules.code.tolist()
+    hall_names = inst.halls.name.tolist()
+
+    def decode(solver):
+        sol = SolutionArrays.from_timetable(solver, module_vars)
+        return [
+            {"code": code, "day": days[d], "hall": hall_names[h], "slot": s, "duration": dur}
+            for code, d, h, s, dur in zip(codes, sol.day.tolist(), sol.hall.tolist(),
+                                          sol.slot.tolist(), sol.duration.tolist())
+        ]
+
+    return decode
+
+
+def exam_decoder(module_vars, presence, inst, days):
+    """Exam models: one {code, day, slot, halls} per module (hall names, no seat split)."""
+    codes = inst.modules.code.tolist()
+    hall_names = inst.halls.name.tolist()
+
+    def decode(solver):
+        sol = SolutionArrays.from_exam(solver, module_vars, presence, len(hall_names))
+        return [
+            {"code": code, "day": days[d], "slot": s, "halls": [hall_names[h] for h in hall_idx]}
+            for code, d, s, hall_idx in zip(codes, sol.day.tolist(), sol.slot.tolist(), sol.hall_lists())
+        ]
+
+    return decode
+
+
+def streamer(stream, decode):
+    """A SolutionStreamer for --stream, else None (plain solver.Solve)."""
+    sink = solution_sink(stream)
+    return SolutionStreamer(decode, sink) if sink is not None else None
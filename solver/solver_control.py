@@ -0,0 +1,113 @@
+"""
+Per-job CP-SAT settings and cancellation.
+
+Every solver script creates its CpSolver through new_solver. Outside a job
+it behaves like setting max_time_in_seconds / num_search_workers by hand.
+Inside `with job_scope(control):` (see solver_service.py) it also:
+
+- caps num_search_workers at the job's core budget,
+- registers the solver while its Solve runs, so control.cancel() can stop
+  every solve the job is running. A cancel also zeroes the time limit of
+  registered solvers, which covers a solve that has not reached CP-SAT yet
+  (StopSearch does nothing before that),
+- gives solves that start after a cancel a zero time limit (checked when
+  Solve is called, under the control's lock), so loops like
+  the two-stage rounds stop at their next status check; loops that would
+  go on regardless (the LNS driver) ask cancelled(),
+- keeps the latest --stream solution record (publish) for status polling.
+
+The control lives in a ContextVar; helpers that fan work out to threads
+(exam_two_stage.pack_cells) run each task in a copy of the caller's context.
+"""
+
+import contextvars
+import threading
+from contextlib import contextmanager
+
+from ortools.sat.python import cp_model
+
+current_control = contextvars.ContextVar("solver_control", default=None)
+
+
+class SolveControl:
+    def __init__(self, workers):
+        self.workers = workers
+        self.cancelled = False
+        self.solvers = []
+        self.progress = None
+        self.lock = threading.Lock()
+
+    def register(self, solver):
+        with self.lock:
+            self.solvers.append(solver)
+            return self.cancelled
+
+    def unregister(self, solver):
+        with self.lock:
+            self.solvers.remove(solver)
+
+    def publish(self, record):
+        """Sink for solution_stream: keep only the latest solution."""
+        with self.lock:
+            self.progress = record
+
+    def cancel(self):
+        with self.lock:
+            self.cancelled = True
+            solvers = list(self.solvers)
+        for solver in solvers:
+            # The time limit catches a Solve that has not started its search yet
+            solver.parameters.max_time_in_seconds = 0
+            solver.StopSearch()
+
+
+class JobSolver(cp_model.CpSolver):
+    """CpSolver of a job: registered with its control while a solve runs."""
+
+    def __init__(self, control):
+        super().__init__()
+        self.control = control
+
+    def solve(self, model, solution_callback=None):
+        if self.control.register(self):
+            self.parameters.max_time_in_seconds = 0
+        try:
+            return super().solve(model, solution_callback)
+        finally:
+            self.control.unregister(self)
+
+    Solve = solve
+
+
+@contextmanager
+def job_scope(control):
+    token = current_control.set(control)
+    try:
+        yield control
+    finally:
+        current_control.reset(token)
+
+
+def job_workers(workers):
+    """workers capped by the current job's budget (unchanged outside a job)."""
+    control = current_control.get()
+    return workers if control is None else max(1, min(workers, control.workers))
+
+
+def cancelled():
+    """Whether the current job was cancelled (False outside a job)."""
+    control = current_control.get()
+    return control is not None and control.cancelled
+
+
+def new_solver(max_time_in_seconds, num_search_workers, params=None):
+    """params, a solver_params.SolverParams, adds its seed, gap, presolve and LNS settings."""
+    control = current_control.get()
+    solver = cp_model.CpSolver() if control is None else JobSolver(control)
+    if params is not None:
+        params.apply(solver)
+    if control is not None:
+        num_search_workers = job_workers(num_search_workers)
+    solver.parameters.max_time_in_seconds = max_time_in_seconds
+    solver.parameters.num_search_workers = num_search_workers
+    return solver
@@ -0,0 +1,459 @@
+"""
+Long-lived solver service (HTTP/JSON on localhost).
+
+Spawning `python timetable_csp.py` per upload pays interpreter start-up,
+the pandas/ortools imports and the workbook load on every request, and the
+caller has to scrape the JSON out of stdout. This process imports every
+solver once and keeps parsed instances in memory, keyed by workbook path,
+size and mtime. A request then only pays for the solve.
+
+Endpoints:
+    GET    /health      {"status": "ok", "solvers": [...], "cached_instances": n, "jobs": {...}, ...}
+    POST   /solve       {"solver": "timetable_csp", "file": "../data/x.xlsx", "options": {"model": "flat"}}
+    POST   /jobs        same body -> 202 {"job_id": "...", "status": "queued"}
+    GET    /jobs        status of every queued, running and recently finished job
+    GET    /jobs/<id>   {"job_id", "status", "priority", "workers", ..., "result" | "error"}
+    DELETE /jobs/<id>   cancel the job
+
+"solver" is one of SOLVERS. "file" defaults to the solver's DATA_FILE.
+"options" are the solver's command-line options with "_" or "-" spelling;
+true adds a flag and false or null leaves it out, objects and lists are
+passed as JSON. For example
+{"pipeline": "two-stage", "objective": "count", "warm_start": "prev.json"}
+Files named by options (FILE_OPTIONS) must be readable by the service.
+or {"params": {"profile": "auto", "random_seed": 1}} (see solver_params.py;
+"auto" sizes the solve to the job's workers).
+With {"stream": true} the job's status carries "progress", the latest
+solution record of solution_stream.py, while the solve is still running.
+The response is the JSON the script would print, plus
+diagnostics.service (instance cache, load and solve seconds). Bad requests
+get 400 and solver errors 500, both as {"error": "..."}.
+
+Every solve goes through one JobQueue; POST /solve is a job that the
+handler waits for. A job asks for "workers" CP-SAT search workers (default
+min(8, --cores)) and the queue only starts it once that many of the --cores
+budget are free and fewer than --max-jobs are running. Jobs start in
+priority order, lowest first, then in submission order; exams default to
+priority 0 and weekly timetables to 1, and a request can set "priority".
+Cancelling a queued job drops it; cancelling a running one calls StopSearch
+on its CpSolver (see solver_control.py), and the job ends as "cancelled".
+
+Usage:
+    python solver_service.py [--host 127.0.0.1] [--port 8765] [--preload]
+                             [--cores N] [--max-jobs N]
+"""
+
+import argparse
+import heapq
+import importlib
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from data_loader import Instance
+from solver_control import SolveControl, job_scope
+
+SOLVERS = (
+    "timetable_csp",
+    "timetable_csp2",
+    "exam_timetable_csp",
+    "exam_timetable_csp2",
+    "exam_timetable_csp3",
+)
+
+MAX_CACHED_INSTANCES = 16
+MAX_FINISHED_JOBS = 100
+
+# Lower runs first
+DEFAULT_PRIORITY = {"exam": 0, "timetable": 1}
+
+# Options that name a file the solver reads (metavar FILE in the scripts)
+FILE_OPTIONS = ("warm_start", "repair", "changes")
+
+
+class RequestError(ValueError):
+    """A malformed /solve request (reported as HTTP 400)."""
+
+
+class SolverService:
+    def __init__(self, solvers=SOLVERS, max_cached=MAX_CACHED_INSTANCES):
+        self.modules = {name: importlib.import_module(name) for name in solvers}
+        self.instances = OrderedDict()   # (solver, path, size, mtime_ns) -> (ModuleTable, HallTable, load_info)
+        self.max_cached = max_cached
+        self.cache_lock = threading.Lock()
+        self.started = time.time()
+        self.jobs = None
+
+    def health(self):
+        health = {
+            "status": "ok",
+            "solvers": list(self.modules),
+            "cached_instances": len(self.instances),
+            "uptime_seconds": round(time.time() - self.started, 1),
+        }
+        if self.jobs is not None:
+            health["jobs"] = self.jobs.summary()
+        return health
+
+    def instance(self, solver, file_path):
+        """A fresh Instance over cached tables -> (inst, load_info, "memory" | "loaded")."""
+        path = os.path.abspath(file_path)
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            raise RequestError(f"cannot read workbook: {e}") from e
+        key = (solver, path, st.st_size, st.st_mtime_ns)
+
+        with self.cache_lock:
+            cached = self.instances.get(key)
+            if cached is not None:
+                self.instances.move_to_end(key)
+        if cached is not None:
+            modules, halls, load_info = cached
+            return Instance(modules, halls), dict(load_info), "memory"
+
+        load_info = {}
+        inst = self.modules[solver].load_data(path, diagnostics=load_info)
+        with self.cache_lock:
+            self.instances[key] = (inst.modules, inst.halls, load_info)
+            while len(self.instances) > self.max_cached:
+                self.instances.popitem(last=False)
+        return Instance(inst.modules, inst.halls), dict(load_info), "loaded"
+
+    def parse_options(self, module, options):
+        argv = []
+        for name, value in (options or {}).items():
+            flag = "--" + str(name).replace("_", "-")
+            if value is True:
+                argv.append(flag)
+            elif isinstance(value, (dict, list)):
+                argv += [flag, json.dumps(value)]
+            elif value is not False and value is not None:
+                argv += [flag, str(value)]
+        try:
+            args = module.parse_args(argv)
+        except SystemExit as e:
+            # argparse reports the problem on stderr and exits
+            raise RequestError(f"invalid options: {argv}") from e
+        if getattr(args, "output", "json") != "json":
+            raise RequestError("the service always answers with one JSON document; drop the output option")
+        for name in FILE_OPTIONS:
+            path = getattr(args, name, None)
+            if path is None:
+                continue
+            try:
+                with open(path, "rb"):
+                    pass
+            except OSError as e:
+                raise RequestError(f"cannot read {name}: {e}") from e
+        return args
+
+    def prepare(self, request):
+        """Validate a request -> (solver, parsed options); raises RequestError."""
+        solver = request.get("solver")
+        if solver not in self.modules:
+            raise RequestError(f"unknown solver {solver!r}; expected one of {list(self.modules)}")
+        return solver, self.parse_options(self.modules[solver], request.get("options"))
+
+    def solve(self, request, prepared=None):
+        solver, args = prepared or self.prepare(request)
+        module = self.modules[solver]
+
+        t0 = time.perf_counter()
+        inst, load_info, source = self.instance(solver, request.get("file") or module.DATA_FILE)
+        load_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        result = module.solve(args, inst, load_info)
+        solve_s = time.perf_counter() - t0
+
+        # timetable_csp.solve also returns the solver objects for its printers
+        result_json = result[0] if isinstance(result, tuple) else result
+        result_json.setdefault("diagnostics", {})["service"] = {
+            "instance_cache": source,
+            "load_seconds": round(load_s, 4),
+            "solve_seconds": round(solve_s, 3),
+        }
+        return result_json
+
+
+class Job:
+    def __init__(self, request, prepared, priority, workers):
+        self.id = uuid.uuid4().hex[:12]
+        self.request = request
+        self.prepared = prepared
+        self.priority = priority
+        self.control = SolveControl(workers)
+        self.status = "queued"
+        self.submitted = time.time()
+        self.started = self.finished = None
+        self.result = self.error = None
+        self.done = threading.Event()
+
+    def to_dict(self, with_result=True):
+        job = {
+            "job_id": self.id,
+            "status": self.status,
+            "solver": self.prepared[0],
+            "priority": self.priority,
+            "workers": self.control.workers,
+            "submitted": self.submitted,
+            "started": self.started,
+            "finished": self.finished,
+        }
+        if self.error is not None:
+            job["error"] = self.error
+        progress = self.control.progress
+        if progress is not None:
+            # Latest solution of a "stream": true job, also while it runs
+            job["progress"] = progress if with_result else {k: v for k, v in progress.items() if k != "modules"}
+        if with_result and self.result is not None:
+            job["result"] = self.result
+        return job
+
+
+class JobQueue:
+    """Priority queue of solves sharing a budget of CP-SAT search workers.
+
+    Strict priority: a job that does not fit yet holds back the jobs behind
+    it, so a large exam solve is not starved by a stream of small ones.
+    """
+
+    def __init__(self, service, cores=None, max_jobs=2, max_finished=MAX_FINISHED_JOBS):
+        self.service = service
+        self.cores = cores or os.cpu_count() or 1
+        self.max_jobs = max_jobs
+        self.max_finished = max_finished
+        self.jobs = OrderedDict()   # job id -> Job, in submission order
+        self.queue = []             # heap of (priority, seq, job id)
+        self.seq = itertools.count()
+        self.running = 0
+        self.free_cores = self.cores
+        self.cond = threading.Condition()
+        threading.Thread(target=self.dispatch, name="job-dispatcher", daemon=True).start()
+
+    def submit(self, request):
+        prepared = self.service.prepare(request)
+        solver = prepared[0]
+        priority = request.get("priority")
+        if priority is None:
+            priority = DEFAULT_PRIORITY["exam" if solver.startswith("exam") else "timetable"]
+        workers = request.get("workers") or min(8, self.cores)
+        try:
+            priority, workers = int(priority), int(workers)
+        except (TypeError, ValueError) as e:
+            raise RequestError(f"priority and workers must be integers: {e}") from e
+        if not 1 <= workers <= self.cores:
+            raise RequestError(f"workers must be between 1 and {self.cores}")
+
+        job = Job(request, prepared, priority, workers)
+        with self.cond:
+            self.jobs[job.id] = job
+            heapq.heappush(self.queue, (priority, next(self.seq), job.id))
+            self.cond.notify_all()
+        return job
+
+    def get(self, job_id):
+        with self.cond:
+            return self.jobs.get(job_id)
+
+    def list(self):
+        with self.cond:
+            return [job.to_dict(with_result=False) for job in self.jobs.values()]
+
+    def summary(self):
+        with self.cond:
+            counts = {}
+            for job in self.jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return {"cores": self.cores, "free_cores": self.free_cores, "max_jobs": self.max_jobs, **counts}
+
+    def cancel(self, job_id):
+        with self.cond:
+            job = self.jobs.get(job_id)
+            if job is None or job.done.is_set():
+                return job
+            job.control.cancel()
+            if job.status == "queued":
+                # Off the heap first, so finish() may prune it later
+                self.queue = [entry for entry in self.queue if entry[2] != job.id]
+                heapq.heapify(self.queue)
+                self.finish(job, "cancelled")
+                self.cond.notify_all()
+        return job
+
+    def dispatch(self):
+        while True:
+            try:
+                job = self.next_job()
+            except Exception as e:
+                # One bad entry must not take the dispatcher (and every waiting POST) down
+                print(f"[solver_service] dispatcher skipped a queue entry: {type(e).__name__}: {e}", flush=True)
+                self.drop_head(f"dispatch failed: {type(e).__name__}: {e}")
+                continue
+            threading.Thread(target=self.run, args=(job,), name=f"job-{job.id}", daemon=True).start()
+
+    def next_job(self):
+        """Wait for the head of the queue to fit, then take it off and mark it running."""
+        with self.cond:
+            while True:
+                # Skip entries whose job is gone or no longer queued
+                while self.queue:
+                    job = self.jobs.get(self.queue[0][2])
+                    if job is not None and job.status == "queued":
+                        break
+                    heapq.heappop(self.queue)
+                if self.queue and self.running < self.max_jobs and job.control.workers <= self.free_cores:
+                    break
+                self.cond.wait()
+            heapq.heappop(self.queue)
+            job.status = "running"
+            job.started = time.time()
+            self.running += 1
+            self.free_cores -= job.control.workers
+            return job
+
+    def drop_head(self, error):
+        """Pop the head of the queue and fail its job, if it still waits."""
+        with self.cond:
+            if not self.queue:
+                return
+            job = self.jobs.get(heapq.heappop(self.queue)[2])
+            if job is not None and job.status == "queued":
+                job.error = error
+                self.finish(job, "failed")
+            self.cond.notify_all()
+
+    def run(self, job):
+        status, result, error = "done", None, None
+        try:
+            with job_scope(job.control):
+                result = self.service.solve(job.request, job.prepared)
+        except Exception as e:
+            status, error = "failed", f"{type(e).__name__}: {e}"
+        if job.control.cancelled:
+            status = "cancelled"
+        with self.cond:
+            job.result, job.error = result, error
+            self.running -= 1
+            self.free_cores += job.control.workers
+            self.finish(job, status)
+            self.cond.notify_all()
+
+    def finish(self, job, status):
+        job.status = status
+        job.finished = time.time()
+        job.done.set()
+        # A job still on the heap is never pruned: dispatch looks it up
+        on_heap = {entry[2] for entry in self.queue}
+        finished = [j for j in self.jobs.values() if j.done.is_set() and j.id not in on_heap]
+        for old in finished[:max(0, len(finished) - self.max_finished)]:
+            del self.jobs[old.id]
+
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        def send_json(self, code, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def job(self):
+            job = service.jobs.get(self.path[len("/jobs/"):])
+            if job is None:
+                self.send_json(404, {"error": f"no job {self.path[len('/jobs/'):]}"})
+            return job
+
+        def do_GET(self):
+            if self.path == "/health":
+                self.send_json(200, service.health())
+            elif self.path == "/jobs":
+                self.send_json(200, {"jobs": service.jobs.list()})
+            elif self.path.startswith("/jobs/"):
+                job = self.job()
+                if job is not None:
+                    self.send_json(200, job.to_dict())
+            else:
+                self.send_json(404, {"error": f"no route {self.path}"})
+
+        def do_DELETE(self):
+            if not self.path.startswith("/jobs/"):
+                self.send_json(404, {"error": f"no route {self.path}"})
+                return
+            job = self.job()
+            if job is not None:
+                service.jobs.cancel(job.id)
+                self.send_json(200, job.to_dict(with_result=False))
+
+        def do_POST(self):
+            if self.path not in ("/solve", "/jobs"):
+                self.send_json(404, {"error": f"no route {self.path}"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if not isinstance(request, dict):
+                    raise RequestError("request body must be a JSON object")
+                job = service.jobs.submit(request)
+            except (RequestError, json.JSONDecodeError) as e:
+                self.send_json(400, {"error": str(e)})
+                return
+
+            if self.path == "/jobs":
+                self.send_json(202, {"job_id": job.id, "status": job.status})
+                return
+            job.done.wait()
+            if job.status == "done":
+                self.send_json(200, job.result)
+            elif job.status == "cancelled":
+                self.send_json(409, {"error": "job cancelled", "job_id": job.id})
+            elif job.error.startswith("RequestError"):
+                self.send_json(400, {"error": job.error.split(": ", 1)[1]})
+            else:
+                self.send_json(500, {"error": job.error})
+
+        def log_message(self, fmt, *args):
+            print(f"[solver_service] {self.address_string()} {fmt % args}", flush=True)
+
+    return Handler
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Long-lived timetable/exam solver service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--preload", action="store_true", help="load every solver's default workbook at start-up")
+    parser.add_argument("--cores", type=int, default=os.cpu_count() or 1,
+                        help="CP-SAT search workers shared by all running jobs")
+    parser.add_argument("--max-jobs", type=int, default=2, help="jobs solving at the same time")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    service = SolverService()
+    service.jobs = JobQueue(service, cores=args.cores, max_jobs=args.max_jobs)
+    if args.preload:
+        for name, module in service.modules.items():
+            service.instance(name, module.DATA_FILE)
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    print(f"[solver_service] listening on http://{args.host}:{args.port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Symmetry breaking for interchangeable modules and halls.
+
+Halls with the same capacity and department, and modules with the same
+duration, size, department and semester (Instance.interchangeable_halls /
+interchangeable_modules), can swap places in any timetable without
+changing feasibility or the objective. The workbook has 85 of its 100
+modules and 13 of its 23 halls in such classes, and CP-SAT spends search
+proving the same dead ends once per permutation.
+
+add_symmetry_breaking orders every class by id:
+  modules  position[i] <= position[j] for i < j, where position is the
+           start on the flattened week (weekly) or day * slots + slot (exams)
+  halls    load[h] >= load[g] for h < g, where load is the slot-hours
+           (weekly) or exams (exams) the hall takes
+
+Every timetable maps to one that meets both orders: sort the halls of a
+class by load, then swap the placements of interchangeable modules into
+start order (the hall loads stay the same). So no timetable is lost, only
+the mirror images of one.
+
+It is opt-in (symmetry=True, --symmetry). The weekly models have no
+objective, so the only gain is in proving infeasibility, and on the
+workbook the first solution came 1.5-3x later with it. The exam models
+were about even. It cannot be combined with --warm-start: a previous
+timetable is rarely in this order, so its hint would contradict the
+model. The repair and two-stage models are built without it.
+"""
+
+
+def add_symmetry_breaking(model, inst, positions, presence, weights):
+    """positions[i]: module i's time position; presence keyed (i, ..., h);
+    weights[i]: what module i adds to its hall's load."""
+    for ids in inst.interchangeable_modules():
+        for i, j in zip(ids, ids[1:]):
+            model.Add(positions[i] <= positions[j])
+
+    hall_classes = inst.interchangeable_halls()
+    if not hall_classes:
+        return
+    terms = {h: [] for ids in hall_classes for h in ids}
+    for key, pres in presence.items():
+        h = key[-1]
+        if h in terms:
+            terms[h].append(weights[key[0]] * pres)
+    for ids in hall_classes:
+        for h, g in zip(ids, ids[1:]):
+            model.Add(sum(terms[h]) >= sum(terms[g]))
+
+
+def symmetry_diagnostics(inst, enabled):
+    """diagnostics.symmetry: the classes found and whether they were used."""
+    module_classes = inst.interchangeable_modules()
+    hall_classes = inst.interchangeable_halls()
+    return {
+        "enabled": enabled,
+        "module_classes": len(module_classes),
+        "modules": sum(len(ids) for ids in module_classes),
+        "hall_classes": len(hall_classes),
+        "halls": sum(len(ids) for ids in hall_classes),
+    }
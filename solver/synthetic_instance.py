@@ -0,0 +1,91 @@
+"""
+Seeded synthetic faculties for benchmarks.
+
+make_instance(n_modules, n_halls, seed) returns a data_loader.Instance
+whose distributions follow the bundled workbook (100 modules, 23 halls):
+
+- durations 1/2/3/4 slots at about 3/54/35/8 %,
+- semesters 1/3/5/7 at about 9/26/38/27 %,
+- one department per ~20 modules (sizes skewed like EE > ME > CE > IS/EC),
+  so each (department, semester) group stays about as full as in the
+  workbook as the faculty grows,
+- ~12% common modules with large classes, the rest in 40-200 seat tiers,
+- halls in capacity tiers (auditorium, lecture theatres, lecture rooms,
+  labs/seminar rooms); about a quarter of the smaller ones are owned by a
+  department, the rest are "common".
+
+Every class fits in the largest common hall, so each module has at least
+one eligible hall. Whether the whole instance is feasible depends on the
+days and slots it is solved with, which is what the benchmarks measure.
+"""
+
+import math
+import random
+
+from data_loader import Instance
+
+DEPARTMENTS = ["EE", "ME", "CE", "IS", "EC"]
+
+DURATIONS = ([1, 2, 3, 4], [3, 54, 35, 8])
+SEMESTERS = ([1, 3, 5, 7], [9, 26, 38, 27])
+CLASS_SIZES = ([40, 75, 100, 130, 200], [10, 40, 20, 15, 15])
+COMMON_SIZES = (300, 550)
+
+# (share of halls, capacity range, may be department owned)
+HALL_TIERS = [
+    (0.05, (500, 600), False),
+    (0.15, (250, 300), False),
+    (0.40, (100, 140), True),
+    (0.40, (40, 75), True),
+]
+
+
+def department_names(n):
+    return DEPARTMENTS[:n] + [f"D{k:02d}" for k in range(len(DEPARTMENTS), n)]
+
+
+def make_halls(n_halls, departments, rng):
+    counts = [max(1, round(share * n_halls)) for share, _, _ in HALL_TIERS]
+    # Trim or pad the mid tier so the total is exactly n_halls
+    counts[2] += n_halls - sum(counts)
+
+    halls = []
+    for (share, (lo, hi), owned), count in zip(HALL_TIERS, counts):
+        for _ in range(max(0, count)):
+            dept = rng.choice(departments) if owned and rng.random() < 0.25 else "common"
+            halls.append({"hall": f"H{len(halls):03d}", "capacity": rng.randint(lo, hi), "department": dept})
+    # The largest hall is always common, so every class has somewhere to go
+    biggest = max(halls, key=lambda h: h["capacity"])
+    biggest["department"] = "common"
+    return halls
+
+
+def make_modules(n_modules, departments, max_class, rng):
+    # Skewed department sizes, like the workbook's 34/23/20/12/11
+    weights = [1 / (k + 1) ** 0.6 for k in range(len(departments))]
+    modules = []
+    for i in range(n_modules):
+        dept = rng.choices(departments, weights)[0]
+        common = rng.random() < 0.12
+        students = rng.randint(*COMMON_SIZES) if common else rng.choices(*CLASS_SIZES)[0]
+        modules.append({
+            "code": f"{dept}{i:04d}",
+            "semester": rng.choices(*SEMESTERS)[0],
+            "duration": rng.choices(*DURATIONS)[0],
+            "iscommon": common,
+            "department": dept,
+            "students": min(students, max_class),
+        })
+    return modules
+
+
+def make_instance(n_modules, n_halls=None, seed=0):
+    """A synthetic Instance; n_halls defaults to the workbook's ratio (23 per 100 modules)."""
+    rng = random.Random(seed)
+    n_halls = n_halls or max(4, math.ceil(0.23 * n_modules))
+    departments = department_names(max(1, round(n_modules / 20)))
+
+    halls = make_halls(n_halls, departments, rng)
+    max_class = max(h["capacity"] for h in halls if h["department"] == "common")
+    modules = make_modules(n_modules, departments, max_class, rng)
+    return Instance.from_records(modules, halls)
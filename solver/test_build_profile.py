@@ -0,0 +1,31 @@
+"""
+Tests for build_profile: the blocks account for the whole model.
+
+Run from solver/: python -m pytest -q test_build_profile.py
+"""
+
+import timetable_csp
+from build_profile import BuildProfile, model_size
+from exam_timetable_csp3 import build_exam_model
+from synthetic_instance import make_instance
+
+
+def test_blocks_cover_the_weekly_model():
+    inst = make_instance(20, seed=2).build_eligibility()
+    profile = BuildProfile()
+    model = timetable_csp.build_model(inst, ["Mon", "Tue", "Wed"], 8, profile=profile)[0]
+
+    summary = profile.to_dict()
+    assert {"variables", "presence_intervals", "exactly_one"} <= set(summary["blocks"])
+    assert (summary["variables"], summary["constraints"]) == model_size(model)
+    assert summary["seconds"] >= 0
+
+
+def test_blocks_cover_the_exam_model():
+    inst = make_instance(20, seed=2)
+    profile = BuildProfile()
+    model = build_exam_model(inst, ["day1", "day2"], 3, objective="count", profile=profile)[0]
+    summary = profile.to_dict()
+    assert (summary["variables"], summary["constraints"]) == model_size(model)
+    # The profile does not change the model
+    assert str(build_exam_model(inst, ["day1", "day2"], 3, objective="count")[0].Proto()) == str(model.Proto())
@@ -0,0 +1,50 @@
+"""
+Tests for compact_timetable: the compact schema expands back to the
+expanded rows, with or without dictionary tables.
+
+Run from solver/: python -m pytest -q test_compact_timetable.py
+"""
+
+import pytest
+from ortools.sat.python import cp_model
+
+from compact_timetable import decode_compact, expand_compact
+from greedy import greedy_timetable, timetable_solution
+from synthetic_instance import make_instance
+from timetable_csp import generate_compact_json, generate_expanded_json
+
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri"]
+SLOTS = 8
+
+
+@pytest.fixture
+def solved():
+    inst = make_instance(20, seed=2).build_eligibility()
+    assignment, unplaced = greedy_timetable(inst, len(DAYS), SLOTS)
+    assert not unplaced
+    return inst, timetable_solution(assignment, inst)
+
+
+def test_compact_rows_are_one_per_module(solved):
+    inst, sol = solved
+    compact = generate_compact_json(cp_model.FEASIBLE, sol, inst, DAYS)
+    assert len(compact["timetable"]) == inst.num_modules
+    assert decode_compact(compact) == compact["timetable"]
+    assert list(expand_compact(compact)) == generate_expanded_json(cp_model.FEASIBLE, sol, inst, DAYS)["timetable"]
+
+
+def test_dictionary_rows_decode_to_names(solved):
+    inst, sol = solved
+    plain = generate_compact_json(cp_model.FEASIBLE, sol, inst, DAYS)
+    coded = generate_compact_json(cp_model.FEASIBLE, sol, inst, DAYS, dictionary=True)
+    assert coded["halls"] == inst.halls.name.tolist()
+    assert len(coded["departments"]) == len(set(coded["departments"]))
+    assert all(isinstance(row["hall"], int) for row in coded["timetable"])
+    assert decode_compact(coded) == plain["timetable"]
+
+
+def test_unsolved_result_keeps_the_tables():
+    inst = make_instance(5, seed=2)
+    result = generate_compact_json(cp_model.INFEASIBLE, None, inst, DAYS, dictionary=True)
+    assert result["status"] == "INFEASIBLE" and result["timetable"] == []
+    assert result["halls"] == inst.halls.name.tolist()
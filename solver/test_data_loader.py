@@ -0,0 +1,108 @@
+"""
+Tests for data_loader: sheets are coerced column-wise into id-addressed tables.
+
+Run from solver/: python -m pytest -q test_data_loader.py
+"""
+
+import numpy as np
+import pandas as pd
+
+from data_loader import MODULES_SHEET, Instance, hall_table, load_instance, module_table
+
+MODULES = pd.DataFrame({
+    "module_code": ["EE1010", "CE2020", None, "ME3030"],
+    "semester": [1, np.nan, 2, 3],
+    "duration": [2, 3, 1, np.nan],
+    "no_of_students": [40, 80, 10, 120],
+    "iscommon": [True, np.nan, False, False],
+    "department": [" EE ", "ce", "ME", np.nan],
+})
+HALLS = pd.DataFrame({
+    "room_name": ["LT1", "EE-LAB"],
+    "capacity": [150, np.nan],
+    "department": ["Common", "EE"],
+})
+
+
+def test_module_table_coerces_each_column_once():
+    modules = module_table(MODULES)
+    # The row without a module code is dropped
+    assert modules.code.tolist() == ["EE1010", "CE2020", "ME3030"]
+    assert modules.semester.tolist() == [1, -1, 3]
+    assert modules.duration.tolist() == [2, 3, 0]
+    assert modules.students.tolist() == [40, 80, 120]
+    assert modules.iscommon.tolist() == [True, False, False]
+    assert modules.dept_key.tolist() == ["ee", "ce", ""]
+    assert modules.department[0] == " EE "
+
+
+def test_module_table_drops_rows_missing_a_required_column():
+    assert module_table(MODULES, required=("semester", "duration")).code.tolist() == ["EE1010"]
+
+
+def test_missing_columns_get_their_defaults():
+    modules = module_table(MODULES[["module_code", "no_of_students"]])
+    assert modules.semester.tolist() == [-1, -1, -1]
+    assert modules.duration.tolist() == [0, 0, 0]
+    assert not modules.iscommon.any()
+    assert modules.dept_key.tolist() == ["", "", ""]
+
+
+def test_hall_table():
+    halls = hall_table(HALLS)
+    assert halls.name.tolist() == ["LT1", "EE-LAB"]
+    assert halls.capacity.tolist() == [150, 0]
+    assert halls.dept_key.tolist() == ["common", "ee"]
+
+
+def test_load_instance_reads_the_workbook(tmp_path, monkeypatch):
+    monkeypatch.setenv("PLANNER_CACHE_DISABLE", "1")
+    path = tmp_path / "input.xlsx"
+    with pd.ExcelWriter(path) as writer:
+        MODULES.to_excel(writer, sheet_name=MODULES_SHEET, index=False)
+        HALLS.to_excel(writer, sheet_name="halls", index=False)
+
+    diagnostics = {}
+    inst = load_instance(path, "halls", diagnostics=diagnostics)
+    assert diagnostics["input_cache"] == "disabled"
+    assert inst.num_modules == 3 and inst.num_halls == 2
+    assert inst.modules.to_records() == module_table(MODULES).to_records()
+    assert inst.halls.to_records() == hall_table(HALLS).to_records()
+
+
+def small_instance():
+    modules = [
+        {"code": "EE1", "semester": 1, "duration": 2, "department": "EE", "students": 40},
+        {"code": "EE2", "semester": 2, "duration": 2, "department": "EE", "students": 90},
+        {"code": "CE1", "semester": 1, "duration": 3, "department": "CE", "students": 40},
+        {"code": "GEN", "duration": 1, "iscommon": True, "students": 200},
+    ]
+    halls = [
+        {"hall": "EE-LAB", "capacity": 50, "department": "EE"},
+        {"hall": "LT1", "capacity": 100, "department": "common"},
+        {"hall": "CE-LAB", "capacity": 60, "department": "ce"},
+    ]
+    return Instance.from_records(modules, halls)
+
+
+def test_instance_addresses_modules_and_halls_by_id():
+    inst = small_instance()
+    records = inst.modules.to_records()
+    assert [r["id"] for r in records] == [0, 1, 2, 3]
+    assert [r["code"] for r in records] == ["EE1", "EE2", "CE1", "GEN"]
+    assert records[3]["semester"] is None and records[3]["department"] is None
+    assert [r["hall"] for r in inst.halls.to_records()] == ["EE-LAB", "LT1", "CE-LAB"]
+
+    assert inst.department_groups() == {"EE": [0, 1], "CE": [2]}
+    assert inst.department_groups(by_semester=True) == {("EE", 1): [0], ("EE", 2): [1], ("CE", 1): [2]}
+
+
+def test_eligibility_index():
+    inst = small_instance().build_eligibility()
+    # Own-department or common halls that seat the class; nothing seats GEN
+    assert inst.eligible_halls == [[0, 1], [1], [1, 2], []]
+    assert inst.hall_modules == [[0], [0, 1, 2], [2]]
+    assert (inst.eligible == np.array([[1, 1, 0], [0, 1, 0], [0, 1, 1], [0, 0, 0]], dtype=bool)).all()
+
+    inst.build_eligibility(restrict_department=False)
+    assert inst.eligible_halls == [[0, 1, 2], [1], [0, 1, 2], []]
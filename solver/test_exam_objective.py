@@ -0,0 +1,34 @@
+"""
+Tests for exam_objective: the overlap terms price a cell as the pairwise count.
+
+Run from solver/: python -m pytest -q test_exam_objective.py
+"""
+
+import pytest
+from ortools.sat.python import cp_model
+
+from exam_objective import count_overlap_terms, pairwise_overlap_terms
+
+
+def cell_objective(terms_of, placed, n=5, **kwargs):
+    """Optimal objective with modules 0..placed-1 of one department in cell (0, 0)."""
+    model = cp_model.CpModel()
+    dp = {(i, 0, 0): model.NewBoolVar(f"dp_{i}") for i in range(n)}
+    for i in range(n):
+        model.Add(dp[(i, 0, 0)] == int(i < placed))
+    model.Minimize(sum(terms_of(model, {"CE": list(range(n))}, dp, 1, 1, **kwargs)))
+    solver = cp_model.CpSolver()
+    solver.parameters.num_search_workers = 1
+    assert solver.Solve(model) == cp_model.OPTIMAL
+    return round(solver.ObjectiveValue())
+
+
+@pytest.mark.parametrize("k", range(6))
+def test_exact_count_terms_match_the_pairwise_count(k):
+    assert cell_objective(count_overlap_terms, k, exact_pairs=True) == k * (k - 1) // 2
+    assert cell_objective(pairwise_overlap_terms, k) == k * (k - 1) // 2
+
+
+@pytest.mark.parametrize("k", range(6))
+def test_count_terms_are_the_excess_over_one(k):
+    assert cell_objective(count_overlap_terms, k) == max(0, k - 1)
@@ -0,0 +1,37 @@
+"""
+Tests for exam_two_stage: the decomposed pipelines return valid timetables.
+
+Run from solver/: python -m pytest -q test_exam_two_stage.py
+"""
+
+import exam_pipeline
+from synthetic_instance import make_instance
+
+DAYS = ["day1", "day2", "day3", "day4", "day5"]
+SLOTS = 3
+VALID = {"hall_clashes": 0, "unseated_modules": 0, "under_capacity": 0}
+
+
+def run(*argv):
+    args = exam_pipeline.parse_args([*argv, "--params", '{"time_limit": 20, "workers": 1}'])
+    return exam_pipeline.solve(args, make_instance(30, seed=3), {}, {}, DAYS, SLOTS)
+
+
+def test_two_stage_timetable_is_valid():
+    result = run("--pipeline", "two-stage")
+    assert result["status"] == "OPTIMAL"
+    assert result["diagnostics"]["validation"] == VALID
+    assert result["diagnostics"]["rounds"] >= 1
+
+
+def test_cumulative_timetable_is_valid():
+    result = run("--pipeline", "cumulative")
+    assert result["status"] == "OPTIMAL"
+    assert result["diagnostics"]["validation"] == VALID
+    assert not result["diagnostics"]["unpacked_cells"]
+
+
+def test_cumulative_days_are_minimised():
+    result = run("--pipeline", "cumulative", "--minimize-days")
+    assert result["diagnostics"]["validation"] == VALID
+    assert result["diagnostics"]["exam_days_used"] < len(DAYS)
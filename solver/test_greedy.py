@@ -0,0 +1,52 @@
+"""
+Tests for greedy: the heuristics place valid timetables and report what
+does not fit.
+
+Run from solver/: python -m pytest -q test_greedy.py
+"""
+
+import numpy as np
+import pytest
+
+from greedy import greedy_exams, greedy_timetable, pick_halls, timetable_solution
+from solution_arrays import SolutionArrays, check_exams, check_timetable
+from synthetic_instance import make_instance
+
+
+@pytest.mark.parametrize("group_rule", ["no_overlap", "distinct_starts"])
+def test_weekly_greedy_is_valid(group_rule):
+    inst = make_instance(60, seed=1).build_eligibility()
+    assignment, unplaced = greedy_timetable(inst, 5, 8, group_rule)
+    assert not unplaced
+    sol = timetable_solution(assignment, inst)
+    assert check_timetable(sol, inst, 5, 8, group_rule) == {
+        "hall_clashes": 0, "department_clashes": 0, "slot_overflow": 0, "ineligible_halls": 0,
+    }
+
+
+def test_weekly_greedy_reports_what_does_not_fit():
+    inst = make_instance(60, seed=1).build_eligibility()
+    assignment, unplaced = greedy_timetable(inst, 1, 4)
+    assert unplaced and len(assignment) + len(unplaced) == inst.num_modules
+    assert set(assignment).isdisjoint(unplaced)
+
+
+def test_exam_greedy_is_valid_and_keeps_semester_slots():
+    inst = make_instance(60, seed=1)
+    semester_to_slot = {1: 0, 3: 1, 5: 2, 7: 0}
+    assignment, unplaced = greedy_exams(inst, 10, 3, semester_to_slot)
+    assert not unplaced
+    sol = SolutionArrays.from_assignment(assignment, inst.num_modules, inst.num_halls)
+    assert check_exams(sol, inst, 10, 3) == {"hall_clashes": 0, "unseated_modules": 0, "under_capacity": 0}
+    semesters = inst.modules.semester.tolist()
+    assert all(s == semester_to_slot[semesters[i]] for i, (_, s, _) in assignment.items())
+
+
+def test_pick_halls_prefers_one_hall_then_the_largest():
+    capacity = np.array([50, 100, 200, 300])
+    free = np.zeros(4, dtype=bool)
+    assert pick_halls(free, capacity, 90) == [1]
+    # The largest hall, then the smallest that seats the rest
+    assert pick_halls(free, capacity, 350) == [3, 0]
+    taken = np.array([False, False, False, True])
+    assert pick_halls(taken, capacity, 350) == [2, 1, 0]
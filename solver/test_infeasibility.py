@@ -0,0 +1,59 @@
+"""
+Tests for infeasibility: explain mode names only the families that conflict.
+
+Run from solver/: python -m pytest -q test_infeasibility.py
+"""
+
+from ortools.sat.python import cp_model
+
+import timetable_csp
+from data_loader import Instance
+from infeasibility import Explainer
+from solver_control import new_solver
+from solver_params import SolverParams
+
+DAYS = ["Mon", "Tue", "Wed"]
+SLOTS = 8
+PARAMS = SolverParams(time_limit=10, workers=1)
+HALLS = [
+    {"hall": "EE-HALL", "capacity": 200, "department": "EE"},
+    {"hall": "LT1", "capacity": 100, "department": "common"},
+]
+
+
+def explain(modules):
+    inst = Instance.from_records(modules, HALLS)
+    explainer = Explainer()
+    model = timetable_csp.build_model(inst, DAYS, SLOTS, explain=explainer)[0]
+    explainer.assume(model)
+    solver = new_solver(PARAMS.time_limit, PARAMS.workers, PARAMS)
+    return explainer.explain(model, solver, solver.Solve(model), PARAMS)
+
+
+def ce_modules(n, students):
+    return [
+        {"code": f"CE{i:02d}", "semester": 3, "duration": 2, "department": "CE", "students": students}
+        for i in range(n)
+    ]
+
+
+def test_feasible_model_has_no_core():
+    result = explain(ce_modules(3, 80))
+    assert result["status"] in ("OPTIMAL", "FEASIBLE") and "core" not in result
+    assert set(result["families"]) == {"capacity", "department_halls", "department_overlap"}
+
+
+def test_core_holds_both_hall_rules():
+    # 150 CE students: LT1 is too small and EE-HALL is not theirs
+    result = explain(ce_modules(1, 150))
+    assert result["status"] == "INFEASIBLE"
+    assert sorted(result["core"]) == ["capacity", "department_halls"]
+    assert result["minimal"]
+
+
+def test_core_holds_only_the_overlap_rule():
+    # 13 two-hour lectures of one group need 26 of the 24 hours
+    result = explain(ce_modules(13, 80))
+    assert result["status"] == "INFEASIBLE"
+    assert result["core"] == ["department_overlap"]
+    assert result["minimal"]
@@ -0,0 +1,63 @@
+"""
+Tests for input_cache: a repeated load is a hit until the workbook changes.
+
+Run from solver/: python -m pytest -q test_input_cache.py
+"""
+
+from input_cache import cached_load
+
+
+def load_counting(calls):
+    def loader(path):
+        calls.append(path)
+        with open(path, "rb") as f:
+            return f.read()
+    return loader
+
+
+def test_repeated_load_is_a_hit_until_the_content_changes(tmp_path, monkeypatch):
+    monkeypatch.setenv("PLANNER_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.delenv("PLANNER_CACHE_DISABLE", raising=False)
+    workbook = tmp_path / "input.xlsx"
+    workbook.write_bytes(b"first")
+    calls = []
+    loader = load_counting(calls)
+
+    assert cached_load(workbook, ["modules"], loader, "t") == (b"first", "miss")
+    assert cached_load(workbook, ["modules"], loader, "t") == (b"first", "hit")
+    assert len(calls) == 1
+    # Another sheet or tag is another entry
+    assert cached_load(workbook, ["halls"], loader, "t")[1] == "miss"
+    assert cached_load(workbook, ["modules"], loader, "u")[1] == "miss"
+
+    workbook.write_bytes(b"second")
+    assert cached_load(workbook, ["modules"], loader, "t") == (b"second", "miss")
+    assert len(calls) == 4
+
+
+def test_disabled_cache_always_parses(tmp_path, monkeypatch):
+    monkeypatch.setenv("PLANNER_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("PLANNER_CACHE_DISABLE", "1")
+    workbook = tmp_path / "input.xlsx"
+    workbook.write_bytes(b"first")
+    calls = []
+
+    for _ in range(2):
+        assert cached_load(workbook, ["modules"], load_counting(calls), "t") == (b"first", "disabled")
+    assert len(calls) == 2
+    assert not (tmp_path / "cache").exists()
+
+
+def test_cache_evicts_to_its_size_budget(tmp_path, monkeypatch):
+    cache = tmp_path / "cache"
+    monkeypatch.setenv("PLANNER_CACHE_DIR", str(cache))
+    monkeypatch.setenv("PLANNER_CACHE_MAX_BYTES", "3000")
+    monkeypatch.delenv("PLANNER_CACHE_DISABLE", raising=False)
+    for n in range(5):
+        workbook = tmp_path / f"input{n}.xlsx"
+        workbook.write_bytes(bytes([n]) * 1000)
+        cached_load(workbook, ["modules"], load_counting([]), "t")
+
+    assert sum(p.stat().st_size for p in cache.glob("*.pkl")) <= 3000
+    # The latest entry survives
+    assert cached_load(workbook, ["modules"], load_counting([]), "t")[1] == "hit"
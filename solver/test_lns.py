@@ -0,0 +1,35 @@
+"""
+Tests for lns: the search improves a crowded start and leaves the model as it was.
+
+Run from solver/: python -m pytest -q test_lns.py
+"""
+
+from exam_timetable_csp3 import build_exam_model
+from greedy import greedy_exams
+from lns import solve_lns
+from solution_arrays import check_exams
+from solver_params import SolverParams
+from synthetic_instance import make_instance
+
+DAYS = ["day1", "day2", "day3", "day4", "day5"]
+SLOTS = 3
+
+
+def test_lns_improves_a_crowded_start():
+    inst = make_instance(40, seed=4)
+    # A valid start that only uses the first three days
+    assignment, unplaced = greedy_exams(inst, 3, SLOTS)
+    assert not unplaced
+    model, module_vars, presence, dp = build_exam_model(inst, DAYS, SLOTS, objective="count_pairs")
+
+    params = SolverParams(time_limit=5, workers=1, random_seed=1)
+    status, sol, info = solve_lns(model, module_vars, presence, dp, inst, len(DAYS), SLOTS, params,
+                                  previous=(assignment, {}))
+
+    assert sol is not None
+    assert check_exams(sol, inst, len(DAYS), SLOTS) == {"hall_clashes": 0, "unseated_modules": 0, "under_capacity": 0}
+    assert info["start"] == "warm_start"
+    assert info["objective"] < info["progress"][0]["objective"]
+    assert info["seconds"] < params.time_limit + 2
+    proto = model.Proto()
+    assert not proto.assumptions and not proto.solution_hint.vars
@@ -0,0 +1,44 @@
+"""
+Tests for repair: a repair frees what the change touches and keeps the rest.
+
+Run from solver/: python -m pytest -q test_repair.py
+"""
+
+from ortools.sat.python import cp_model
+
+from greedy import greedy_exams
+from repair import build_exam_repair_model, count_moved
+from solution_arrays import SolutionArrays, check_exams
+from synthetic_instance import make_instance
+
+DAYS = ["day1", "day2", "day3", "day4", "day5"]
+SLOTS = 3
+
+
+def test_exam_repair_keeps_unaffected_exams_in_place():
+    inst = make_instance(40, seed=1)
+    assignment, unplaced = greedy_exams(inst, len(DAYS), SLOTS)
+    assert not unplaced
+    closed = assignment[0][2][0]
+    changes = {"modules": [], "unavailable_halls": [inst.halls.name[closed]]}
+
+    model, module_vars, presence, moved_vars, stats = build_exam_repair_model(
+        inst, DAYS, SLOTS, (assignment, {}), changes
+    )
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = 20
+    solver.parameters.num_search_workers = 1
+    assert solver.Solve(model) in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+    sol = SolutionArrays.from_exam(solver, module_vars, presence, inst.num_halls)
+
+    assert check_exams(sol, inst, len(DAYS), SLOTS) == {"hall_clashes": 0, "unseated_modules": 0, "under_capacity": 0}
+    assert not sol.halls[:, closed].any()
+    fixed = [i for i, mv in enumerate(module_vars) if isinstance(mv["day"], int)]
+    assert len(fixed) == stats["fixed_modules"] > 0
+    for i in fixed:
+        d, s, halls = assignment[i]
+        assert (sol.day[i], sol.slot[i], sol.hall_lists()[i]) == (d, s, sorted(halls))
+    # Department peers are freed only from the cells the changed exams left
+    users = {i for i, (_, _, halls) in assignment.items() if closed in halls}
+    assert stats["free_modules"] == len(users) + stats["freed_peers"]
+    assert count_moved(solver, moved_vars, stats) >= len(users)
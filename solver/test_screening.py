@@ -0,0 +1,68 @@
+"""
+Tests for screening: clean instances pass, crafted overloads are named.
+
+Run from solver/: python -m pytest -q test_screening.py
+"""
+
+from data_loader import Instance
+from screening import screen_exams, screen_timetable
+from synthetic_instance import make_instance
+
+
+def checks(result):
+    return sorted(v["check"] for v in result["violations"])
+
+
+def ee_modules(n, duration=2, students=50):
+    return [
+        {"code": f"EE{i:02d}", "semester": 3, "duration": duration, "department": "EE", "students": students}
+        for i in range(n)
+    ]
+
+
+def test_synthetic_instance_screens_clean():
+    inst = make_instance(30, seed=3).build_eligibility()
+    assert screen_timetable(inst, 5, 8)["violations"] == []
+    assert screen_exams(inst, 5, 3)["violations"] == []
+
+
+def test_weekly_overloads_are_named():
+    modules = ee_modules(13) + [
+        {"code": "LONG", "semester": 1, "duration": 9, "department": "CE", "students": 10},
+        {"code": "HUGE", "semester": 1, "duration": 1, "department": "CE", "students": 500},
+    ]
+    halls = [{"hall": f"H{h}", "capacity": 100, "department": "common"} for h in range(4)]
+    inst = Instance.from_records(modules, halls).build_eligibility()
+    result = screen_timetable(inst, 3, 8)
+
+    assert checks(result) == ["duration_too_long", "group_overload", "no_eligible_hall"]
+    overload = next(v for v in result["violations"] if v["check"] == "group_overload")
+    assert (overload["department"], overload["semester"]) == ("EE", 3)
+    assert (overload["required"], overload["available"]) == (26, 24)
+    # 13 modules still fit 24 distinct start slots
+    assert "group_overload" not in checks(screen_timetable(inst, 3, 8, group_rule="distinct_starts"))
+
+
+def test_hall_tier_bound_names_the_saturated_halls():
+    # Six one-day EE lectures, each of a different semester, can only use the one EE lab
+    modules = [{**m, "semester": k} for k, m in enumerate(ee_modules(6, duration=8))]
+    halls = [{"hall": "EE-LAB", "capacity": 60, "department": "EE"},
+             {"hall": "CE-LAB", "capacity": 60, "department": "CE"}]
+    inst = Instance.from_records(modules, halls).build_eligibility()
+    (tier,) = screen_timetable(inst, 5, 8)["violations"]
+    assert tier["check"] == "hall_tier_capacity"
+    assert tier["halls"] == ["EE-LAB"] and len(tier["modules"]) == 6
+    assert (tier["required"], tier["available"]) == (48, 40)
+
+
+def test_exam_overloads_are_named():
+    modules = ee_modules(7, students=150)
+    halls = [{"hall": "LT1", "capacity": 100, "department": "common"},
+             {"hall": "LT2", "capacity": 100, "department": "common"}]
+    inst = Instance.from_records(modules, halls)
+    assert screen_exams(inst, 3, 3)["violations"] == []
+    # Every exam needs both halls, so semester 3 pinned to one slot gets one exam a day
+    assert checks(screen_exams(inst, 3, 3, {3: 0})) == ["slot_halls", "slot_seats"]
+
+    inst = Instance.from_records(ee_modules(1, students=250), halls)
+    assert checks(screen_exams(inst, 2, 3)) == ["class_exceeds_halls"]
@@ -0,0 +1,50 @@
+"""
+Tests for the solution_arrays validators on hand-made solutions.
+
+Run from solver/: python -m pytest -q test_solution_arrays.py
+"""
+
+import numpy as np
+
+from solution_arrays import SolutionArrays, check_timetable
+from synthetic_instance import make_instance
+
+DAYS, SLOTS = 5, 12
+
+
+def spread(inst):
+    """Every module at its own time, two hours long, all in hall 0."""
+    t = np.arange(inst.num_modules)
+    return SolutionArrays(t % DAYS, 2 * (t // DAYS), np.full(len(t), 2, dtype=np.int64), hall=np.zeros_like(t))
+
+
+def two_of_one_group(inst):
+    """Two modules of one (department, semester) group."""
+    return next(ids for ids in inst.department_groups(by_semester=True).values() if len(ids) > 1)[:2]
+
+
+def test_spread_timetable_is_valid():
+    inst = make_instance(30, n_halls=6, seed=5)
+    sol = spread(inst)
+    assert check_timetable(sol, inst, DAYS, SLOTS) == {
+        "hall_clashes": 0, "department_clashes": 0, "slot_overflow": 0, "ineligible_halls": 0,
+    }
+    assert check_timetable(sol, inst, DAYS, SLOTS, "distinct_starts")["department_clashes"] == 0
+
+
+def test_overlap_in_one_department_and_semester_is_reported():
+    inst = make_instance(30, n_halls=6, seed=5)
+    sol = spread(inst)
+    i, j = two_of_one_group(inst)
+    # Same day, j starting an hour into i, in another hall
+    sol.day[j] = sol.day[i]
+    sol.slot[j] = sol.slot[i] + 1
+    sol.hall[j] = 1
+    counts = check_timetable(sol, inst, DAYS, SLOTS)
+    assert counts["department_clashes"] == 1
+    # Different starts are fine under timetable_csp2's rule
+    assert check_timetable(sol, inst, DAYS, SLOTS, "distinct_starts")["department_clashes"] == 0
+
+    sol.slot[j] = sol.slot[i]
+    assert check_timetable(sol, inst, DAYS, SLOTS)["department_clashes"] == 2
+    assert check_timetable(sol, inst, DAYS, SLOTS, "distinct_starts")["department_clashes"] == 1
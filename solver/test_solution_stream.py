@@ -0,0 +1,75 @@
+"""
+Tests for solution_stream: --stream records and --output ndjson lines each
+parse on their own.
+
+Run from solver/: python -m pytest -q test_solution_stream.py
+"""
+
+import io
+import json
+
+import exam_pipeline
+import timetable_csp
+from solution_stream import write_result_ndjson
+from solver_control import SolveControl, job_scope
+from synthetic_instance import make_instance
+
+EXAM_DAYS = ["day1", "day2", "day3", "day4", "day5"]
+PARAMS = ["--params", '{"time_limit": 10, "workers": 1}']
+
+
+def lines(capsys):
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+def test_streamed_exam_solutions_are_ndjson_records(capsys):
+    inst = make_instance(30, seed=3)
+    args = exam_pipeline.parse_args(["--stream", "--objective", "count_pairs", *PARAMS])
+    result = exam_pipeline.solve(args, inst, {}, {}, EXAM_DAYS, 3)
+
+    records = lines(capsys)
+    assert records and [r["solution"] for r in records] == list(range(1, len(records) + 1))
+    assert all(r["event"] == "solution" and len(r["modules"]) == inst.num_modules for r in records)
+    assert [r["objective"] for r in records] == sorted((r["objective"] for r in records), reverse=True)
+    assert {m["code"] for m in records[-1]["modules"]} == set(inst.modules.code.tolist())
+    assert result["status"] in ("OPTIMAL", "FEASIBLE")
+
+
+def test_streamed_weekly_solutions_update_the_job_progress(capsys):
+    inst = make_instance(20, seed=2)
+    args = timetable_csp.parse_args(["--stream", *PARAMS])
+    control = SolveControl(workers=1)
+    with job_scope(control):
+        timetable_csp.solve(args, inst, {})
+
+    assert capsys.readouterr().out == ""
+    assert control.progress["event"] == "solution"
+    assert len(control.progress["modules"]) == inst.num_modules
+
+
+def test_ndjson_output_has_one_line_per_exam_and_a_trailer():
+    inst = make_instance(30, seed=3)
+    solve = exam_pipeline.solve
+    whole = solve(exam_pipeline.parse_args(["--greedy", "only"]), inst, {}, {}, EXAM_DAYS, 3)
+    lazy = solve(exam_pipeline.parse_args(["--greedy", "only", "--output", "ndjson"]), inst, {}, {}, EXAM_DAYS, 3)
+    assert not isinstance(lazy["timetable"], list)
+
+    out = io.StringIO()
+    write_result_ndjson(lazy, "timetable", out=out)
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert records[:-1] == whole["timetable"]
+    trailer = records[-1]
+    assert (trailer["event"], trailer["status"], trailer["entries"]) == ("end", "OPTIMAL", inst.num_modules)
+    assert trailer["diagnostics"]["validation"] == whole["diagnostics"]["validation"]
+
+
+def test_ndjson_header_comes_first():
+    result = {"schema": "compact", "halls": ["LT1"], "timetable": iter([{"c": 0}, {"c": 1}]), "status": "OPTIMAL"}
+    out = io.StringIO()
+    write_result_ndjson(result, "timetable", header=["schema", "halls"], out=out)
+    assert [json.loads(line) for line in out.getvalue().splitlines()] == [
+        {"event": "start", "schema": "compact", "halls": ["LT1"]},
+        {"c": 0},
+        {"c": 1},
+        {"event": "end", "status": "OPTIMAL", "entries": 2},
+    ]
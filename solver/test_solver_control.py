@@ -0,0 +1,42 @@
+"""
+Tests for solver_control: cancelling a job's solves.
+
+Run from solver/: python -m pytest -q test_solver_control.py
+"""
+
+import time
+
+from synthetic_instance import make_instance
+from exam_timetable_csp3 import build_exam_model
+from solver_control import SolveControl, job_scope, new_solver
+
+
+def small_model():
+    inst = make_instance(30, seed=3)
+    return build_exam_model(inst, ["Mon", "Tue", "Wed"], 3)[0]
+
+
+def test_cancel_before_solve_starts_is_honoured():
+    model = small_model()
+    control = SolveControl(workers=1)
+    with job_scope(control):
+        solver = new_solver(30, 1)
+    # The cancel lands between new_solver and Solve
+    control.cancel()
+    t0 = time.perf_counter()
+    solver.Solve(model)
+    assert time.perf_counter() - t0 < 10
+    assert not control.solvers
+
+
+def test_solvers_unregister_when_their_solve_returns():
+    model = small_model()
+    control = SolveControl(workers=1)
+    with job_scope(control):
+        for _ in range(2):
+            solver = new_solver(1, 1)
+            # Solving twice must not unregister twice
+            solver.Solve(model)
+            solver.Solve(model)
+    assert not control.solvers
+    assert not control.cancelled
@@ -0,0 +1,60 @@
+"""
+Tests for solver_params: specs resolve to profiles, overrides and auto sizes.
+
+Run from solver/: python -m pytest -q test_solver_params.py
+"""
+
+import argparse
+import json
+
+import pytest
+from ortools.sat.python import cp_model
+
+from solver_control import SolveControl, job_scope
+from solver_params import params_spec, read_spec, resolve_params
+from synthetic_instance import make_instance
+
+
+@pytest.fixture
+def inst():
+    return make_instance(20, seed=2)
+
+
+def test_profiles_and_overrides(inst, tmp_path, monkeypatch):
+    monkeypatch.delenv("SOLVER_PARAMS", raising=False)
+    assert resolve_params(None, inst, 5, 8).to_dict()["time_limit"] == 60
+    quick = resolve_params(read_spec("quick"), inst, 5, 8)
+    assert (quick.time_limit, quick.workers, quick.relative_gap_limit) == (5, 4, 0.05)
+
+    path = tmp_path / "params.json"
+    path.write_text(json.dumps({"profile": "quick", "random_seed": 7, "parameters": {"log_search_progress": True}}))
+    params = resolve_params(read_spec(str(path)), inst, 5, 8)
+    assert (params.profile, params.time_limit, params.random_seed) == ("quick", 5, 7)
+
+    solver = cp_model.CpSolver()
+    params.apply(solver)
+    assert solver.parameters.random_seed == 7
+    assert solver.parameters.relative_gap_limit == 0.05
+    assert solver.parameters.log_search_progress
+
+    monkeypatch.setenv("SOLVER_PARAMS", '{"time_limit": 3}')
+    assert resolve_params(None, inst, 5, 8).time_limit == 3
+
+
+def test_auto_is_sized_from_the_instance_and_the_job(inst):
+    small = resolve_params(read_spec("auto"), inst, 5, 8)
+    assert small.time_limit == 1 and small.workers <= 4
+    large = resolve_params(read_spec("auto"), make_instance(300, seed=2), 5, 8)
+    assert large.time_limit > small.time_limit
+
+    with job_scope(SolveControl(workers=2)):
+        assert resolve_params(read_spec("thorough"), inst, 5, 8).workers == 2
+
+
+@pytest.mark.parametrize("spec", [
+    "fastest", '{"profile": "fastest"}', '{"timelimit": 3}', '{"lns": "sometimes"}',
+    '{"parameters": {"no_such_field": 1}}', "[1, 2]", "missing.json",
+])
+def test_bad_specs_are_argparse_errors(spec):
+    with pytest.raises(argparse.ArgumentTypeError):
+        params_spec(spec)
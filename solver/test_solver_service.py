@@ -0,0 +1,97 @@
+"""
+Regression tests for the solver service: the job queue and request checks.
+
+Run from solver/: python -m pytest -q test_solver_service.py
+"""
+
+import threading
+
+import pytest
+
+import timetable_csp2
+from solver_control import SolveControl, job_scope
+from solver_service import JobQueue, RequestError, SolverService
+from synthetic_instance import make_instance
+
+TIMEOUT = 10
+
+
+class StubService:
+    """Stands in for SolverService: a request {"gate": Event} blocks its solve until set."""
+
+    def prepare(self, request):
+        return "exam_stub", None
+
+    def solve(self, request, prepared=None):
+        gate = request.get("gate")
+        if gate is not None:
+            assert gate.wait(TIMEOUT)
+        return {"status": "OPTIMAL"}
+
+
+def wait_all(jobs):
+    for job in jobs:
+        assert job.done.wait(TIMEOUT), f"job {job.id} still {job.status}"
+
+
+def dispatcher_alive():
+    return any(t.name == "job-dispatcher" and t.is_alive() for t in threading.enumerate())
+
+
+def test_cancelled_queued_job_is_pruned_without_killing_the_dispatcher():
+    queue = JobQueue(StubService(), cores=1, max_jobs=1, max_finished=2)
+    gate = threading.Event()
+    blocker = queue.submit({"gate": gate, "priority": 0, "workers": 1})
+    late = queue.submit({"priority": 5, "workers": 1})
+    queue.cancel(late.id)
+    assert late.status == "cancelled"
+
+    # Enough finished jobs to prune the cancelled one while the blocker runs
+    jobs = [queue.submit({"priority": 0, "workers": 1}) for _ in range(4)]
+    gate.set()
+    wait_all([blocker, *jobs])
+    assert all(job.status == "done" for job in jobs)
+    assert late.id not in queue.jobs
+    assert not queue.queue
+
+    after = queue.submit({"priority": 9, "workers": 1})
+    wait_all([after])
+    assert after.status == "done"
+    assert dispatcher_alive()
+
+
+def test_dispatch_skips_a_bad_entry():
+    queue = JobQueue(StubService(), cores=1, max_jobs=1, max_finished=2)
+    gate = threading.Event()
+    blocker = queue.submit({"gate": gate, "workers": 1})
+    victim = queue.submit({"workers": 1})
+    # A job without its control object makes the fit check raise
+    with queue.cond:
+        victim.control = None
+    gate.set()
+    wait_all([blocker, victim])
+    assert victim.status == "failed"
+    assert victim.error.startswith("dispatch failed")
+
+    after = queue.submit({"workers": 1})
+    wait_all([after])
+    assert after.status == "done"
+
+
+def test_unreadable_file_option_is_a_request_error(tmp_path):
+    service = SolverService(solvers=("exam_timetable_csp",))
+    missing = tmp_path / "prev.json"
+    with pytest.raises(RequestError, match="warm_start"):
+        service.prepare({"solver": "exam_timetable_csp", "options": {"warm_start": str(missing)}})
+
+    missing.write_text("{}")
+    solver, args = service.prepare({"solver": "exam_timetable_csp", "options": {"warm_start": str(missing)}})
+    assert args.warm_start == str(missing)
+
+
+def test_timetable_csp2_prints_nothing_under_a_job(capsys):
+    args = timetable_csp2.parse_args(["--params", '{"time_limit": 5, "workers": 1}'])
+    with job_scope(SolveControl(workers=1)):
+        result = timetable_csp2.solve(args, make_instance(20, seed=2), {})
+    assert result["status"] != "NO_SOLUTION"
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,54 @@
+"""
+Tests for symmetry: breaking symmetry keeps the optimum and orders each class.
+
+Run from solver/: python -m pytest -q test_symmetry.py
+"""
+
+from ortools.sat.python import cp_model
+
+import timetable_csp
+from exam_timetable_csp3 import build_exam_model
+from solution_arrays import SolutionArrays, check_exams
+from symmetry import symmetry_diagnostics
+from synthetic_instance import make_instance
+
+DAYS = ["day1", "day2", "day3"]
+SLOTS = 3
+
+
+def solve(model):
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = 20
+    solver.parameters.num_search_workers = 1
+    return solver, solver.Solve(model)
+
+
+def test_exam_optimum_is_kept_and_classes_are_ordered():
+    # Two of its halls share a capacity and department
+    inst = make_instance(40, seed=2)
+    assert inst.interchangeable_modules() and inst.interchangeable_halls()
+    objectives = []
+    for symmetry in (False, True):
+        model, module_vars, presence, _ = build_exam_model(inst, DAYS, SLOTS, objective="count", symmetry=symmetry)
+        solver, status = solve(model)
+        assert status == cp_model.OPTIMAL
+        objectives.append(solver.ObjectiveValue())
+    assert objectives[0] == objectives[1]
+
+    sol = SolutionArrays.from_exam(solver, module_vars, presence, inst.num_halls)
+    assert check_exams(sol, inst, len(DAYS), SLOTS) == {"hall_clashes": 0, "unseated_modules": 0, "under_capacity": 0}
+    position = sol.day * SLOTS + sol.slot
+    for ids in inst.interchangeable_modules():
+        assert list(position[ids]) == sorted(position[ids])
+    load = sol.halls.sum(axis=0)
+    for ids in inst.interchangeable_halls():
+        assert list(load[ids]) == sorted(load[ids], reverse=True)
+
+
+def test_weekly_model_with_symmetry_is_solved():
+    inst = make_instance(20, seed=2).build_eligibility()
+    model = timetable_csp.build_model(inst, ["Mon", "Tue", "Wed", "Thu", "Fri"], 8, symmetry=True)[0]
+    assert solve(model)[1] in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+    diagnostics = symmetry_diagnostics(inst, True)
+    assert diagnostics["enabled"]
+    assert diagnostics["modules"] == sum(len(ids) for ids in inst.interchangeable_modules()) > 0
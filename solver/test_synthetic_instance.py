@@ -0,0 +1,31 @@
+"""
+Tests for synthetic_instance: instances are seeded, sized as asked and
+give every module an eligible hall.
+
+Run from solver/: python -m pytest -q test_synthetic_instance.py
+"""
+
+import pytest
+
+from synthetic_instance import make_instance
+
+
+def test_same_seed_same_instance():
+    a, b, c = make_instance(60, seed=7), make_instance(60, seed=7), make_instance(60, seed=8)
+    assert a.modules.to_records() == b.modules.to_records()
+    assert a.halls.to_records() == b.halls.to_records()
+    assert a.modules.to_records() != c.modules.to_records()
+
+
+@pytest.mark.parametrize("n_modules, n_halls, expected_halls", [(10, None, 4), (100, None, 23), (200, 30, 30)])
+def test_sizes(n_modules, n_halls, expected_halls):
+    inst = make_instance(n_modules, n_halls, seed=1)
+    assert inst.num_modules == n_modules
+    assert inst.num_halls == expected_halls
+    assert len(inst.department_groups()) == max(1, round(n_modules / 20))
+
+
+def test_every_module_has_an_eligible_hall():
+    inst = make_instance(300, seed=2).build_eligibility()
+    assert inst.eligible.any(axis=1).all()
+    assert set(inst.modules.duration.tolist()) <= {1, 2, 3, 4}
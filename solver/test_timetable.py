@@ -0,0 +1,96 @@
+"""
+Tests for the weekly timetable models (timetable_csp, timetable_csp2) on
+synthetic instances.
+
+Run from solver/: python -m pytest -q test_timetable.py
+"""
+
+import pytest
+from ortools.sat.python import cp_model
+
+import timetable_csp
+import timetable_csp2
+from data_loader import Instance
+from solution_arrays import SolutionArrays, check_timetable
+from synthetic_instance import make_instance
+
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri"]
+SLOTS = 8
+VALID = {"hall_clashes": 0, "department_clashes": 0, "slot_overflow": 0, "ineligible_halls": 0}
+
+
+def solve_built(model, module_vars):
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = 10
+    solver.parameters.num_search_workers = 1
+    assert solver.Solve(model) in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+    return SolutionArrays.from_timetable(solver, module_vars)
+
+
+def test_presence_vars_exist_only_for_eligible_halls():
+    inst = make_instance(20, seed=2)
+    timetable_csp.build_eligibility(inst)
+    assert not inst.eligible.all()
+    model, module_vars, presence, _ = timetable_csp.build_model(inst, DAYS, SLOTS)
+
+    assert all(inst.eligible[i, h] for i, _, h in presence)
+    assert len(presence) == timetable_csp.eligibility_diagnostics(inst, DAYS)["presence_vars_created"]
+    assert check_timetable(solve_built(model, module_vars), inst, len(DAYS), SLOTS) == VALID
+
+
+def test_timetable_csp2_presence_vars_exist_only_for_eligible_halls():
+    inst = make_instance(20, seed=2)
+    timetable_csp2.build_eligibility(inst)
+    model, module_vars, presence, _ = timetable_csp2.build_model(inst, DAYS, SLOTS)
+
+    assert all(inst.eligible[i, h] for i, _, h in presence)
+    assert len(presence) == timetable_csp2.eligibility_diagnostics(inst, DAYS)["presence_vars_created"]
+    sol = solve_built(model, module_vars)
+    assert check_timetable(sol, inst, len(DAYS), SLOTS, "distinct_starts") == VALID
+
+
+def test_flat_model_keeps_every_lecture_inside_its_day():
+    inst = make_instance(20, seed=2)
+    timetable_csp.build_eligibility(inst)
+    model, module_vars, presence, _ = timetable_csp.build_flat_model(inst, DAYS, SLOTS)
+
+    assert len(presence) == int(inst.eligible.sum())
+    sol = solve_built(model, module_vars)
+    # slot_overflow == 0: no lecture runs past the end of its day
+    assert check_timetable(sol, inst, len(DAYS), SLOTS) == VALID
+
+
+def test_flat_and_daily_solves_validate_clean():
+    for model in ("daily", "flat"):
+        args = timetable_csp.parse_args(["--model", model, "--params", '{"time_limit": 10, "workers": 1}'])
+        result, status, _, _ = timetable_csp.solve(args, make_instance(20, seed=2), {}, days=DAYS)
+        assert status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+        assert result["diagnostics"]["model_mode"] == model
+        assert result["diagnostics"]["validation"] == VALID
+
+
+def one_group(n):
+    """n two-hour modules of one department and semester, four common halls."""
+    modules = [
+        {"code": f"EE{i:02d}", "semester": 3, "duration": 2, "iscommon": False, "department": "EE", "students": 50}
+        for i in range(n)
+    ]
+    halls = [{"hall": f"H{h}", "capacity": 100, "department": "common"} for h in range(4)]
+    return Instance.from_records(modules, halls)
+
+
+@pytest.mark.parametrize("dept_rule", ["grouped", "pairwise"])
+def test_department_rules_agree_on_a_full_group(dept_rule):
+    # 12 x 2 hours fill three 8-hour days exactly
+    inst = one_group(12)
+    model, module_vars, _, _ = timetable_csp.build_model(inst, DAYS[:3], SLOTS, dept_rule=dept_rule)
+    assert check_timetable(solve_built(model, module_vars), inst, 3, SLOTS) == VALID
+
+
+def test_grouped_department_rule_proves_an_overfull_group_infeasible():
+    # The pairwise rule does not prove this within seconds
+    model = timetable_csp.build_model(one_group(13), DAYS[:3], SLOTS, dept_rule="grouped")[0]
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = 10
+    solver.parameters.num_search_workers = 1
+    assert solver.Solve(model) == cp_model.INFEASIBLE
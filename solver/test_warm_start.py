@@ -0,0 +1,73 @@
+"""
+Tests for warm_start: a written timetable maps back onto ids and hints a
+complete, feasible assignment.
+
+Run from solver/: python -m pytest -q test_warm_start.py
+"""
+
+import json
+
+from ortools.sat.python import cp_model
+
+from exam_timetable_csp3 import build_exam_model
+from exam_two_stage import assignment_to_exam_json
+from greedy import greedy_exams
+from solution_arrays import SolutionArrays
+from synthetic_instance import make_instance
+from warm_start import add_exam_hints, previous_assignment, read_previous, slot_hint
+
+DAYS = ["day1", "day2", "day3", "day4", "day5"]
+SLOTS = 3
+
+
+def written_timetable(tmp_path, inst):
+    assignment, unplaced = greedy_exams(inst, len(DAYS), SLOTS)
+    assert not unplaced
+    path = tmp_path / "previous.json"
+    path.write_text(json.dumps(assignment_to_exam_json(True, assignment, inst, DAYS)))
+    return assignment, path
+
+
+def test_previous_exam_timetable_maps_back_onto_ids(tmp_path):
+    inst = make_instance(30, seed=6)
+    assignment, path = written_timetable(tmp_path, inst)
+
+    previous, stats = previous_assignment(read_previous(path), inst, DAYS)
+    assert stats == {"previous_modules": 30, "matched_modules": 30}
+    assert previous == {i: (d, s, sorted(halls)) for i, (d, s, halls) in assignment.items()}
+
+    hint, hint_info = slot_hint((previous, stats), SLOTS)
+    assert sorted(hint) == sorted((i, d, s) for i, (d, s, _) in assignment.items())
+    assert hint_info["hints_kept"] == 30 and hint_info["hints_dropped"] == 0
+
+
+def test_exam_hints_are_a_feasible_assignment(tmp_path):
+    inst = make_instance(30, seed=6)
+    assignment, path = written_timetable(tmp_path, inst)
+    previous = previous_assignment(read_previous(path), inst, DAYS)
+
+    model, module_vars, presence, dp = build_exam_model(inst, DAYS, SLOTS, objective="count_pairs")
+    stats = add_exam_hints(model, module_vars, presence, dp, previous, SLOTS)
+    assert stats["hints_kept"] == 30 and stats["hints_partial"] == 0
+
+    solver = cp_model.CpSolver()
+    solver.parameters.num_search_workers = 1
+    solver.parameters.max_time_in_seconds = 10
+    solver.parameters.fix_variables_to_their_hinted_value = True
+    assert solver.Solve(model) in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+    sol = SolutionArrays.from_exam(solver, module_vars, presence, inst.num_halls)
+    for i, (d, s, halls) in assignment.items():
+        assert (sol.day[i], sol.slot[i], sol.hall_lists()[i]) == (d, s, sorted(halls))
+
+
+def test_removed_modules_and_halls_are_dropped(tmp_path):
+    inst = make_instance(30, seed=6)
+    _, path = written_timetable(tmp_path, inst)
+    rows = read_previous(path)
+    rows[0]["code"] = "GONE"
+    rows[1]["day"] = "day9"
+
+    previous, stats = previous_assignment(rows, inst, DAYS)
+    assert stats == {"previous_modules": 30, "matched_modules": 28}
+    model, module_vars, presence, dp = build_exam_model(inst, DAYS, SLOTS, objective="count_pairs")
+    assert add_exam_hints(model, module_vars, presence, dp, (previous, stats), SLOTS)["hints_dropped"] == 2
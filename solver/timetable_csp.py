@@ -8,164 +8,261 @@ Timetable solver with SOFT department overlap penalty.
 - Each module scheduled exactly once (hard)
 - Prefers to avoid overlaps between modules of the same department across halls (soft)
   by minimizing the number of same-department overlaps.
+- `--model flat` builds the same rules on a single week-long time axis
+  (one interval per module x eligible hall, one no-overlap per hall).
+- `--warm-start FILE` hints the solver with a previous timetable (see warm_start.py).
+- `--repair FILE [--changes FILE]` repairs a previous timetable, moving as few
+  modules as possible (see repair.py).
+- Screens the instance before building a model and returns INFEASIBLE with
+  the reasons when a necessary condition fails (see screening.py).
+- `--profile-build` adds per-block build times and model sizes, plus the
+  solver's response stats, to diagnostics (see build_profile.py).
+- `--symmetry` orders interchangeable modules and halls to break symmetry
+  (see symmetry.py).
+- `--explain` guards the capacity, department-hall and department-overlap
+  rules with assumption literals and, when the model is infeasible, reports
+  a minimal conflicting set of them (see infeasibility.py).
+- `--greedy fallback|hint|only` answers with a first-fit-decreasing
+  timetable when CP-SAT finds none, hints CP-SAT with it, or skips CP-SAT
+  (see greedy.py).
 """
 
-import pandas as pd
+import argparse
+
 from ortools.sat.python import cp_model
 
+from build_profile import NO_PROFILE, BuildProfile, profile_diagnostics
+from compact_timetable import department_table
+from data_loader import load_instance
+from greedy import GreedyRun, greedy_timetable
+from infeasibility import Explainer, explain_params, guard_hall_rules, relaxed_instance
+from screening import screen_timetable
+from solution_arrays import SolutionArrays, check_timetable
+from solution_stream import streamer, timetable_decoder, write_ndjson, write_result_ndjson
+from solver_control import new_solver
+from solver_params import SolverParams, params_spec, resolve_params
+from symmetry import add_symmetry_breaking, symmetry_diagnostics
+from warm_start import add_timetable_hints, previous_assignment, read_previous
+
 
 # ----------------------------
 # 1. LOAD DATA
 # ----------------------------
-def load_data():
-    file_path = "../data/planner_agent_data_nushan.xlsx"
-    modules_df = pd.read_excel(file_path, sheet_name="module codes")
-    halls_df = pd.read_excel(file_path, sheet_name="halls")
-
-    modules_df = modules_df.dropna(subset=["semester", "duration", "module_code", "no_of_students"])
-    modules_df["semester"] = modules_df["semester"].astype(int)
-    modules_df["duration"] = modules_df["duration"].astype(int)
-    modules_df["iscommon"] = modules_df.get("iscommon", False).fillna(False).astype(bool)
-    modules_df["no_of_students"] = modules_df["no_of_students"].astype(int)
-
-    modules = []
-    for _, row in modules_df.iterrows():
-        modules.append({
-            "code": row["module_code"],
-            "semester": int(row["semester"]),
-            "duration": int(row["duration"]),
-            "iscommon": bool(row["iscommon"]),
-            "department": row.get("department", None),
-            "students": int(row["no_of_students"])
-        })
-
-    halls = []
-    for _, row in halls_df.iterrows():
-        halls.append({
-            "hall": row["room_name"],
-            "capacity": int(row["capacity"]),
-            "department": row.get("department", None)
-        })
-
-    return modules, halls
+DATA_FILE = "../data/planner_agent_data_nushan.xlsx"
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+SLOTS_PER_DAY = 8
+
+
+def load_data(file_path=DATA_FILE, diagnostics=None):
+    # Column-wise parsing + content-hashed cache live in data_loader.py;
+    # diagnostics, if given, records whether this load was a cache hit.
+    return load_instance(file_path, "halls", required=("semester", "duration"), diagnostics=diagnostics)
+
+
+# ----------------------------
+# 2. HALL ELIGIBILITY
+# ----------------------------
+def build_eligibility(inst, restrict_department=True):
+    """Fill inst.eligible / eligible_halls / hall_modules (see data_loader.Instance).
+
+    A hall is eligible when it can seat the whole class and, if
+    restrict_department is set, it is either a "common" hall or belongs to
+    the module's department.
+    """
+    return inst.build_eligibility(restrict_department)
+
+
+def eligibility_diagnostics(inst, days, per_day=True):
+    # The dense baseline is always one presence literal per module x day x hall;
+    # the flat model only needs one per eligible (module, hall).
+    total = inst.num_modules * inst.num_halls * len(days)
+    created = int(inst.eligible.sum()) * (len(days) if per_day else 1)
+    return {
+        "presence_vars_dense": total,
+        "presence_vars_created": created,
+        "presence_vars_pruned": total - created,
+        "modules_without_eligible_hall": inst.modules.code[~inst.eligible.any(axis=1)].tolist(),
+    }
+
+
+def week_start_domain(dur, num_days, slots_per_day):
+    """Starts t = day*slots_per_day + slot that keep a lecture inside its day."""
+    return cp_model.Domain.FromIntervals(
+        [[d * slots_per_day, d * slots_per_day + slots_per_day - dur] for d in range(num_days)]
+    )
 
 
 # ----------------------------
-# 2. BUILD MODEL
+# 3. BUILD MODEL
 # ----------------------------
-def build_model(modules, halls, days, slots_per_day):
+def build_model(inst, days, slots_per_day, dept_rule="grouped", profile=None, explain=None, symmetry=False):
+    """Daily model over module ids.
+
+    module_vars[i] holds the vars of module i, presence_vars is keyed by
+    (i, day_idx, hall_idx) and day_presence by (i, day_idx). profile, a
+    build_profile.BuildProfile, times each block (--profile-build); explain,
+    an infeasibility.Explainer, guards the hall and department rules with
+    assumption literals (--explain); symmetry orders interchangeable modules
+    and halls (--symmetry, see symmetry.py).
+    """
     model = cp_model.CpModel()
+    profile = profile or NO_PROFILE
+
+    if inst.eligible is None:
+        build_eligibility(inst)
+    if explain is not None:
+        # Every hall gets a presence literal; guard_hall_rules restricts them
+        inst = relaxed_instance(inst)
 
-    module_vars = {}         # code -> vars dict
-    presence_vars = {}       # (code, day_idx, hall_idx) -> Bool
+    num_halls = inst.num_halls
+    durations = inst.modules.duration.tolist()
+    module_vars = []         # module id -> vars dict
+    presence_vars = {}       # (i, day_idx, hall_idx) -> Bool, eligible halls only
 
     # --- Module variables
-    for m in modules:
-        code = m["code"]
-        dur = m["duration"]
-        day_var = model.NewIntVar(0, len(days) - 1, f"day_{code}")
-        hall_var = model.NewIntVar(0, len(halls) - 1, f"hall_{code}")
-        slot_var = model.NewIntVar(0, slots_per_day - dur, f"slot_{code}")
-        end_var = model.NewIntVar(0, slots_per_day, f"end_{code}")
-        model.Add(end_var == slot_var + dur)
-
-        module_vars[code] = {
-            "day": day_var,
-            "hall": hall_var,
-            "slot": slot_var,
-            "end": end_var,
-            "dur": dur
-        }
+    with profile.block(model, "variables"):
+        for i, dur in enumerate(durations):
+            # Hall capacity and department-based hall restriction (hard) are
+            # enforced through the hall domain: ineligible halls never get a var.
+            allowed = inst.eligible_halls[i]
+            hall_domain = cp_model.Domain.FromValues(allowed) if allowed else cp_model.Domain(0, num_halls - 1)
+            day_var = model.NewIntVar(0, len(days) - 1, f"day_m{i}")
+            hall_var = model.NewIntVarFromDomain(hall_domain, f"hall_m{i}")
+            slot_var = model.NewIntVar(0, slots_per_day - dur, f"slot_m{i}")
+            end_var = model.NewIntVar(0, slots_per_day, f"end_m{i}")
+            model.Add(end_var == slot_var + dur)
+            # Position on the flattened week, used by the department timeline
+            start_var = model.NewIntVarFromDomain(week_start_domain(dur, len(days), slots_per_day), f"start_m{i}")
+            week_end_var = model.NewIntVar(0, len(days) * slots_per_day, f"wend_m{i}")
+            model.Add(start_var == day_var * slots_per_day + slot_var)
+            model.Add(week_end_var == start_var + dur)
+
+            module_vars.append({
+                "start": start_var,
+                "week_end": week_end_var,
+                "day": day_var,
+                "hall": hall_var,
+                "slot": slot_var,
+                "end": end_var,
+                "dur": dur
+            })
 
     # --- Presence variables & hall-level optional intervals (hard no-overlap)
-    for d_idx in range(len(days)):
-        for h_idx in range(len(halls)):
-            intervals = []
-            for m in modules:
-                code = m["code"]
-                dur = m["duration"]
-                pres = model.NewBoolVar(f"pres_{code}_d{d_idx}_h{h_idx}")
-                presence_vars[(code, d_idx, h_idx)] = pres
-
-                # Link presence to module's day/hall
-                model.Add(module_vars[code]["day"] == d_idx).OnlyEnforceIf(pres)
-                model.Add(module_vars[code]["hall"] == h_idx).OnlyEnforceIf(pres)
-
-                interval = model.NewOptionalIntervalVar(
-                    module_vars[code]["slot"], dur, module_vars[code]["end"], pres,
-                    f"int_{code}_d{d_idx}_h{h_idx}"
-                )
-                intervals.append(interval)
+    with profile.block(model, "presence_intervals"):
+        for d_idx in range(len(days)):
+            for h_idx in range(num_halls):
+                intervals = []
+                for i in inst.hall_modules[h_idx]:
+                    mv = module_vars[i]
+                    pres = model.NewBoolVar(f"pres_m{i}_d{d_idx}_h{h_idx}")
+                    presence_vars[(i, d_idx, h_idx)] = pres
 
-            if intervals:
-                model.AddNoOverlap(intervals)
+                    # Link presence to module's day/hall
+                    model.Add(mv["day"] == d_idx).OnlyEnforceIf(pres)
+                    model.Add(mv["hall"] == h_idx).OnlyEnforceIf(pres)
 
-    # --- Exactly one presence per module (hard)
-    for m in modules:
-        code = m["code"]
-        pres_list = [presence_vars[(code, d, h)] for d in range(len(days)) for h in range(len(halls))]
-        model.AddExactlyOne(pres_list)
-
-    # --- Hall capacity (hard)
-    for m in modules:
-        code = m["code"]
-        for h_idx, hall in enumerate(halls):
-            if hall["capacity"] < m["students"]:
-                for d in range(len(days)):
-                    model.Add(presence_vars[(code, d, h_idx)] == 0)
-            
-                    # --- Department-based hall restriction (hard)
-            hall_dept = str(hall.get("department", "")).strip().lower()
-            module_dept = str(m.get("department", "")).strip().lower()
-
-        # If hall is NOT common and departments don't match → disallow
-            if hall_dept != "common" and hall_dept != module_dept:
-                for d in range(len(days)):
-                    model.Add(presence_vars[(code, d, h_idx)] == 0)
+                    interval = model.NewOptionalIntervalVar(
+                        mv["slot"], mv["dur"], mv["end"], pres,
+                        f"int_m{i}_d{d_idx}_h{h_idx}"
+                    )
+                    intervals.append(interval)
+
+                if intervals:
+                    model.AddNoOverlap(intervals)
+
+    if explain is not None:
+        guard_hall_rules(model, inst, presence_vars, explain)
 
+    # --- Exactly one presence per module (hard)
+    # A module without any eligible hall gets an empty list, i.e. infeasible.
+    with profile.block(model, "exactly_one"):
+        for i, allowed in enumerate(inst.eligible_halls):
+            pres_list = [presence_vars[(i, d, h)] for d in range(len(days)) for h in allowed]
+            model.AddExactlyOne(pres_list)
 
     # --- Day-presence variable for each module+day
-    day_presence = {}  # (code, day_idx) -> Bool
-    for m in modules:
-        code = m["code"]
-        for d_idx in range(len(days)):
-            dp = model.NewBoolVar(f"daypres_{code}_d{d_idx}")
-            pres_list = [presence_vars[(code, d_idx, h)] for h in range(len(halls))]
-            model.AddBoolOr(pres_list).OnlyEnforceIf(dp)
-            model.AddBoolAnd([p.Not() for p in pres_list]).OnlyEnforceIf(dp.Not())
-            day_presence[(code, d_idx)] = dp
-
-    # --- SAME-DEPARTMENT NO-SLOT-CONFLICT constraint (hard)
-    dept_map = {}
-    for m in modules:
-        dept = m.get("department")
-        if not dept:
+    day_presence = {}  # (i, day_idx) -> Bool
+    with profile.block(model, "day_presence"):
+        for i, allowed in enumerate(inst.eligible_halls):
+            for d_idx in range(len(days)):
+                dp = model.NewBoolVar(f"daypres_m{i}_d{d_idx}")
+                pres_list = [presence_vars[(i, d_idx, h)] for h in allowed]
+                model.AddBoolOr(pres_list).OnlyEnforceIf(dp)
+                model.AddBoolAnd([p.Not() for p in pres_list]).OnlyEnforceIf(dp.Not())
+                day_presence[(i, d_idx)] = dp
+
+    with profile.block(model, "department_rule"):
+        enforce = explain.literal(model, "department_overlap") if explain is not None else None
+        add_department_semester_rule(model, inst, module_vars, day_presence, days, dept_rule, enforce)
+
+    if symmetry:
+        with profile.block(model, "symmetry"):
+            add_symmetry_breaking(
+                model, inst, [mv["start"] for mv in module_vars], presence_vars, inst.modules.duration.tolist()
+            )
+
+    return model, module_vars, presence_vars, day_presence
+
+
+def add_department_semester_rule(model, inst, module_vars, day_presence, days, dept_rule="grouped", enforce=None):
+    """enforce, if given, is a literal the rule only holds under."""
+    if dept_rule == "pairwise":
+        add_department_semester_pairwise(model, inst, module_vars, day_presence, days, enforce)
+    elif dept_rule == "grouped":
+        add_department_semester_nooverlap(model, inst, module_vars, enforce)
+    else:
+        raise ValueError(f"Unknown dept_rule: {dept_rule}")
+
+
+def add_department_semester_nooverlap(model, inst, module_vars, enforce=None):
+    """SAME-DEPARTMENT + SAME-SEMESTER NO-TIME-OVERLAP (hard), grouped.
+
+    Every module gets a "department timeline" interval on the flattened week
+    and each (department, semester) group gets one AddNoOverlap. Lectures
+    never cross a day boundary, so this is equivalent to the pairwise
+    same-day ordering rule while growing linearly with the group size.
+    With enforce the intervals are optional on that literal.
+    """
+    for ids in inst.department_groups(by_semester=True).values():
+        if len(ids) < 2:
             continue
-        dept_map.setdefault(dept, []).append(m)
-
-        # --- SAME-DEPARTMENT + SAME-SEMESTER NO-SLOT-CONFLICT (hard)
-        # --- SAME-DEPARTMENT + SAME-SEMESTER NO-TIME-OVERLAP (hard)
-        # --- SAME-DEPARTMENT + SAME-SEMESTER NO-TIME-OVERLAP (hard)
-    for dept, mod_list in dept_map.items():
-        n = len(mod_list)
-        for i in range(n):
-            for j in range(i + 1, n):
-                mi = mod_list[i]
-                mj = mod_list[j]
+        intervals = []
+        for i in ids:
+            mv = module_vars[i]
+            if enforce is None:
+                intervals.append(model.NewIntervalVar(
+                    mv["start"], mv["dur"], mv["week_end"], f"dept_int_m{i}"
+                ))
+            else:
+                intervals.append(model.NewOptionalIntervalVar(
+                    mv["start"], mv["dur"], mv["week_end"], enforce, f"dept_int_m{i}"
+                ))
+        model.AddNoOverlap(intervals)
+
+
+def add_department_semester_pairwise(model, inst, module_vars, day_presence, days, enforce=None):
+    # Original O(n^2 * days) formulation, kept for benchmarking against the
+    # grouped no-overlap (see bench_department_rule.py).
+    semesters = inst.modules.semester
+
+    # --- SAME-DEPARTMENT + SAME-SEMESTER NO-TIME-OVERLAP (hard)
+    for dept, ids in inst.department_groups().items():
+        n = len(ids)
+        for a in range(n):
+            for b in range(a + 1, n):
+                ci = ids[a]
+                cj = ids[b]
 
                 # Apply restriction only if same semester
-                if mi["semester"] != mj["semester"]:
+                if semesters[ci] != semesters[cj]:
                     continue
 
-                ci = mi["code"]
-                cj = mj["code"]
-
                 for d_idx in range(len(days)):
                     both_on_same_day = [day_presence[(ci, d_idx)], day_presence[(cj, d_idx)]]
 
                     # Boolean vars to represent ordering
-                    ci_before_cj = model.NewBoolVar(f"{ci}_before_{cj}_d{d_idx}")
-                    cj_before_ci = model.NewBoolVar(f"{cj}_before_{ci}_d{d_idx}")
+                    ci_before_cj = model.NewBoolVar(f"m{ci}_before_m{cj}_d{d_idx}")
+                    cj_before_ci = model.NewBoolVar(f"m{cj}_before_m{ci}_d{d_idx}")
 
                     # If ci_before_cj → ci.end <= cj.slot
                     model.Add(module_vars[ci]["end"] <= module_vars[cj]["slot"]).OnlyEnforceIf(ci_before_cj)
@@ -173,10 +270,116 @@ def build_model(modules, halls, days, slots_per_day):
                     model.Add(module_vars[cj]["end"] <= module_vars[ci]["slot"]).OnlyEnforceIf(cj_before_ci)
 
                     # Ensure at least one of these two orderings holds when both are on the same day
+                    if enforce is not None:
+                        both_on_same_day.append(enforce)
                     model.AddBoolOr([ci_before_cj, cj_before_ci]).OnlyEnforceIf(both_on_same_day)
 
 
+# ----------------------------
+# 3b. BUILD MODEL (flattened time axis)
+# ----------------------------
+def build_flat_model(inst, days, slots_per_day, dept_rule="grouped", profile=None, explain=None,
+                     symmetry=False):
+    """Same rules as build_model, but on one global time axis.
+
+    Each module gets a single start t = day*slots_per_day + slot whose domain
+    skips every start that would cross a day boundary, and one optional
+    interval per eligible hall, so each hall needs a single AddNoOverlap for
+    the whole week. module_vars keeps "day"/"slot"/"hall"/"end" with the same
+    meaning as build_model, so the printing/JSON helpers work unchanged.
+    presence_vars is keyed by (i, hall_idx).
+    """
+    model = cp_model.CpModel()
+    profile = profile or NO_PROFILE
+
+    if inst.eligible is None:
+        build_eligibility(inst)
+    if explain is not None:
+        # Every hall gets a presence literal; guard_hall_rules restricts them
+        inst = relaxed_instance(inst)
+
+    num_days = len(days)
+    num_halls = inst.num_halls
+    module_vars = []         # module id -> vars dict
+    presence_vars = {}       # (i, hall_idx) -> Bool, eligible halls only
+
+    # --- Module variables
+    with profile.block(model, "variables"):
+        for i, dur in enumerate(inst.modules.duration.tolist()):
+            allowed = inst.eligible_halls[i]
+            hall_domain = cp_model.Domain.FromValues(allowed) if allowed else cp_model.Domain(0, num_halls - 1)
+            # Forbidden-domain rule: a lecture may only start where it still
+            # ends on the same day.
+            start_var = model.NewIntVarFromDomain(week_start_domain(dur, num_days, slots_per_day), f"start_m{i}")
+            week_end_var = model.NewIntVar(0, num_days * slots_per_day, f"wend_m{i}")
+            day_var = model.NewIntVar(0, num_days - 1, f"day_m{i}")
+            hall_var = model.NewIntVarFromDomain(hall_domain, f"hall_m{i}")
+            slot_var = model.NewIntVar(0, slots_per_day - dur, f"slot_m{i}")
+            end_var = model.NewIntVar(0, slots_per_day, f"end_m{i}")
+            model.Add(week_end_var == start_var + dur)
+            model.AddDivisionEquality(day_var, start_var, slots_per_day)
+            model.Add(slot_var == start_var - day_var * slots_per_day)
+            model.Add(end_var == slot_var + dur)
+
+            module_vars.append({
+                "start": start_var,
+                "week_end": week_end_var,
+                "day": day_var,
+                "hall": hall_var,
+                "slot": slot_var,
+                "end": end_var,
+                "dur": dur
+            })
+
+    # --- Presence variables & one optional interval per (module, eligible hall)
+    hall_intervals = [[] for _ in range(num_halls)]
+    for i, mv in enumerate(module_vars):
+        pres_list = []
+        with profile.block(model, "presence_intervals"):
+            for h_idx in inst.eligible_halls[i]:
+                pres = model.NewBoolVar(f"pres_m{i}_h{h_idx}")
+                presence_vars[(i, h_idx)] = pres
+                model.Add(mv["hall"] == h_idx).OnlyEnforceIf(pres)
+                hall_intervals[h_idx].append(model.NewOptionalIntervalVar(
+                    mv["start"], mv["dur"], mv["week_end"], pres, f"int_m{i}_h{h_idx}"
+                ))
+                pres_list.append(pres)
+
+        # --- Exactly one hall per module (hard)
+        with profile.block(model, "exactly_one"):
+            model.AddExactlyOne(pres_list)
+
+    if explain is not None:
+        guard_hall_rules(model, inst, presence_vars, explain)
+
+    # --- No overlap in a hall over the whole week (hard)
+    with profile.block(model, "hall_no_overlap"):
+        for intervals in hall_intervals:
+            if intervals:
+                model.AddNoOverlap(intervals)
 
+    # --- Day-presence variable for each module+day
+    day_presence = {}  # (i, day_idx) -> Bool
+    with profile.block(model, "day_presence"):
+        for i, mv in enumerate(module_vars):
+            dps = []
+            for d_idx in range(num_days):
+                dp = model.NewBoolVar(f"daypres_m{i}_d{d_idx}")
+                model.Add(mv["day"] == d_idx).OnlyEnforceIf(dp)
+                model.Add(mv["day"] != d_idx).OnlyEnforceIf(dp.Not())
+                day_presence[(i, d_idx)] = dp
+                dps.append(dp)
+            model.AddExactlyOne(dps)
+
+    with profile.block(model, "department_rule"):
+        enforce = explain.literal(model, "department_overlap") if explain is not None else None
+        add_department_semester_rule(model, inst, module_vars, day_presence, days, dept_rule, enforce)
+
+    if symmetry:
+        with profile.block(model, "symmetry"):
+            add_symmetry_breaking(
+                model, inst, [mv["start"] for mv in module_vars], presence_vars, inst.modules.duration.tolist()
+            )
 
     return model, module_vars, presence_vars, day_presence
 
@@ -184,64 +387,56 @@ def build_model(modules, halls, days, slots_per_day):
 # ----------------------------
 # Diagnostics & printing
 # ----------------------------
-def print_diagnostics(modules, halls, days, slots_per_day):
-    total_req = sum(m["duration"] for m in modules)
-    total_avail = len(days) * len(halls) * slots_per_day
+def print_diagnostics(inst, days, slots_per_day):
+    total_req = int(inst.modules.duration.sum())
+    total_avail = len(days) * inst.num_halls * slots_per_day
     print("\n[DIAGNOSTICS]")
     print(f"  Total required slot-hours: {total_req}")
     print(f"  Total available slot-hours: {total_avail}")
-    print(f"  Largest hall capacity: {max(h['capacity'] for h in halls)}")
-    print(f"  Largest class size: {max(m['students'] for m in modules)}")
-    print(f"  Max module duration: {max(m['duration'] for m in modules)}")
-    print(f"  Min module duration: {min(m['duration'] for m in modules)}")
+    print(f"  Largest hall capacity: {inst.halls.capacity.max()}")
+    print(f"  Largest class size: {inst.modules.students.max()}")
+    print(f"  Max module duration: {inst.modules.duration.max()}")
+    print(f"  Min module duration: {inst.modules.duration.min()}")
 
 
-def print_timetable_grid(solver, module_vars, modules, halls, days, slots_per_day):
+def print_timetable_grid(solver, module_vars, inst, days, slots_per_day):
+    hall_names = inst.halls.name.tolist()
+    codes = inst.modules.code.tolist()
     print("\nTIMETABLE GRID (Day x Slot x Hall):")
-    print("-" * (20 * (len(halls) + 1)))
+    print("-" * (20 * (len(hall_names) + 1)))
     print(f"{'Slot/Day':<20}", end="")
-    for h in halls:
-        print(f"{h['hall']:<20}", end="")
+    for name in hall_names:
+        print(f"{name:<20}", end="")
     print()
-    print("-" * (20 * (len(halls) + 1)))
+    print("-" * (20 * (len(hall_names) + 1)))
 
+    grid = SolutionArrays.from_timetable(solver, module_vars).occupancy(len(days), slots_per_day, len(hall_names))
     for d_idx, dname in enumerate(days):
         for slot in range(slots_per_day):
             print(f"{dname}-{slot:<12}", end="")
-            for h_idx, h in enumerate(halls):
-                entry = "-"
-                for m in modules:
-                    code = m["code"]
-                    m_day = solver.Value(module_vars[code]["day"])
-                    m_hall = solver.Value(module_vars[code]["hall"])
-                    m_slot = solver.Value(module_vars[code]["slot"])
-                    m_end = solver.Value(module_vars[code]["end"])
-                    if m_day == d_idx and m_hall == h_idx and m_slot <= slot < m_end:
-                        entry = code
-                        break
+            for i in grid[d_idx, slot].tolist():
+                entry = codes[i] if i >= 0 else "-"
                 print(f"{entry:<20}", end="")
             print()
-        print("-" * (20 * (len(halls) + 1)))
+        print("-" * (20 * (len(hall_names) + 1)))
 
 
 # ----------------------------
 # Solve (refactored to return solver + status)
 # ----------------------------
-def solve_model(model, module_vars, modules, halls, days, slots_per_day):
-    solver = cp_model.CpSolver()
-    solver.parameters.max_time_in_seconds = 60
-    solver.parameters.num_search_workers = 8
+def solve_model(model, module_vars, inst, days, slots_per_day, callback=None, params=None):
+    params = params or SolverParams()
+    solver = new_solver(params.time_limit, params.workers, params)
 
-    status = solver.Solve(model)
+    status = solver.Solve(model, callback)
 
     # if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
     #     # Compact list: one line per module
-    #     for m in modules:
-    #         code = m["code"]
-    #         d = solver.Value(module_vars[code]["day"])
-    #         h = solver.Value(module_vars[code]["hall"])
-    #         s = solver.Value(module_vars[code]["slot"])
-    #         print(f"{code}: Day={days[d]}, Hall={halls[h]['hall']}, Slot={s}, Dur={m['duration']}")
+    #     for i, mv in enumerate(module_vars):
+    #         d = solver.Value(mv["day"])
+    #         h = solver.Value(mv["hall"])
+    #         s = solver.Value(mv["slot"])
+    #         print(f"{inst.modules.code[i]}: Day={days[d]}, Hall={inst.halls.name[h]}, Slot={s}, Dur={mv['dur']}")
     # else:
     #     print("No feasible solution found.")
 
@@ -251,19 +446,19 @@ def solve_model(model, module_vars, modules, halls, days, slots_per_day):
 # ----------------------------
 # Expanded slot view (one line per occupied slot)
 # ----------------------------
-def print_slot_expanded(solver, module_vars, modules, halls, days):
+def print_slot_expanded(sol, inst, days):
     print("\nAll occupied slots (expanded view):")
-    for m in modules:
-        code = m["code"]
-        d = solver.Value(module_vars[code]["day"])
-        h = solver.Value(module_vars[code]["hall"])
-        start = solver.Value(module_vars[code]["slot"])
-        dur = m["duration"]
+    codes = inst.modules.code.tolist()
+    hall_names = inst.halls.name.tolist()
+    for code, d, h, start, dur in zip(codes, sol.day.tolist(), sol.hall.tolist(),
+                                      sol.slot.tolist(), sol.duration.tolist()):
         for s in range(start, start + dur):
-            print(f"{code}: Day={days[d]}, Hall={halls[h]['hall']}, Slot={s}")
+            print(f"{code}: Day={days[d]}, Hall={hall_names[h]}, Slot={s}")
 
 import json
-def generate_expanded_json(status, solver, module_vars, modules, halls, days):
+def generate_expanded_json(status, sol, inst, days, lazy=False):
+    """{"status", "timetable"} from SolutionArrays sol (None unless solved);
+    with lazy, "timetable" is an iterator (--output ndjson)."""
     result = {
         "status": "INFEASIBLE" if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE) else "OPTIMAL",
         "timetable": []
@@ -272,19 +467,24 @@ def generate_expanded_json(status, solver, module_vars, modules, halls, days):
     if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
         return result
 
+    entries = iter_expanded_entries(sol, inst, days)
+    result["timetable"] = entries if lazy else list(entries)
+    return result
+
+
+def iter_expanded_entries(sol, inst, days):
+    # Codes and hall names are only looked up here, by id
+    hall_names = inst.halls.name.tolist()
+
     # Create one entry per occupied slot
-    for m in modules:
-        code = m["code"]
-        d = solver.Value(module_vars[code]["day"])
-        h = solver.Value(module_vars[code]["hall"])
-        start = solver.Value(module_vars[code]["slot"])
+    for m, d, h, start in zip(inst.modules.to_records(), sol.day.tolist(), sol.hall.tolist(), sol.slot.tolist()):
         dur = m["duration"]
 
         for s in range(start, start + dur):
             entry = {
-                "code": code,
+                "code": m["code"],
                 "day": days[d],
-                "hall": halls[h]["hall"],
+                "hall": hall_names[h],
                 "slot": s,
                 "duration": dur,
                 "students": m["students"],
@@ -292,24 +492,263 @@ def generate_expanded_json(status, solver, module_vars, modules, halls, days):
                 "semester": m["semester"],
                 "iscommon": m["iscommon"]
             }
-            result["timetable"].append(entry)
+            yield entry
+
+
+def generate_compact_json(status, sol, inst, days, dictionary=False, lazy=False):
+    """One row per module with its start slot and duration (see compact_timetable.py)."""
+    result = {
+        "status": "INFEASIBLE" if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE) else "OPTIMAL",
+        "schema": "compact",
+    }
+    if dictionary:
+        result["halls"] = inst.halls.name.tolist()
+        result["departments"] = list(department_table(inst.modules.department.tolist()))
+    result["timetable"] = []
+
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return result
 
+    entries = iter_compact_entries(sol, inst, days, dictionary)
+    result["timetable"] = entries if lazy else list(entries)
     return result
 
 
+def iter_compact_entries(sol, inst, days, dictionary=False):
+    hall_names = inst.halls.name.tolist()
+    departments = department_table(inst.modules.department.tolist()) if dictionary else None
+
+    for m, d, h, start in zip(inst.modules.to_records(), sol.day.tolist(), sol.hall.tolist(), sol.slot.tolist()):
+        yield {
+            "code": m["code"],
+            "day": days[d],
+            "hall": h if dictionary else hall_names[h],
+            "slot": start,
+            "duration": m["duration"],
+            "students": m["students"],
+            "department": departments.get(m["department"]) if dictionary else m["department"],
+            "semester": m["semester"],
+            "iscommon": m["iscommon"]
+        }
+
+
+def timetable_json(args, status, sol, inst, days):
+    """The result in the --schema / --output selected by args."""
+    lazy = args.output == "ndjson"
+    if args.schema == "compact":
+        return generate_compact_json(status, sol, inst, days, dictionary=args.dictionary, lazy=lazy)
+    return generate_expanded_json(status, sol, inst, days, lazy=lazy)
+
+
+def extract_solution(status, solver, module_vars):
+    """SolutionArrays of a solved model, else None."""
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return None
+    return SolutionArrays.from_timetable(solver, module_vars)
+
+
 # ----------------------------
 # Main
 # ----------------------------
-def main():
-    days = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
-    slots_per_day = 8
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Weekly timetable solver")
+    parser.add_argument(
+        "--model", choices=["daily", "flat"], default="daily",
+        help="daily: one interval per (module, day, hall); flat: one week-long time axis per hall"
+    )
+    parser.add_argument(
+        "--warm-start", metavar="FILE",
+        help="previous solver JSON or SolverResult rows to hint the solve with"
+    )
+    parser.add_argument(
+        "--repair", metavar="FILE",
+        help="previous solver JSON or SolverResult rows to repair instead of solving from scratch"
+    )
+    parser.add_argument(
+        "--changes", metavar="FILE",
+        help='with --repair: {"modules": [codes], "unavailable_halls": [names]}'
+    )
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="print every improving solution as an NDJSON line while solving (see solution_stream.py)"
+    )
+    parser.add_argument(
+        "--output", choices=["json", "ndjson"], default="json",
+        help="ndjson: one compact line per timetable row, then an {\"event\": \"end\"} trailer "
+             "with status and diagnostics (see solution_stream.py)"
+    )
+    parser.add_argument(
+        "--schema", choices=["expanded", "compact"], default="expanded",
+        help="expanded: one row per occupied slot; compact: one row per module with its start slot "
+             "and duration (see compact_timetable.py)"
+    )
+    parser.add_argument(
+        "--dictionary", action="store_true",
+        help='with --schema compact: halls and departments as indexes into "halls" / "departments" tables'
+    )
+    parser.add_argument(
+        "--params", type=params_spec, metavar="SPEC",
+        help="solver parameter profile: default, quick, thorough, auto, a JSON file or inline JSON "
+             "(default: $SOLVER_PARAMS, else default; see solver_params.py)"
+    )
+    parser.add_argument(
+        "--profile-build", action="store_true",
+        help="time every block of the model build and add it, with the solver's response stats, "
+             "to diagnostics (see build_profile.py)"
+    )
+    parser.add_argument(
+        "--explain", action="store_true",
+        help="solve with the rules behind assumption literals and a short time limit; when infeasible, "
+             "report a minimal set of conflicting rules in diagnostics (see infeasibility.py)"
+    )
+    parser.add_argument(
+        "--symmetry", action="store_true",
+        help="order interchangeable modules and halls to break symmetry (see symmetry.py)"
+    )
+    parser.add_argument(
+        "--greedy", choices=["fallback", "hint", "only"],
+        help="first-fit-decreasing timetable: the answer when CP-SAT finds none (fallback), "
+             "also a hint for CP-SAT (hint), or instead of CP-SAT (only); see greedy.py"
+    )
+    args = parser.parse_args(argv)
+    if args.dictionary and args.schema != "compact":
+        parser.error("--dictionary needs --schema compact")
+    if args.profile_build and args.repair:
+        parser.error("--profile-build needs a full model (not --repair)")
+    if args.explain and args.repair:
+        parser.error("--explain needs a full model (not --repair)")
+    if args.symmetry and args.repair:
+        parser.error("--symmetry needs a full model (not --repair)")
+    if args.symmetry and args.warm_start:
+        parser.error("--symmetry cannot be combined with --warm-start")
+    if args.greedy and (args.repair or args.explain):
+        parser.error("--greedy cannot be combined with --repair or --explain")
+    if args.greedy == "hint" and (args.warm_start or args.symmetry):
+        parser.error("--greedy hint cannot be combined with --warm-start or --symmetry")
+    if args.greedy == "only" and args.profile_build:
+        parser.error("--profile-build needs a model (not --greedy only)")
+    return args
+
+
+def solve(args, inst, load_info, days=DAYS, slots_per_day=SLOTS_PER_DAY):
+    """One solve as selected by args (see parse_args).
+
+    Returns (result_json, status, solver, sol), sol the SolutionArrays of
+    the answer or None; used by main and by solver_service.py.
+    """
+    build_eligibility(inst)
+    params = resolve_params(args.params, inst, len(days), slots_per_day)
+
+    screening = screen_timetable(inst, len(days), slots_per_day)
+    if screening["violations"]:
+        result_json = timetable_json(args, cp_model.INFEASIBLE, None, inst, days)
+        result_json["diagnostics"] = {"screening": screening, **load_info}
+        return result_json, cp_model.INFEASIBLE, None, None
+    # Reported next to the load info on every path
+    load_info = {"screening": screening, **load_info}
+
+    if args.repair:
+        return solve_repair(args, inst, days, slots_per_day, load_info, params)
+
+    greedy = None
+    if args.greedy in ("hint", "only"):
+        greedy = GreedyRun(greedy_timetable, inst, args.greedy, len(days), slots_per_day)
+    if args.greedy == "only":
+        sol = greedy.solution(inst)
+        status = cp_model.FEASIBLE if sol is not None else cp_model.UNKNOWN
+        result_json = timetable_json(args, status, sol, inst, days)
+        result_json["diagnostics"] = {"model_mode": "greedy", "greedy": greedy.info, **load_info}
+        if sol is not None:
+            result_json["diagnostics"]["validation"] = check_timetable(sol, inst, len(days), slots_per_day)
+        return result_json, status, None, sol
+
+    builder = build_flat_model if args.model == "flat" else build_model
+    profile = BuildProfile() if args.profile_build else None
+    explainer = Explainer() if args.explain else None
+    model, module_vars, presence_vars, day_presence = builder(
+        inst, days, slots_per_day, profile=profile, explain=explainer, symmetry=args.symmetry
+    )
+    if explainer is not None:
+        explainer.assume(model)
+        params = explain_params(params)
+
+    warm_info = None
+    if args.warm_start:
+        previous = previous_assignment(read_previous(args.warm_start), inst, days)
+        warm_info = add_timetable_hints(model, inst, module_vars, presence_vars, day_presence, previous, slots_per_day)
+    if args.greedy == "hint":
+        greedy.info["hints"] = add_timetable_hints(
+            model, inst, module_vars, presence_vars, day_presence, greedy.previous(), slots_per_day
+        )
+
+    callback = streamer(args.stream, timetable_decoder(module_vars, inst, days))
+    status, solver = solve_model(model, module_vars, inst, days, slots_per_day, callback, params)
+    sol = extract_solution(status, solver, module_vars)
+    if args.greedy and sol is None and status != cp_model.INFEASIBLE:
+        greedy = greedy or GreedyRun(greedy_timetable, inst, args.greedy, len(days), slots_per_day)
+        sol = greedy.solution(inst)
+        if sol is not None:
+            status = cp_model.FEASIBLE
+
+    result_json = timetable_json(args, status, sol, inst, days)
+    result_json["diagnostics"] = eligibility_diagnostics(inst, days, per_day=args.model == "daily")
+    result_json["diagnostics"]["model_mode"] = args.model
+    result_json["diagnostics"]["symmetry"] = symmetry_diagnostics(inst, args.symmetry)
+    result_json["diagnostics"]["solver_params"] = params.to_dict()
+    result_json["diagnostics"].update(load_info)
+    if sol is not None:
+        result_json["diagnostics"]["validation"] = check_timetable(sol, inst, len(days), slots_per_day)
+    if warm_info is not None:
+        result_json["diagnostics"]["warm_start"] = warm_info
+    result_json["diagnostics"].update(profile_diagnostics(profile, solver))
+    if explainer is not None:
+        result_json["diagnostics"]["explain"] = explainer.explain(model, solver, status, params)
+    if greedy is not None:
+        result_json["diagnostics"]["greedy"] = greedy.info
+
+    return result_json, status, solver, sol
+
+
+def solve_repair(args, inst, days, slots_per_day, load_info, params):
+    from repair import build_timetable_repair_model, count_moved, read_changes
+
+    previous = previous_assignment(read_previous(args.repair), inst, days)
+    changes = read_changes(args.changes) if args.changes else {}
+    model, module_vars, moved_vars, repair_info = build_timetable_repair_model(
+        inst, days, slots_per_day, previous, changes
+    )
+
+    callback = streamer(args.stream, timetable_decoder(module_vars, inst, days))
+    status, solver = solve_model(model, module_vars, inst, days, slots_per_day, callback, params)
+    sol = extract_solution(status, solver, module_vars)
+
+    result_json = timetable_json(args, status, sol, inst, days)
+    result_json["diagnostics"] = {
+        "model_mode": "repair", "repair": repair_info, "solver_params": params.to_dict(), **load_info
+    }
+    if sol is not None:
+        repair_info["moved_modules"] = count_moved(solver, moved_vars, repair_info)
+        result_json["diagnostics"]["validation"] = check_timetable(sol, inst, len(days), slots_per_day)
+
+    return result_json, status, solver, sol
+
 
-    modules, halls = load_data()
-    model, module_vars, presence_vars, day_presence = build_model(modules, halls, days, slots_per_day)
+def main(argv=None):
+    args = parse_args(argv)
 
-    status, solver = solve_model(model, module_vars, modules, halls, days, slots_per_day)
+    load_info = {}
+    inst = load_data(diagnostics=load_info)
+    result_json, status, solver, sol = solve(args, inst, load_info)
 
-    result_json = generate_expanded_json(status, solver, module_vars, modules, halls, days)
+    # stdout is NDJSON only: any solution lines, then the result
+    if args.output == "ndjson":
+        # With --dictionary the tables come first, so rows can be decoded as they arrive
+        header = [key for key in ("schema", "halls", "departments") if key in result_json]
+        write_result_ndjson(result_json, "timetable", header)
+        return
+    if args.stream:
+        write_ndjson({"event": "result", **result_json})
+        return
 
     # 👉 Count and print how many JSON objects (timetable entries) are generated
 
@@ -318,8 +757,8 @@ def main():
     print(f"\nTotal JSON objects: {len(result_json['timetable'])}\n")
 
     # Only print expanded view if we found a solution
-    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
-        print_slot_expanded(solver, module_vars, modules, halls, days)
+    if not args.repair and sol is not None:
+        print_slot_expanded(sol, inst, DAYS)
 
 if __name__ == "__main__":
     main()
@@ -8,143 +8,174 @@ Timetable solver with SOFT department overlap penalty.
 - Each module scheduled exactly once (hard)
 - Prefers to avoid overlaps between modules of the same department across halls (soft)
   by minimizing the number of same-department overlaps.
+- `--warm-start FILE` hints the solver with a previous timetable (see warm_start.py).
+- Screens the instance before building a model and returns INFEASIBLE with
+  the reasons when a necessary condition fails (see screening.py).
+- `--profile-build` adds per-block build times and model sizes, plus the
+  solver's response stats, to diagnostics (see build_profile.py).
+- `--symmetry` orders interchangeable modules and halls to break symmetry
+  (see symmetry.py).
+- `--greedy fallback|hint|only` answers with a first-fit-decreasing
+  timetable when CP-SAT finds none, hints CP-SAT with it, or skips CP-SAT
+  (see greedy.py).
 """
 
-import pandas as pd
+import argparse
+
 from ortools.sat.python import cp_model
 
+from build_profile import NO_PROFILE, BuildProfile, profile_diagnostics
+from data_loader import load_instance
+from greedy import GreedyRun, greedy_timetable
+from screening import screen_timetable
+from solution_arrays import SolutionArrays, check_timetable
+from solution_stream import streamer, timetable_decoder, write_ndjson, write_result_ndjson
+from solver_control import current_control, new_solver
+from solver_params import SolverParams, params_spec, resolve_params
+from symmetry import add_symmetry_breaking, symmetry_diagnostics
+from warm_start import add_timetable_hints, previous_assignment, read_previous
+
 
 # ----------------------------
 # 1. LOAD DATA
 # ----------------------------
-def load_data():
-    file_path = "../data/planner_agent_data_nushan.xlsx"
-    modules_df = pd.read_excel(file_path, sheet_name="module codes")
-    halls_df = pd.read_excel(file_path, sheet_name="halls")
-
-    modules_df = modules_df.dropna(subset=["semester", "duration", "module_code", "no_of_students"])
-    modules_df["semester"] = modules_df["semester"].astype(int)
-    modules_df["duration"] = modules_df["duration"].astype(int)
-    modules_df["iscommon"] = modules_df.get("iscommon", False).fillna(False).astype(bool)
-    modules_df["no_of_students"] = modules_df["no_of_students"].astype(int)
-
-    modules = []
-    for _, row in modules_df.iterrows():
-        modules.append({
-            "code": row["module_code"],
-            "semester": int(row["semester"]),
-            "duration": int(row["duration"]),
-            "iscommon": bool(row["iscommon"]),
-            "department": row.get("department", None),
-            "students": int(row["no_of_students"])
-        })
-
-    halls = []
-    for _, row in halls_df.iterrows():
-        halls.append({
-            "hall": row["room_name"],
-            "capacity": int(row["capacity"]),
-        })
-
-    return modules, halls
+DATA_FILE = "../data/planner_agent_data_nushan.xlsx"
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+SLOTS_PER_DAY = 8
+
+
+def load_data(file_path=DATA_FILE, diagnostics=None):
+    # Column-wise parsing + content-hashed cache live in data_loader.py;
+    # diagnostics, if given, records whether this load was a cache hit.
+    return load_instance(file_path, "halls", required=("semester", "duration"), diagnostics=diagnostics)
+
+
+# ----------------------------
+# 2. HALL ELIGIBILITY
+# ----------------------------
+def build_eligibility(inst, restrict_department=False):
+    """Fill inst.eligible / eligible_halls / hall_modules (see data_loader.Instance).
+
+    A hall is eligible when it can seat the whole class and, if
+    restrict_department is set, it is either a "common" hall or belongs to
+    the module's department. Halls in this variant carry no department, so
+    the restriction is off by default.
+    """
+    return inst.build_eligibility(restrict_department)
+
+
+def eligibility_diagnostics(inst, days):
+    total = inst.num_modules * inst.num_halls * len(days)
+    created = int(inst.eligible.sum()) * len(days)
+    return {
+        "presence_vars_dense": total,
+        "presence_vars_created": created,
+        "presence_vars_pruned": total - created,
+        "modules_without_eligible_hall": inst.modules.code[~inst.eligible.any(axis=1)].tolist(),
+    }
 
 
 # ----------------------------
-# 2. BUILD MODEL
+# 3. BUILD MODEL
 # ----------------------------
-def build_model(modules, halls, days, slots_per_day):
+def build_model(inst, days, slots_per_day, profile=None, symmetry=False):
+    """Daily model over module ids.
+
+    module_vars[i] holds the vars of module i, presence_vars is keyed by
+    (i, day_idx, hall_idx) and day_presence by (i, day_idx). profile, a
+    build_profile.BuildProfile, times each block (--profile-build);
+    symmetry orders interchangeable modules and halls (--symmetry, see symmetry.py).
+    """
     model = cp_model.CpModel()
+    profile = profile or NO_PROFILE
 
-    module_vars = {}         # code -> vars dict
-    presence_vars = {}       # (code, day_idx, hall_idx) -> Bool
+    if inst.eligible is None:
+        build_eligibility(inst)
+
+    num_halls = inst.num_halls
+    module_vars = []         # module id -> vars dict
+    presence_vars = {}       # (i, day_idx, hall_idx) -> Bool, eligible halls only
 
     # --- Module variables
-    for m in modules:
-        code = m["code"]
-        dur = m["duration"]
-        day_var = model.NewIntVar(0, len(days) - 1, f"day_{code}")
-        hall_var = model.NewIntVar(0, len(halls) - 1, f"hall_{code}")
-        slot_var = model.NewIntVar(0, slots_per_day - dur, f"slot_{code}")
-        end_var = model.NewIntVar(0, slots_per_day, f"end_{code}")
-        model.Add(end_var == slot_var + dur)
-
-        module_vars[code] = {
-            "day": day_var,
-            "hall": hall_var,
-            "slot": slot_var,
-            "end": end_var,
-            "dur": dur
-        }
+    with profile.block(model, "variables"):
+        for i, dur in enumerate(inst.modules.duration.tolist()):
+            # Hall capacity (hard) is enforced through the hall domain:
+            # halls that cannot seat the class never get a var.
+            allowed = inst.eligible_halls[i]
+            hall_domain = cp_model.Domain.FromValues(allowed) if allowed else cp_model.Domain(0, num_halls - 1)
+            day_var = model.NewIntVar(0, len(days) - 1, f"day_m{i}")
+            hall_var = model.NewIntVarFromDomain(hall_domain, f"hall_m{i}")
+            slot_var = model.NewIntVar(0, slots_per_day - dur, f"slot_m{i}")
+            end_var = model.NewIntVar(0, slots_per_day, f"end_m{i}")
+            model.Add(end_var == slot_var + dur)
+            # Start position on the flattened week (day*slots_per_day + slot)
+            start_var = model.NewIntVar(0, len(days) * slots_per_day - 1, f"start_m{i}")
+            model.Add(start_var == day_var * slots_per_day + slot_var)
+
+            module_vars.append({
+                "start": start_var,
+                "day": day_var,
+                "hall": hall_var,
+                "slot": slot_var,
+                "end": end_var,
+                "dur": dur
+            })
 
     # --- Presence variables & hall-level optional intervals (hard no-overlap)
-    for d_idx in range(len(days)):
-        for h_idx in range(len(halls)):
-            intervals = []
-            for m in modules:
-                code = m["code"]
-                dur = m["duration"]
-                pres = model.NewBoolVar(f"pres_{code}_d{d_idx}_h{h_idx}")
-                presence_vars[(code, d_idx, h_idx)] = pres
-
-                # Link presence to module's day/hall
-                model.Add(module_vars[code]["day"] == d_idx).OnlyEnforceIf(pres)
-                model.Add(module_vars[code]["hall"] == h_idx).OnlyEnforceIf(pres)
-
-                interval = model.NewOptionalIntervalVar(
-                    module_vars[code]["slot"], dur, module_vars[code]["end"], pres,
-                    f"int_{code}_d{d_idx}_h{h_idx}"
-                )
-                intervals.append(interval)
-
-            if intervals:
-                model.AddNoOverlap(intervals)
+    with profile.block(model, "presence_intervals"):
+        for d_idx in range(len(days)):
+            for h_idx in range(num_halls):
+                intervals = []
+                for i in inst.hall_modules[h_idx]:
+                    mv = module_vars[i]
+                    pres = model.NewBoolVar(f"pres_m{i}_d{d_idx}_h{h_idx}")
+                    presence_vars[(i, d_idx, h_idx)] = pres
+
+                    # Link presence to module's day/hall
+                    model.Add(mv["day"] == d_idx).OnlyEnforceIf(pres)
+                    model.Add(mv["hall"] == h_idx).OnlyEnforceIf(pres)
+
+                    interval = model.NewOptionalIntervalVar(
+                        mv["slot"], mv["dur"], mv["end"], pres,
+                        f"int_m{i}_d{d_idx}_h{h_idx}"
+                    )
+                    intervals.append(interval)
+
+                if intervals:
+                    model.AddNoOverlap(intervals)
 
     # --- Exactly one presence per module (hard)
-    for m in modules:
-        code = m["code"]
-        pres_list = [presence_vars[(code, d, h)] for d in range(len(days)) for h in range(len(halls))]
-        model.AddExactlyOne(pres_list)
-
-    # --- Hall capacity (hard)
-    for m in modules:
-        code = m["code"]
-        for h_idx, hall in enumerate(halls):
-            if hall["capacity"] < m["students"]:
-                for d in range(len(days)):
-                    model.Add(presence_vars[(code, d, h_idx)] == 0)
+    # A module without any eligible hall gets an empty list, i.e. infeasible.
+    with profile.block(model, "exactly_one"):
+        for i, allowed in enumerate(inst.eligible_halls):
+            pres_list = [presence_vars[(i, d, h)] for d in range(len(days)) for h in allowed]
+            model.AddExactlyOne(pres_list)
 
     # --- Day-presence variable for each module+day
-    day_presence = {}  # (code, day_idx) -> Bool
-    for m in modules:
-        code = m["code"]
-        for d_idx in range(len(days)):
-            dp = model.NewBoolVar(f"daypres_{code}_d{d_idx}")
-            pres_list = [presence_vars[(code, d_idx, h)] for h in range(len(halls))]
-            model.AddBoolOr(pres_list).OnlyEnforceIf(dp)
-            model.AddBoolAnd([p.Not() for p in pres_list]).OnlyEnforceIf(dp.Not())
-            day_presence[(code, d_idx)] = dp
+    day_presence = {}  # (i, day_idx) -> Bool
+    with profile.block(model, "day_presence"):
+        for i, allowed in enumerate(inst.eligible_halls):
+            for d_idx in range(len(days)):
+                dp = model.NewBoolVar(f"daypres_m{i}_d{d_idx}")
+                pres_list = [presence_vars[(i, d_idx, h)] for h in allowed]
+                model.AddBoolOr(pres_list).OnlyEnforceIf(dp)
+                model.AddBoolAnd([p.Not() for p in pres_list]).OnlyEnforceIf(dp.Not())
+                day_presence[(i, d_idx)] = dp
 
     # --- SAME-DEPARTMENT NO-SLOT-CONFLICT constraint (hard)
-    dept_map = {}
-    for m in modules:
-        dept = m.get("department")
-        if not dept:
-            continue
-        dept_map.setdefault(dept, []).append(m)
-
-    for dept, mod_list in dept_map.items():
-        n = len(mod_list)
-        for i in range(n):
-            for j in range(i + 1, n):
-                mi = mod_list[i]
-                mj = mod_list[j]
-                ci = mi["code"]
-                cj = mj["code"]
-                for d_idx in range(len(days)):
-                    # If both scheduled on same day, their slots must be different
-                    model.Add(module_vars[ci]["slot"] != module_vars[cj]["slot"]).OnlyEnforceIf(
-                        [day_presence[(ci, d_idx)], day_presence[(cj, d_idx)]]
-                    )
+    # "Same day => different slot" for every pair is the same as all starts
+    # of a department being different on the flattened week, so one
+    # AddAllDifferent per department replaces the O(n^2 * days) pair loop.
+    with profile.block(model, "department_rule"):
+        for ids in inst.department_groups().values():
+            if len(ids) > 1:
+                model.AddAllDifferent([module_vars[i]["start"] for i in ids])
+
+    if symmetry:
+        with profile.block(model, "symmetry"):
+            add_symmetry_breaking(
+                model, inst, [mv["start"] for mv in module_vars], presence_vars, inst.modules.duration.tolist()
+            )
 
     return model, module_vars, presence_vars, day_presence
 
@@ -152,64 +183,61 @@ def build_model(modules, halls, days, slots_per_day):
 # ----------------------------
 # Diagnostics & printing
 # ----------------------------
-def print_diagnostics(modules, halls, days, slots_per_day):
-    total_req = sum(m["duration"] for m in modules)
-    total_avail = len(days) * len(halls) * slots_per_day
+def print_diagnostics(inst, days, slots_per_day):
+    total_req = int(inst.modules.duration.sum())
+    total_avail = len(days) * inst.num_halls * slots_per_day
     print("\n[DIAGNOSTICS]")
     print(f"  Total required slot-hours: {total_req}")
     print(f"  Total available slot-hours: {total_avail}")
-    print(f"  Largest hall capacity: {max(h['capacity'] for h in halls)}")
-    print(f"  Largest class size: {max(m['students'] for m in modules)}")
-    print(f"  Max module duration: {max(m['duration'] for m in modules)}")
-    print(f"  Min module duration: {min(m['duration'] for m in modules)}")
+    print(f"  Largest hall capacity: {inst.halls.capacity.max()}")
+    print(f"  Largest class size: {inst.modules.students.max()}")
+    print(f"  Max module duration: {inst.modules.duration.max()}")
+    print(f"  Min module duration: {inst.modules.duration.min()}")
 
 
-def print_timetable_grid(solver, module_vars, modules, halls, days, slots_per_day):
+def print_timetable_grid(solver, module_vars, inst, days, slots_per_day):
+    hall_names = inst.halls.name.tolist()
+    codes = inst.modules.code.tolist()
     print("\nTIMETABLE GRID (Day x Slot x Hall):")
-    print("-" * (20 * (len(halls) + 1)))
+    print("-" * (20 * (len(hall_names) + 1)))
     print(f"{'Slot/Day':<20}", end="")
-    for h in halls:
-        print(f"{h['hall']:<20}", end="")
+    for name in hall_names:
+        print(f"{name:<20}", end="")
     print()
-    print("-" * (20 * (len(halls) + 1)))
+    print("-" * (20 * (len(hall_names) + 1)))
 
+    grid = SolutionArrays.from_timetable(solver, module_vars).occupancy(len(days), slots_per_day, len(hall_names))
     for d_idx, dname in enumerate(days):
         for slot in range(slots_per_day):
             print(f"{dname}-{slot:<12}", end="")
-            for h_idx, h in enumerate(halls):
-                entry = "-"
-                for m in modules:
-                    code = m["code"]
-                    m_day = solver.Value(module_vars[code]["day"])
-                    m_hall = solver.Value(module_vars[code]["hall"])
-                    m_slot = solver.Value(module_vars[code]["slot"])
-                    m_end = solver.Value(module_vars[code]["end"])
-                    if m_day == d_idx and m_hall == h_idx and m_slot <= slot < m_end:
-                        entry = code
-                        break
+            for i in grid[d_idx, slot].tolist():
+                entry = codes[i] if i >= 0 else "-"
                 print(f"{entry:<20}", end="")
             print()
-        print("-" * (20 * (len(halls) + 1)))
+        print("-" * (20 * (len(hall_names) + 1)))
 
 
 # ----------------------------
 # Solve (refactored to return solver + status)
 # ----------------------------
-def solve_model(model, module_vars, modules, halls, days, slots_per_day):
-    solver = cp_model.CpSolver()
-    solver.parameters.max_time_in_seconds = 60
-    solver.parameters.num_search_workers = 8
+def solve_model(model, module_vars, inst, days, slots_per_day, callback=None, quiet=False, params=None):
+    params = params or SolverParams()
+    solver = new_solver(params.time_limit, params.workers, params)
+
+    status = solver.Solve(model, callback)
 
-    status = solver.Solve(model)
+    if quiet:
+        # --stream keeps stdout NDJSON only
+        return status, solver
 
     if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
         # Compact list: one line per module
-        for m in modules:
-            code = m["code"]
-            d = solver.Value(module_vars[code]["day"])
-            h = solver.Value(module_vars[code]["hall"])
-            s = solver.Value(module_vars[code]["slot"])
-            print(f"{code}: Day={days[d]}, Hall={halls[h]['hall']}, Slot={s}, Dur={m['duration']}")
+        codes = inst.modules.code.tolist()
+        hall_names = inst.halls.name.tolist()
+        sol = SolutionArrays.from_timetable(solver, module_vars)
+        for code, d, h, s, dur in zip(codes, sol.day.tolist(), sol.hall.tolist(),
+                                      sol.slot.tolist(), sol.duration.tolist()):
+            print(f"{code}: Day={days[d]}, Hall={hall_names[h]}, Slot={s}, Dur={dur}")
     else:
         print("No feasible solution found.")
 
@@ -219,16 +247,15 @@ def solve_model(model, module_vars, modules, halls, days, slots_per_day):
 # ----------------------------
 # Expanded slot view (one line per occupied slot)
 # ----------------------------
-def print_slot_expanded(solver, module_vars, modules, halls, days):
+def print_slot_expanded(solver, module_vars, inst, days):
     print("\nAll occupied slots (expanded view):")
-    for m in modules:
-        code = m["code"]
-        d = solver.Value(module_vars[code]["day"])
-        h = solver.Value(module_vars[code]["hall"])
-        start = solver.Value(module_vars[code]["slot"])
-        dur = m["duration"]
+    codes = inst.modules.code.tolist()
+    hall_names = inst.halls.name.tolist()
+    sol = SolutionArrays.from_timetable(solver, module_vars)
+    for code, d, h, start, dur in zip(codes, sol.day.tolist(), sol.hall.tolist(),
+                                      sol.slot.tolist(), sol.duration.tolist()):
         for s in range(start, start + dur):
-            print(f"{code}: Day={days[d]}, Hall={halls[h]['hall']}, Slot={s}")
+            print(f"{code}: Day={days[d]}, Hall={hall_names[h]}, Slot={s}")
 
 # ----------------------------
 # Main
@@ -239,7 +266,6 @@ Timetable solver -> JSON output
 """
 
 import json
-import pandas as pd
 from ortools.sat.python import cp_model
 
 # --- (keep your existing load_data, build_model, etc.)
@@ -258,7 +284,9 @@ def status_str(status):
         return "FEASIBLE"
     return "NO_SOLUTION"
 
-def collect_solution(status, solver, module_vars, modules, halls, days):
+def collect_solution(status, sol, inst, days, lazy=False):
+    """Result dict from SolutionArrays sol (None unless solved). With lazy,
+    "modules" is an iterator and there are no "expanded_slots" (--output ndjson)."""
     data = {
         "status": status_str(status),
         "modules": [],         # compact list: one entry per module
@@ -266,56 +294,165 @@ def collect_solution(status, solver, module_vars, modules, halls, days):
     }
 
     if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
-        for m in modules:
-            code = m["code"]
-            d = solver.Value(module_vars[code]["day"])
-            h = solver.Value(module_vars[code]["hall"])
-            s = solver.Value(module_vars[code]["slot"])
-            dur = m["duration"]
-
-            data["modules"].append({
-                "code": code,
-                "day_index": int(d),
-                "day": days[d],
-                "hall_index": int(h),
-                "hall": halls[h]["hall"],
-                "slot": int(s),
-                "duration": int(dur),
-                "students": int(m.get("students", 0)),
-                "department": m.get("department")
-            })
-
-            for slot in range(s, s + dur):
+        entries = iter_module_entries(sol, inst, days)
+        if lazy:
+            data["modules"] = entries
+            del data["expanded_slots"]
+            return data
+
+        for entry in entries:
+            data["modules"].append(entry)
+            for slot in range(entry["slot"], entry["slot"] + entry["duration"]):
                 data["expanded_slots"].append({
-                    "code": code,
-                    "day_index": int(d),
-                    "day": days[d],
-                    "hall_index": int(h),
-                    "hall": halls[h]["hall"],
+                    "code": entry["code"],
+                    "day_index": entry["day_index"],
+                    "day": entry["day"],
+                    "hall_index": entry["hall_index"],
+                    "hall": entry["hall"],
                     "slot": int(slot)
                 })
 
     return data
 
-def main():
-    days = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
-    slots_per_day = 8
 
-    modules, halls = load_data()
+def iter_module_entries(sol, inst, days):
+    # Codes and hall names are only looked up here, by id
+    hall_names = inst.halls.name.tolist()
+    for m, d, h, s in zip(inst.modules.to_records(), sol.day.tolist(), sol.hall.tolist(), sol.slot.tolist()):
+        yield {
+            "code": m["code"],
+            "day_index": int(d),
+            "day": days[d],
+            "hall_index": int(h),
+            "hall": hall_names[h],
+            "slot": int(s),
+            "duration": int(m["duration"]),
+            "students": int(m.get("students", 0)),
+            "department": m.get("department")
+        }
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Weekly timetable solver (JSON output)")
+    parser.add_argument(
+        "--warm-start", metavar="FILE",
+        help="previous solver JSON or SolverResult rows to hint the solve with"
+    )
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="print every improving solution as an NDJSON line while solving (see solution_stream.py)"
+    )
+    parser.add_argument(
+        "--output", choices=["json", "ndjson"], default="json",
+        help="ndjson: one compact line per module, then an {\"event\": \"end\"} trailer "
+             "with status and diagnostics (see solution_stream.py)"
+    )
+    parser.add_argument(
+        "--params", type=params_spec, metavar="SPEC",
+        help="solver parameter profile: default, quick, thorough, auto, a JSON file or inline JSON "
+             "(default: $SOLVER_PARAMS, else default; see solver_params.py)"
+    )
+    parser.add_argument(
+        "--profile-build", action="store_true",
+        help="time every block of the model build and add it, with the solver's response stats, "
+             "to diagnostics (see build_profile.py)"
+    )
+    parser.add_argument(
+        "--symmetry", action="store_true",
+        help="order interchangeable modules and halls to break symmetry (see symmetry.py)"
+    )
+    parser.add_argument(
+        "--greedy", choices=["fallback", "hint", "only"],
+        help="first-fit-decreasing timetable: the answer when CP-SAT finds none (fallback), "
+             "also a hint for CP-SAT (hint), or instead of CP-SAT (only); see greedy.py"
+    )
+    args = parser.parse_args(argv)
+    if args.symmetry and args.warm_start:
+        parser.error("--symmetry cannot be combined with --warm-start")
+    if args.greedy == "hint" and (args.warm_start or args.symmetry):
+        parser.error("--greedy hint cannot be combined with --warm-start or --symmetry")
+    if args.greedy == "only" and args.profile_build:
+        parser.error("--profile-build needs a model (not --greedy only)")
+    return args
+
+
+def solve(args, inst, load_info, days=DAYS, slots_per_day=SLOTS_PER_DAY):
+    """One solve as selected by args (see parse_args) -> result dict; used by
+    main and by solver_service.py."""
     # quick sanity check
     diagnostics = {
-        "total_modules": len(modules),
-        "total_halls": len(halls),
-        "total_required_slot_hours": sum(m["duration"] for m in modules),
-        "total_available_slot_hours": len(days) * len(halls) * slots_per_day
+        "total_modules": inst.num_modules,
+        "total_halls": inst.num_halls,
+        "total_required_slot_hours": int(inst.modules.duration.sum()),
+        "total_available_slot_hours": len(days) * inst.num_halls * slots_per_day
     }
-
-    model, module_vars, presence_vars, day_presence = build_model(modules, halls, days, slots_per_day)
-    status, solver = solve_model(model, module_vars, modules, halls, days, slots_per_day)
-
-    result = collect_solution(status, solver, module_vars, modules, halls, days)
+    diagnostics.update(load_info)
+
+    build_eligibility(inst)
+    diagnostics.update(eligibility_diagnostics(inst, days))
+
+    params = resolve_params(args.params, inst, len(days), slots_per_day)
+    diagnostics["solver_params"] = params.to_dict()
+
+    # Halls carry no department here and each department only needs distinct starts
+    diagnostics["screening"] = screen_timetable(
+        inst, len(days), slots_per_day, restrict_department=False, group_rule="distinct_starts"
+    )
+    if diagnostics["screening"]["violations"]:
+        ndjson = args.output == "ndjson"
+        result = collect_solution(cp_model.INFEASIBLE, None, inst, days, lazy=ndjson)
+        result["diagnostics"] = diagnostics
+        if not ndjson:
+            result["summary"] = [v["message"] for v in diagnostics["screening"]["violations"]]
+        return result
+
+    ndjson = args.output == "ndjson"
+    greedy = None
+    if args.greedy in ("hint", "only"):
+        greedy = GreedyRun(greedy_timetable, inst, args.greedy, len(days), slots_per_day, "distinct_starts")
+
+    profile = solver = sol = None
+    if args.greedy == "only":
+        sol = greedy.solution(inst)
+        status = cp_model.FEASIBLE if sol is not None else cp_model.UNKNOWN
+    else:
+        profile = BuildProfile() if args.profile_build else None
+        diagnostics["symmetry"] = symmetry_diagnostics(inst, args.symmetry)
+        model, module_vars, presence_vars, day_presence = build_model(
+            inst, days, slots_per_day, profile=profile, symmetry=args.symmetry
+        )
+        if args.warm_start:
+            previous = previous_assignment(read_previous(args.warm_start), inst, days)
+            diagnostics["warm_start"] = add_timetable_hints(
+                model, inst, module_vars, presence_vars, day_presence, previous, slots_per_day
+            )
+        if args.greedy == "hint":
+            greedy.info["hints"] = add_timetable_hints(
+                model, inst, module_vars, presence_vars, day_presence, greedy.previous(), slots_per_day
+            )
+        callback = streamer(args.stream, timetable_decoder(module_vars, inst, days))
+        status, solver = solve_model(
+            model, module_vars, inst, days, slots_per_day, callback, params=params,
+            # Under solver_service stdout is the service's log
+            quiet=args.stream or ndjson or current_control.get() is not None,
+        )
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            sol = SolutionArrays.from_timetable(solver, module_vars)
+        elif args.greedy and status != cp_model.INFEASIBLE:
+            greedy = greedy or GreedyRun(greedy_timetable, inst, args.greedy, len(days), slots_per_day, "distinct_starts")
+            sol = greedy.solution(inst)
+            if sol is not None:
+                status = cp_model.FEASIBLE
+
+    if sol is not None:
+        diagnostics["validation"] = check_timetable(sol, inst, len(days), slots_per_day, "distinct_starts")
+    if greedy is not None:
+        diagnostics["greedy"] = greedy.info
+    diagnostics.update(profile_diagnostics(profile, solver))
+
+    result = collect_solution(status, sol, inst, days, lazy=ndjson)
     result["diagnostics"] = diagnostics
+    if ndjson:
+        return result
 
     # Optionally include human-readable summary
     summary_lines = []
@@ -326,6 +463,22 @@ def main():
         summary_lines.append("No feasible solution found." if result["status"] == "NO_SOLUTION" else "No modules scheduled.")
 
     result["summary"] = summary_lines
+    return result
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    load_info = {}
+    inst = load_data(diagnostics=load_info)
+    result = solve(args, inst, load_info)
+
+    if args.output == "ndjson":
+        write_result_ndjson(result, "modules")
+        return
+    if args.stream:
+        write_ndjson({"event": "result", **result})
+        return
 
     # Print single-line JSON to stdout (Java will capture this)
     print(json.dumps(result, ensure_ascii=False))
@@ -0,0 +1,199 @@
+"""
+Warm start from a previous timetable.
+
+A re-solve after a small edit to the workbook usually lands close to the
+last answer. read_previous accepts what the solvers themselves emit or what
+the backend stores:
+
+- the JSON object printed by a solver ({"timetable": [...]} or, for
+  timetable_csp2, {"modules": [...]}),
+- a JSON list of SolverResult / ExamTableRecords rows,
+- timetable_csp --schema compact output, with or without dictionary
+  tables (see compact_timetable.py).
+
+Rows carry a module code, a day name, a slot and either one "hall" or an
+exam "halls" list of "HALL-count" strings (ExamTableRecords joins them with
+", "). Weekly output has one row per occupied slot; the lowest slot is the
+start.
+
+previous_assignment maps that onto the ids of a data_loader.Instance, and
+the add_*_hints helpers pass it to CP-SAT with AddHint. Modules, days or
+halls that no longer exist are dropped and counted in the returned stats.
+"""
+
+import json
+
+from compact_timetable import decode_compact
+
+
+def read_previous(path):
+    """Rows of a previous solution file (see module docstring)."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        if data.get("schema") == "compact":
+            # One row per module, "slot" is already the start
+            return decode_compact(data)
+        return data.get("timetable") or data.get("modules") or []
+    return data
+
+
+def split_hall_entry(entry):
+    """ "LT1-289" -> "LT1"; names without a numeric "-count" suffix are kept as is."""
+    name, sep, count = entry.rpartition("-")
+    return name if sep and count.strip().isdigit() else entry
+
+
+def row_halls(row):
+    if row.get("halls") is not None:
+        return [split_hall_entry(h.strip()) for h in row["halls"]]
+    hall = row.get("hall")
+    if not hall:
+        return []
+    # ExamTableRecords stores the exam halls as one "A-200, B-27" string
+    return [split_hall_entry(h.strip()) for h in str(hall).split(", ")]
+
+
+def previous_placements(rows):
+    """code -> (day name, start slot, [hall names])."""
+    placements = {}
+    for row in rows:
+        code = row.get("code")
+        if code is None or row.get("day") is None or row.get("slot") is None:
+            continue
+        slot = int(row["slot"])
+        prev = placements.get(code)
+        if prev is None or (prev[0] == row["day"] and slot < prev[1]):
+            placements[code] = (row["day"], slot, row_halls(row))
+    return placements
+
+
+def previous_assignment(rows, inst, days):
+    """Map previous rows onto inst ids.
+
+    Returns ({module_id: (day_idx, slot, [hall_idx, ...])}, stats). Halls
+    that no longer exist are left out of the hall list.
+    """
+    placements = previous_placements(rows)
+    module_ids = {code: i for i, code in enumerate(inst.modules.code.tolist())}
+    hall_ids = {name: h for h, name in enumerate(inst.halls.name.tolist())}
+    day_ids = {name: d for d, name in enumerate(days)}
+
+    assignment = {}
+    for code, (day, slot, halls) in placements.items():
+        i = module_ids.get(code)
+        d = day_ids.get(day)
+        if i is None or d is None:
+            continue
+        assignment[i] = (d, slot, [hall_ids[h] for h in halls if h in hall_ids])
+
+    stats = {
+        "previous_modules": len(placements),
+        "matched_modules": len(assignment),
+    }
+    return assignment, stats
+
+
+def hint_stats(stats, kept, partial):
+    stats = dict(stats)
+    stats["hints_kept"] = kept
+    stats["hints_partial"] = partial
+    stats["hints_dropped"] = stats["previous_modules"] - kept - partial
+    return stats
+
+
+# ----------------------------
+# Weekly timetable
+# ----------------------------
+def add_timetable_hints(model, inst, module_vars, presence_vars, day_presence, previous, slots_per_day):
+    """Hint day/slot/hall of timetable_csp(2) build_model / build_flat_model.
+
+    A module whose start no longer fits its duration is not hinted; one
+    whose hall is no longer eligible only gets its day and slot hinted
+    (counted as partial). Presence and day-presence literals are hinted too,
+    so CP-SAT starts from a complete assignment.
+    """
+    assignment, stats = previous
+    durations = inst.modules.duration.tolist()
+    hinted = {}
+    kept = partial = 0
+
+    for i, (d, slot, halls) in assignment.items():
+        if slot + durations[i] > slots_per_day:
+            continue
+        mv = module_vars[i]
+        model.AddHint(mv["day"], d)
+        model.AddHint(mv["slot"], slot)
+        model.AddHint(mv["end"], slot + durations[i])
+        if "start" in mv:
+            model.AddHint(mv["start"], d * slots_per_day + slot)
+        if "week_end" in mv:
+            model.AddHint(mv["week_end"], d * slots_per_day + slot + durations[i])
+
+        h = halls[0] if halls and halls[0] in inst.eligible_halls[i] else None
+        if h is None:
+            partial += 1
+        else:
+            model.AddHint(mv["hall"], h)
+            kept += 1
+        hinted[i] = (d, h)
+
+    for (i, d), dp in day_presence.items():
+        if i in hinted:
+            model.AddHint(dp, d == hinted[i][0])
+
+    # Daily presence is keyed (i, day, hall), flat presence (i, hall)
+    for key, pres in presence_vars.items():
+        target = hinted.get(key[0])
+        if target is None or target[1] is None:
+            continue
+        want = (key[0], *target) if len(key) == 3 else (key[0], target[1])
+        model.AddHint(pres, key == want)
+
+    return hint_stats(stats, kept, partial)
+
+
+# ----------------------------
+# Exams
+# ----------------------------
+def add_exam_hints(model, module_vars, presence, dp, previous, slots_per_day):
+    """Hint day/slot and halls of the monolithic build_exam_model.
+
+    A module whose previous halls are all gone only gets its (day, slot)
+    hinted (counted as partial).
+    """
+    assignment, stats = previous
+    kept = partial = 0
+    hinted = {}
+
+    for i, (d, s, halls) in assignment.items():
+        if not 0 <= s < slots_per_day:
+            continue
+        model.AddHint(module_vars[i]["day"], d)
+        model.AddHint(module_vars[i]["slot"], s)
+        hinted[i] = (d, s, set(halls))
+        if halls:
+            kept += 1
+        else:
+            partial += 1
+
+    for (i, d, s), a in dp.items():
+        if i in hinted:
+            model.AddHint(a, hinted[i][:2] == (d, s))
+
+    for (i, d, s, h), p in presence.items():
+        target = hinted.get(i)
+        if target is not None and target[2]:
+            model.AddHint(p, target[:2] == (d, s) and h in target[2])
+
+    return hint_stats(stats, kept, partial)
+
+
+def slot_hint(previous, slots_per_day):
+    """{(i, d, s): 1} for the two-stage slot model's assign_ds, plus stats."""
+    assignment, stats = previous
+    hint = {}
+    for i, (d, s, _) in assignment.items():
+        if 0 <= s < slots_per_day:
+            hint[(i, d, s)] = 1
+    return hint, hint_stats(stats, len(hint), 0)